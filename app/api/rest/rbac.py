@@ -1,12 +1,16 @@
 from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from app.schemas.rbac import (
     RoleCreate, RoleUpdate, RoleResponse, RoleList,
-    PermissionCreate, PermissionUpdate, PermissionResponse, PermissionList, PermissionTreeNode
+    PermissionCreate, PermissionUpdate, PermissionResponse, PermissionList, PermissionTreeNode,
+    PermissionHierarchyItem, IdSetReplace, IdSetPatch, AssignmentResult
 )
 from app.services.rbac import RoleService, PermissionService
 from app.models.user import User
-from app.core.security.deps import get_current_user
+from app.core.security.deps import get_current_user, get_current_active_superuser
+from app.core.security.rbac_cache import rbac_cache
+from app.utils.etag import conditional_response, make_etag
+from app.utils.serializer import json_response
 
 roles_router = APIRouter(prefix="", tags=["角色管理"])
 permissions_router = APIRouter(prefix="", tags=["权限管理"])
@@ -73,18 +77,110 @@ async def get_role(
 
 @roles_router.get("", response_model=RoleList)
 async def list_roles(
+    request: Request,
+    response: Response,
     page: int = 1,
     page_size: int = 10,
     name: Optional[str] = None,
     code: Optional[str] = None,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    with_total: bool = True,
+    total_mode: str = "exact",
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
-    """获取角色列表"""
-    roles, total = await RoleService.list_roles(page, page_size, name, code)
-    return {
+    """
+    获取角色列表
+    
+    支持两种分页方式：
+    - offset 分页：page + page_size
+    - 游标分页：使用上一页返回的 next_cursor 作为 cursor（需保持 sort 不变）
+    
+    sort 可选 id/created_at/code，"-" 前缀表示降序
+    
+    总数统计：
+    - with_total=false 时不统计总数，total 为 null
+    - total_mode 可选 exact（精确）/window（窗口函数）/estimate（估算）
+    
+    fields 为逗号分隔的返回字段（稀疏字段集），只查询这些列并直接以 orjson 序列化
+    
+    条件请求：角色的任何变更都会递增 RBAC 版本号，ETag 由版本号和查询参数生成，
+    If-None-Match 匹配时直接返回 304，不执行查询
+    """
+    etag = make_etag("roles", await rbac_cache.get_version(), request.url.query)
+    not_modified = conditional_response(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+    try:
+        roles, total, next_cursor = await RoleService.list_roles(
+            page, page_size, name, code, cursor=cursor, sort=sort,
+            with_total=with_total, total_mode=total_mode, fields=fields
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return json_response({
         "total": total,
-        "items": roles
-    }
+        "items": roles,
+        "next_cursor": next_cursor
+    }, response)
+
+@roles_router.get(
+    "/{role_id}/permissions",
+    response_model=List[int],
+    dependencies=[Depends(get_current_active_superuser)]
+)
+async def get_role_permissions(role_id: int):
+    """获取角色直接授予的权限ID (需要超级管理员权限)"""
+    try:
+        return await RoleService.get_role_permission_ids(role_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+@roles_router.put(
+    "/{role_id}/permissions",
+    response_model=AssignmentResult,
+    dependencies=[Depends(get_current_active_superuser)]
+)
+async def replace_role_permissions(role_id: int, request_data: IdSetReplace):
+    """
+    将角色的权限集合替换为 ids (需要超级管理员权限)
+    只插入/删除有差异的关联，全部在一个事务中完成，RBAC 版本号只递增一次
+    """
+    try:
+        added, removed, total = await RoleService.assign_permissions(role_id, replace=request_data.ids)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return {"added": added, "removed": removed, "total": total}
+
+@roles_router.patch(
+    "/{role_id}/permissions",
+    response_model=AssignmentResult,
+    dependencies=[Depends(get_current_active_superuser)]
+)
+async def patch_role_permissions(role_id: int, request_data: IdSetPatch):
+    """
+    增量修改角色的权限集合：添加 add，移除 remove (需要超级管理员权限)
+    """
+    try:
+        added, removed, total = await RoleService.assign_permissions(
+            role_id, add=request_data.add, remove=request_data.remove
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return {"added": added, "removed": removed, "total": total}
 
 # 权限相关接口
 @permissions_router.post("", response_model=PermissionResponse, status_code=status.HTTP_201_CREATED)
@@ -121,17 +217,68 @@ async def update_permission(
 @permissions_router.delete("/{permission_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_permission(
     permission_id: int,
+    cascade: bool = False,
     current_user: User = Depends(get_current_user)
 ):
-    """删除权限"""
+    """
+    删除权限
+    cascade=true 时通过闭包表一次删除整棵子树，否则存在子权限时拒绝删除
+    """
     try:
-        await PermissionService.delete_permission(permission_id)
+        await PermissionService.delete_permission(permission_id, cascade=cascade)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
+@permissions_router.get("/tree", response_model=List[PermissionTreeNode])
+async def get_permission_tree(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    获取权限树
+    权限的任何变更都会递增 RBAC 版本号，ETag 由版本号生成，If-None-Match 匹配时返回 304；
+    权限树及其 JSON 在内存中缓存，权限增删改时增量修补
+    """
+    etag = make_etag("permission-tree", await rbac_cache.get_version())
+    not_modified = conditional_response(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+    return json_response(await PermissionService.get_permission_tree_json(), response)
+
+@permissions_router.get("/{permission_id}/subtree", response_model=List[PermissionHierarchyItem])
+async def get_permission_subtree(
+    permission_id: int,
+    include_self: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """获取权限的全部子孙（按层级距离排序），由闭包表一次索引查询得出"""
+    try:
+        return json_response(await PermissionService.get_subtree(permission_id, include_self))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+@permissions_router.get("/{permission_id}/ancestors", response_model=List[PermissionHierarchyItem])
+async def get_permission_ancestors(
+    permission_id: int,
+    include_self: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """获取权限的全部祖先（从根权限开始），由闭包表一次索引查询得出"""
+    try:
+        return json_response(await PermissionService.get_ancestors(permission_id, include_self))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
 @permissions_router.get("/{permission_id}", response_model=PermissionResponse)
 async def get_permission(
     permission_id: int,
@@ -154,30 +301,38 @@ async def list_permissions(
     name: Optional[str] = None,
     code: Optional[str] = None,
     type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    with_total: bool = True,
+    total_mode: str = "exact",
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
-    """获取权限列表"""
+    """
+    获取权限列表
+    
+    支持 offset 分页和游标分页，分页、总数统计和 fields 参数的用法同角色列表
+    """
     try:
-        permissions, total = await PermissionService.list_permissions(
+        permissions, total, next_cursor = await PermissionService.list_permissions(
             page=page,
             page_size=page_size,
             name=name,
             code=code,
-            type=type
+            type=type,
+            cursor=cursor,
+            sort=sort,
+            with_total=with_total,
+            total_mode=total_mode,
+            fields=fields
         )
-        return {
+        return json_response({
             "total": total,
-            "items": permissions
-        }
+            "items": permissions,
+            "next_cursor": next_cursor
+        })
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
-
-@permissions_router.get("/tree", response_model=List[PermissionTreeNode])
-async def get_permission_tree(
-    current_user: User = Depends(get_current_user)
-):
-    """获取权限树"""
-    return await PermissionService.get_permission_tree()
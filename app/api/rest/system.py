@@ -0,0 +1,67 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+
+from app.core.security.deps import get_current_active_superuser
+from app.core.security.hashing import password_hasher
+from app.core.security.rbac_cache import rbac_cache
+from app.core.security.route_guard import route_guard
+from app.core.security.token_cache import token_cache
+from app.services.archive import archive_job
+from app.services.last_login import last_login_recorder
+from app.services.permission_tree import permission_tree
+from app.services.rbac_sync import RbacSyncService, load_manifest
+from app.services.user_import import user_importer
+from app.utils.pagination import total_cache
+
+router = APIRouter()
+
+
+@router.get(
+    "/metrics",
+    dependencies=[Depends(get_current_active_superuser)]  # 只有超级管理员可以查看运行指标
+)
+async def get_metrics() -> Dict[str, Any]:
+    """
+    获取运行时指标 (需要超级管理员权限)
+    """
+    return {
+        "password_hasher": password_hasher.stats(),
+        "token_cache": token_cache.stats(),
+        "rbac_cache": rbac_cache.stats(),
+        "last_login": last_login_recorder.stats(),
+        "total_cache": total_cache.stats(),
+        "user_import": user_importer.stats(),
+        "archive": archive_job.stats(),
+        "permission_tree": permission_tree.stats(),
+        "route_guard": route_guard.stats(),
+    }
+
+
+@router.post(
+    "/rbac/sync",
+    dependencies=[Depends(get_current_active_superuser)]  # 只有超级管理员可以同步权限清单
+)
+async def sync_rbac(
+    request: Request,
+    format: str = "yaml",
+    dry_run: bool = False,
+    prune: bool = False
+) -> Dict[str, Any]:
+    """
+    按清单同步权限、角色和角色授权 (需要超级管理员权限)
+    请求体为 YAML 或 JSON 格式的清单，差异在同一事务中写入
+    :param format: 清单格式 yaml/json
+    :param dry_run: 只返回同步计划，不做修改
+    :param prune: 删除清单中未出现的权限和角色
+    :return: 同步计划
+    """
+    try:
+        manifest = load_manifest(await request.body(), format)
+        plan = await RbacSyncService.sync(manifest, dry_run=dry_run, prune=prune)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return plan.to_dict()
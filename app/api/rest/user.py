@@ -1,23 +1,44 @@
 # app/api/rest/user.py
 
+import csv
+import io
 from typing import Optional, List, Set
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from fastapi.responses import StreamingResponse
 
 from app.models.user import User # 导入 User 模型
 from app.core.security.deps import (
     get_current_user, get_current_active_superuser,
     require_permissions, require_roles, require_active_user,
     require_superuser, require_all, require_any,
-    get_current_user_roles,get_current_user_permissions
+    get_current_user_roles,get_current_user_permissions, get_current_principal
 )
+from app.core.security.principal import Principal
+from app.core.security.rbac_cache import rbac_cache
 # 确保 UserCreate 被导入
-from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserList, PasswordChangeRequest
-from app.services.user import UserService
+from app.schemas.user import (
+    UserCreate, UserUpdate, UserResponse, UserList, PasswordChangeRequest,
+    BulkUserRequest, BulkUserRoleRequest, BulkOperationResult
+)
+from app.schemas.rbac import IdSetReplace, IdSetPatch, AssignmentResult
+from app.services.user import USER_EXPORT_FIELDS, UserService
+from app.services.user_import import iter_lines, user_importer
+from app.settings.config import EXPORT_CHUNK_SIZE
+from app.utils.etag import conditional_response, make_etag
+from app.utils.serializer import json_response, serialize_model
 
 
 router = APIRouter()
 user_service = UserService() # 实例化
 
+# 用户导出支持的格式及对应的媒体类型
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
 
 @router.post("", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def create_user(
@@ -42,6 +63,185 @@ async def create_user(
         )
 
 
+@router.post(
+    "/import",
+    dependencies=[Depends(get_current_active_superuser)]  # 只有超级管理员可以批量导入用户
+)
+async def import_users(
+    request: Request,
+    format: str = "csv"
+):
+    """
+    批量导入用户 (需要超级管理员权限)
+    请求体为 CSV（首行为表头，列名 username,email,password,is_active）或 NDJSON（每行一个 JSON 对象），
+    服务端按行流式读取、分批写入
+    :param format: 导入格式 csv/ndjson
+    :return: 导入结果，包含处理行数、创建数、失败数及失败行明细
+    """
+    try:
+        report = await user_importer.run(iter_lines(request.stream()), format)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return report.to_dict()
+
+
+@router.get(
+    "/export",
+    dependencies=[Depends(get_current_active_superuser)]  # 只有超级管理员可以导出用户
+)
+async def export_users(
+    format: str = "ndjson",
+    username: Optional[str] = None,
+    email: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    include_deleted: bool = False
+):
+    """
+    流式导出用户 (需要超级管理员权限)
+    按主键分块读取并边读边写，过滤条件与用户列表相同
+    :param format: 导出格式 ndjson/csv
+    :param username: 用户名过滤（可选）
+    :param email: 邮箱过滤（可选）
+    :param is_active: 是否激活过滤（可选）
+    :param include_deleted: 是否包含已逻辑删除的用户，默认不包含
+    :return: NDJSON 或 CSV 文件流
+    """
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"无效的导出格式，可选值：{list(EXPORT_MEDIA_TYPES)}"
+        )
+
+    async def generate():
+        chunks = UserService.export_users(
+            username, email, is_active, EXPORT_CHUNK_SIZE, include_deleted
+        )
+        if format == "csv":
+            yield ",".join(USER_EXPORT_FIELDS) + "\r\n"
+        async for chunk in chunks:
+            if format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows(
+                    [row[name] for name in USER_EXPORT_FIELDS] for row in serialize_model(chunk)
+                )
+                yield buffer.getvalue()
+            else:
+                # orjson 原生处理 datetime，逐行直接编码为字节
+                yield b"".join(orjson.dumps(row) + b"\n" for row in chunk)
+
+    return StreamingResponse(
+        generate(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=users.{format}"}
+    )
+
+
+# 批量操作，需在 /{user_id} 路由之前注册
+@router.post(
+    "/bulk/activate",
+    response_model=BulkOperationResult,
+    dependencies=[Depends(get_current_active_superuser)]  # 只有超级管理员可以批量操作用户
+)
+async def bulk_activate_users(request_data: BulkUserRequest):
+    """
+    批量激活用户 (需要超级管理员权限)
+    :param request_data: 用户ID列表
+    :return: 请求的用户数和实际变更的行数
+    """
+    requested, affected = await UserService.bulk_set_active(request_data.user_ids, True)
+    return {"requested": requested, "affected": affected}
+
+
+@router.post(
+    "/bulk/deactivate",
+    response_model=BulkOperationResult,
+    dependencies=[Depends(get_current_active_superuser)]
+)
+async def bulk_deactivate_users(request_data: BulkUserRequest):
+    """
+    批量禁用用户 (需要超级管理员权限)
+    :param request_data: 用户ID列表
+    :return: 请求的用户数和实际变更的行数
+    """
+    requested, affected = await UserService.bulk_set_active(request_data.user_ids, False)
+    return {"requested": requested, "affected": affected}
+
+
+@router.post(
+    "/bulk/delete",
+    response_model=BulkOperationResult,
+    dependencies=[Depends(get_current_active_superuser)]
+)
+async def bulk_delete_users(request_data: BulkUserRequest):
+    """
+    批量软删除用户 (需要超级管理员权限)
+    :param request_data: 用户ID列表
+    :return: 请求的用户数和实际删除的行数
+    """
+    requested, affected = await UserService.bulk_soft_delete(request_data.user_ids)
+    return {"requested": requested, "affected": affected}
+
+
+@router.post(
+    "/bulk/restore",
+    response_model=BulkOperationResult,
+    dependencies=[Depends(get_current_active_superuser)]
+)
+async def bulk_restore_users(request_data: BulkUserRequest):
+    """
+    批量恢复已软删除的用户 (需要超级管理员权限)
+    :param request_data: 用户ID列表
+    :return: 请求的用户数和实际恢复的行数
+    """
+    requested, affected = await UserService.bulk_restore(request_data.user_ids)
+    return {"requested": requested, "affected": affected}
+
+
+@router.post(
+    "/bulk/roles/assign",
+    response_model=BulkOperationResult,
+    dependencies=[Depends(get_current_active_superuser)]
+)
+async def bulk_assign_roles(request_data: BulkUserRoleRequest):
+    """
+    批量为用户分配角色 (需要超级管理员权限)
+    已拥有的角色会被跳过，不存在的用户会被忽略
+    :param request_data: 用户ID列表和角色ID列表
+    :return: 请求的用户数和新增的用户-角色关联数
+    """
+    try:
+        requested, affected = await UserService.bulk_assign_roles(
+            request_data.user_ids, request_data.role_ids
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return {"requested": requested, "affected": affected}
+
+
+@router.post(
+    "/bulk/roles/revoke",
+    response_model=BulkOperationResult,
+    dependencies=[Depends(get_current_active_superuser)]
+)
+async def bulk_revoke_roles(request_data: BulkUserRoleRequest):
+    """
+    批量撤销用户的角色 (需要超级管理员权限)
+    :param request_data: 用户ID列表和角色ID列表
+    :return: 请求的用户数和删除的用户-角色关联数
+    """
+    requested, affected = await UserService.bulk_revoke_roles(
+        request_data.user_ids, request_data.role_ids
+    )
+    return {"requested": requested, "affected": affected}
+
+
 @router.put("/{user_id}", response_model=UserResponse)
 async def update_user(
     user_id: int,
@@ -88,16 +288,25 @@ async def delete_user(
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user) # 建议修改类型提示
     # 可以在这里添加权限检查
 ):
     """
     获取用户详情
+    支持条件请求：ETag 由 updated_at 生成，If-None-Match 匹配时返回 304
     :param user_id: 用户ID
     :param current_user: 当前登录用户（来自token验证）
     :return: 用户详细信息
     """
     try:
+        # 先只读取 updated_at，未修改时不加载完整记录
+        updated_at = await UserService.get_user_updated_at(user_id)
+        etag = make_etag("user", user_id, updated_at)
+        not_modified = conditional_response(request, response, etag)
+        if not_modified is not None:
+            return not_modified
         user = await UserService.get_user(user_id)
         return user
     except ValueError as e:
@@ -113,31 +322,53 @@ async def list_users(
     username: Optional[str] = None,
     email: Optional[str] = None,
     is_active: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    with_total: bool = True,
+    total_mode: str = "exact",
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_user) # 建议修改类型提示
     # 可以在这里添加权限检查
 ):
     """
     获取用户列表
-    :param page: 页码，默认1
-    :param page_size: 每页数量，默认10
+    只查询所需的列并直接以 orjson 序列化，不经过 ORM 模型和响应模型
+    :param page: 页码，默认1（offset 分页）
+    :param page_size: 每页数量，默认10，超过上限时按上限处理
     :param username: 用户名过滤（可选）
     :param email: 邮箱过滤（可选）
     :param is_active: 是否激活过滤（可选）
+    :param cursor: 分页游标（可选），取上一页返回的 next_cursor，提供时忽略 page
+    :param sort: 排序字段 id/created_at/username，"-" 前缀表示降序
+    :param with_total: 是否返回总数，默认True；为False时不执行统计，total 为 null
+    :param total_mode: 总数统计方式 exact（精确）/window（窗口函数，与分页同一次查询）/estimate（估算）
+    :param fields: 逗号分隔的返回字段（稀疏字段集），如 id,username；默认返回全部字段
     :param current_user: 当前登录用户（来自token验证）
-    :return: 用户列表和总数
+    :return: 用户列表、总数和下一页游标
     """
-    print("current_user:", current_user)
-    users, total = await UserService.list_users(
-        page=page,
-        page_size=page_size,
-        username=username,
-        email=email,
-        is_active=is_active
-    )
-    return {
+    try:
+        users, total, next_cursor = await UserService.list_users(
+            page=page,
+            page_size=page_size,
+            username=username,
+            email=email,
+            is_active=is_active,
+            cursor=cursor,
+            sort=sort,
+            with_total=with_total,
+            total_mode=total_mode,
+            fields=fields
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return json_response({
         "total": total,
-        "items": users
-    }
+        "items": users,
+        "next_cursor": next_cursor
+    })
 
 # 以下是各种鉴权方式的示例
 
@@ -191,8 +422,8 @@ async def change_password(
     status_code=status.HTTP_200_OK,
     dependencies=[
         Depends(require_any(
-            lambda: require_roles("admin"),
-            lambda: require_permissions(["user.manage","user.reset-password"])
+            require_roles("admin"),
+            require_permissions(["user.manage","user.reset-password"])
         ))
     ]
 )
@@ -220,8 +451,8 @@ async def activate_user(
     status_code=status.HTTP_200_OK,
     dependencies=[
         Depends(require_all(
-            lambda: require_permissions("user.manage"),
-            lambda: require_roles(["admin", "supervisor"], require_all=False)
+            require_permissions("user.manage"),
+            require_roles(["admin", "supervisor"], require_all=False)
         ))
     ]
 )
@@ -277,30 +508,104 @@ async def admin_dashboard():
     response_model=List[str]
 )
 async def get_my_permissions(
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    principal: Principal = Depends(get_current_principal)
 ):
     """
     获取当前用户的权限列表
+    支持条件请求：ETag 由 RBAC 版本号和用户的权限位集生成
     
-    :param current_user: 当前登录用户
+    :param principal: 当前请求的主体
     :return: 权限列表
     """
-    permissions = await get_current_user_permissions(current_user)
-    return permissions
+    etag = make_etag(
+        "me-permissions", principal.user.id, principal.is_superadmin,
+        await rbac_cache.get_version(), principal.permission_mask
+    )
+    not_modified = conditional_response(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+    return await get_current_user_permissions(principal)
 
 @router.get(
     "/me/roles", 
     response_model=List[str]
 )
 async def get_my_roles(
-    current_user: User = Depends(get_current_user)
+    roles: Set[str] = Depends(get_current_user_roles)
 ):
     """
     获取当前用户的角色列表
     
-    :param current_user: 当前登录用户
+    :param roles: 当前用户的角色集合
     :return: 角色列表
     """
-    roles = await get_current_user_roles(current_user)
     return roles
 
+
+@router.get(
+    "/{user_id}/roles",
+    response_model=List[int],
+    dependencies=[Depends(get_current_active_superuser)]
+)
+async def get_user_roles(user_id: int):
+    """
+    获取用户的角色ID (需要超级管理员权限)
+    :param user_id: 用户ID
+    :return: 角色ID列表
+    """
+    try:
+        return await UserService.get_user_role_ids(user_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@router.put(
+    "/{user_id}/roles",
+    response_model=AssignmentResult,
+    dependencies=[Depends(get_current_active_superuser)]
+)
+async def replace_user_roles(user_id: int, request_data: IdSetReplace):
+    """
+    将用户的角色集合替换为 ids (需要超级管理员权限)
+    只插入/删除有差异的关联，全部在一个事务中完成，RBAC 版本号只递增一次
+    :param user_id: 用户ID
+    :param request_data: 目标角色ID集合
+    :return: 新增、移除的关联数和变更后的角色数
+    """
+    try:
+        added, removed, total = await UserService.assign_roles(user_id, replace=request_data.ids)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return {"added": added, "removed": removed, "total": total}
+
+
+@router.patch(
+    "/{user_id}/roles",
+    response_model=AssignmentResult,
+    dependencies=[Depends(get_current_active_superuser)]
+)
+async def patch_user_roles(user_id: int, request_data: IdSetPatch):
+    """
+    增量修改用户的角色集合：添加 add，移除 remove (需要超级管理员权限)
+    :param user_id: 用户ID
+    :param request_data: 需要添加和移除的角色ID
+    :return: 新增、移除的关联数和变更后的角色数
+    """
+    try:
+        added, removed, total = await UserService.assign_roles(
+            user_id, add=request_data.add, remove=request_data.remove
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return {"added": added, "removed": removed, "total": total}
@@ -64,6 +64,11 @@ async def init_db() -> None:
         logger.info("初始化迁移系统...")
         await command.init()
         
+        # 先应用仓库中已有的迁移，避免根据过期的模型历史重复生成迁移
+        logger.info("应用已有迁移...")
+        await command.upgrade(run_in_transaction=True)
+        await command.init()
+        
         try:
             # 创建新的迁移
             logger.info("检查并创建新的迁移...")
@@ -4,11 +4,18 @@ from typing import Optional
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.api import router as main_router
 from app.core.events.database import init_db, close_db
+from app.core.security.hashing import password_hasher
+from app.core.security.route_guard import AuthorizationMiddleware
 from app.log.config.log_config import setup_logging, get_logger
+from app.services.archive import archive_job
+from app.services.last_login import last_login_recorder
+from app.services.rbac import PermissionService
+from app.services.search import search_index
 from app.settings.config import (
     APP_NAME,
     APP_VERSION,
@@ -17,7 +24,9 @@ from app.settings.config import (
     CORS_METHODS,
     CORS_HEADERS,
     CORS_CREDENTIALS,
-    BASE_DIR
+    BASE_DIR,
+    ARCHIVE_ENABLED,
+    RBAC_ROUTE_AUTHORIZATION
 )
 
 logger = get_logger(__name__)
@@ -41,10 +50,23 @@ class SystemInit:
         # 初始化数据库连接
         await init_db()
         logger.info("数据库连接已建立")
+        # 建立子串搜索索引
+        await search_index.setup()
+        # 检查权限闭包表
+        await PermissionService.ensure_closure()
+        # 启动最后登录时间写回任务
+        last_login_recorder.start()
+        # 启动逻辑删除记录归档任务
+        if ARCHIVE_ENABLED:
+            archive_job.start()
 
         yield
 
         # 关闭时执行
+        # 在关闭数据库连接前写入缓冲中的最后登录时间
+        await archive_job.stop()
+        await last_login_recorder.stop()
+        password_hasher.shutdown()
         await close_db()
         logger.info("应用程序关闭")
 
@@ -59,6 +81,8 @@ class SystemInit:
             version=APP_VERSION,
             description=APP_DESCRIPTION,
             lifespan=self.lifespan,
+            # 默认使用 orjson 编码响应
+            default_response_class=ORJSONResponse,
         )
 
         # 配置CORS
@@ -74,6 +98,9 @@ class SystemInit:
 
     def _init_middleware(self):
         """初始化中间件"""
+        # 接口授权中间件需在 CORS 中间件之内，拒绝访问的响应才带有 CORS 头
+        if RBAC_ROUTE_AUTHORIZATION:
+            self.app.add_middleware(AuthorizationMiddleware)
         self.app.add_middleware(
             CORSMiddleware,
             allow_origins=CORS_ORIGINS,
@@ -0,0 +1,82 @@
+from typing import Dict, FrozenSet, Iterable, Mapping, Tuple
+
+
+class PermissionRegistry:
+    """
+    权限代码驻留表
+    为每个权限分配快照内的紧凑位序号，将权限代码集合编码为整数位集，
+    权限检查因此变为整数的按位与/或运算
+    """
+
+    __slots__ = ("_bits", "_codes", "_compiled")
+
+    def __init__(self, bits: Mapping[str, int]):
+        """
+        Args:
+            bits: 权限代码到位序号的映射
+        """
+        self._bits: Dict[str, int] = dict(bits)
+        self._codes: Dict[int, str] = {bit: code for code, bit in self._bits.items()}
+        # 已编译的权限要求：权限代码元组 -> (位集, 是否全部为已知权限)
+        self._compiled: Dict[Tuple[str, ...], Tuple[int, bool]] = {}
+
+    def __len__(self) -> int:
+        return len(self._bits)
+
+    def bit_of(self, code: str) -> int:
+        """获取权限代码的位序号，未知权限抛出 KeyError"""
+        return self._bits[code]
+
+    def mask_of(self, codes: Iterable[str]) -> int:
+        """将权限代码集合编码为位集，忽略未知权限"""
+        mask = 0
+        bits = self._bits
+        for code in codes:
+            bit = bits.get(code)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def codes_of(self, mask: int) -> FrozenSet[str]:
+        """将位集解码为权限代码集合"""
+        codes = self._codes
+        result = []
+        while mask:
+            low = mask & -mask
+            code = codes.get(low.bit_length() - 1)
+            if code is not None:
+                result.append(code)
+            mask ^= low
+        return frozenset(result)
+
+    def compile(self, codes: Iterable[str]) -> Tuple[int, bool]:
+        """
+        编译一组权限要求
+        返回 (要求位集, 是否全部为已知权限)，结果按权限代码元组缓存
+        """
+        key = tuple(codes)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = (self.mask_of(key), all(code in self._bits for code in key))
+            self._compiled[key] = compiled
+        return compiled
+
+    def check(self, mask: int, codes: Iterable[str], require_all: bool = True) -> bool:
+        """
+        检查位集是否满足权限要求
+        require_all 为 True 时要求全部满足（未知权限视为不满足），否则满足其一即可
+        """
+        required, known = self.compile(codes)
+        if require_all:
+            return known and mask & required == required
+        return mask & required != 0
+
+
+def encode_mask(mask: int) -> bytes:
+    """将位集编码为小端字节序"""
+    return mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+
+
+def decode_mask(raw: bytes) -> int:
+    """将小端字节序解码为位集"""
+    return int.from_bytes(raw, "little")
@@ -0,0 +1,59 @@
+import base64
+from typing import Any, Dict, Optional
+
+from app.core.security.bitset import decode_mask, encode_mask
+from app.core.security.principal import Principal
+from app.core.security.rbac_cache import RbacSnapshot, rbac_cache
+from app.models.user import User
+
+
+def encode_permission_bitmap(mask: int) -> str:
+    """
+    将权限位集编码为字符串
+    第 n 位表示快照位序号为 n 的权限（被授予的权限按ID排序），结果使用无填充的 base64url 编码
+    """
+    return base64.urlsafe_b64encode(encode_mask(mask)).rstrip(b"=").decode()
+
+
+def decode_permission_bitmap(value: str) -> int:
+    """将字符串解码为权限位集"""
+    return decode_mask(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)))
+
+
+async def build_rbac_claims(user: User) -> Dict[str, Any]:
+    """
+    构建访问令牌中的 RBAC 声明
+    - roles: 角色代码列表
+    - perms: 权限位图，位序号只在 rv 对应的快照中有效
+    - rv: 签发时的 RBAC 版本号
+    """
+    snapshot = await rbac_cache.get_snapshot()
+    role_ids = await rbac_cache.get_user_role_ids(user.id)
+    return {
+        "roles": sorted(snapshot.roles_of(role_ids)),
+        "perms": encode_permission_bitmap(snapshot.mask_of(role_ids)),
+        "rv": snapshot.version,
+    }
+
+
+def principal_from_claims(
+    user: User,
+    claims: Dict[str, Any],
+    snapshot: RbacSnapshot
+) -> Optional[Principal]:
+    """
+    根据令牌声明构建主体
+    声明缺失或版本号与当前快照不一致时返回 None，调用方应回退到数据库加载
+    """
+    if "rv" not in claims or claims["rv"] != snapshot.version:
+        return None
+    try:
+        permission_mask = decode_permission_bitmap(claims.get("perms", ""))
+    except (TypeError, ValueError):
+        return None
+    return Principal(
+        user=user,
+        roles=frozenset(claims.get("roles", [])),
+        permission_mask=permission_mask,
+        registry=snapshot.registry,
+    )
@@ -1,42 +1,67 @@
+import inspect
 from functools import wraps
-from typing import List, Optional, Set, Union, Callable
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 
 
-from app.models.rbac import Permission, Role, UserRole
+from app.core.security.claims import principal_from_claims
+from app.core.security.policy import (
+    ActiveUserPolicy, PermissionPolicy, Policy, RolePolicy, SuperuserPolicy, all_of, any_of
+)
+from app.core.security.principal import Principal, load_principal, set_current_principal
+from app.core.security.rbac_cache import rbac_cache
+from app.core.security.token_cache import token_cache
 from app.settings import config as settings
 from app.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
-    """获取当前用户，如果token无效则抛出异常"""
+async def authenticate_token(token: str) -> Tuple[User, Dict[str, Any]]:
+    """
+    校验访问令牌，返回用户和令牌载荷
+    :raises: HTTPException 令牌无效时为 401，用户被禁用时为 403
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="无效的认证凭据",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(
-            token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
-        )
-        user_id: str = payload.get("uid")
-        if user_id is None:
+    # 命中缓存时跳过令牌解码和用户查询
+    cached = token_cache.get(token)
+    if cached is not None:
+        user = cached.user.to_user()
+        payload = cached.claims
+    else:
+        try:
+            payload = jwt.decode(
+                token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
+            )
+            user_id: str = payload.get("uid")
+            if user_id is None:
+                raise credentials_exception
+        except JWTError:
+            raise credentials_exception
+
+        user = await User.get_or_none(id=user_id)
+        if user is None:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-        
-    user = await User.get_or_none(id=user_id)
-    if user is None:
-        raise credentials_exception
+        token_cache.set(token, payload, user)
+
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="用户已被禁用"
         )
+    return user, payload
+
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)) -> User:
+    """获取当前用户，如果token无效则抛出异常"""
+    user, payload = await authenticate_token(token)
+    # 保存令牌载荷，供主体加载时读取嵌入的权限声明
+    request.state.token_claims = payload
     return user
 
 async def get_current_active_superuser(
@@ -50,26 +75,83 @@ async def get_current_active_superuser(
         )
     return current_user
 
-async def get_current_user_permissions(
+async def get_current_principal(
+    request: Request,
     current_user: User = Depends(get_current_user)
+) -> Principal:
+    """
+    获取当前请求的主体
+    角色和权限在每个请求中只加载一次，并保存在 request.state 中
+    （授权中间件已加载时直接复用）；令牌中嵌入了未过期的权限声明时不访问数据库
+    """
+    principal = getattr(request.state, "principal", None)
+    if principal is None or principal.user.id != current_user.id:
+        principal = await resolve_principal(
+            current_user, getattr(request.state, "token_claims", None)
+        )
+        request.state.principal = principal
+        set_current_principal(principal)
+    return principal
+
+async def resolve_principal(user: User, claims: Optional[Dict[str, Any]]) -> Principal:
+    """根据用户和令牌载荷加载主体，令牌中嵌入了未过期的权限声明时不访问数据库"""
+    principal = None
+    if claims:
+        # 令牌声明的版本号与当前快照一致时，直接使用声明鉴权
+        snapshot = await rbac_cache.get_snapshot()
+        principal = principal_from_claims(user, claims, snapshot)
+    if principal is None:
+        principal = await load_principal(user)
+    return principal
+
+async def get_current_user_permissions(
+    principal: Principal = Depends(get_current_principal)
 ) -> Set[str]:
     """获取当前用户的权限集合"""
-    if current_user.is_superadmin:
+    if principal.is_superadmin:
         return set("*")  # 超级用户返回所有权限
 
-   # 获取当前用户的所有角色
-    roles = await UserRole.filter(user=current_user).values_list("role__id", flat=True)
-
-    # 获取这些角色的所有权限代码
-    # 返回权限集合
-    return set(await Permission.filter(roles__id__in=roles).values_list('code', flat=True))
+    return set(principal.permissions)
 
 async def get_current_user_roles(
-    current_user: User = Depends(get_current_user)
+    principal: Principal = Depends(get_current_principal)
 ) -> Set[str]:
     """获取当前用户的角色集合"""
     
-    return set(await UserRole.filter(user=current_user).values_list("role__code", flat=True))
+    return set(principal.roles)
+
+def require_policy(policy: Policy, return_user: bool = False) -> Callable:
+    """
+    根据策略表达式生成权限检查依赖
+    检查函数的 policy 属性保存策略，供 require_any/require_all 组合
+    :param policy: 策略表达式
+    :param return_user: 检查通过时是否返回当前用户
+    """
+    async def check_policy(principal: Principal = Depends(get_current_principal)):
+        if not policy.allows(principal):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=policy.explain(principal)
+            )
+        if return_user:
+            return principal.user
+
+    check_policy.policy = policy
+    return check_policy
+
+def _policy_of(requirement: Union[Policy, Callable]) -> Policy:
+    """
+    取出权限检查的策略
+    支持 Policy、require_* 返回的检查函数，以及返回检查函数的工厂（如 lambda: require_roles("admin")）
+    """
+    if isinstance(requirement, Policy):
+        return requirement
+    policy = getattr(requirement, "policy", None)
+    if policy is None and callable(requirement) and not inspect.iscoroutinefunction(requirement):
+        policy = getattr(requirement(), "policy", None)
+    if policy is None:
+        raise TypeError(f"不支持的权限检查: {requirement!r}，需要 Policy 或 require_* 返回的检查函数")
+    return policy
 
 def require_permissions(permissions: Union[str, List[str]], require_all: bool = True):
     """
@@ -79,26 +161,7 @@ def require_permissions(permissions: Union[str, List[str]], require_all: bool =
     """
     if isinstance(permissions, str):
         permissions = [permissions]
-
-    async def check_permissions(current_user: User = Depends(get_current_user)):
-        if current_user.is_superadmin:
-            return
-        
-        user_permissions = await get_current_user_permissions(current_user)
-        if require_all:
-            if not all(perm in user_permissions for perm in permissions):
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail=f"权限不足，需要以下所有权限: {', '.join(permissions)}"
-                )
-        else:
-            if not any(perm in user_permissions for perm in permissions):
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail=f"权限不足，需要以下任意一个权限: {', '.join(permissions)}"
-                )
-    
-    return check_permissions
+    return require_policy(PermissionPolicy(permissions, require_all))
 
 def require_roles(roles: Union[str, List[str]], require_all: bool = True):
     """
@@ -108,93 +171,28 @@ def require_roles(roles: Union[str, List[str]], require_all: bool = True):
     """
     if isinstance(roles, str):
         roles = [roles]
-
-    async def check_roles(current_user: User = Depends(get_current_user)):
-        if current_user.is_superadmin:
-            return
-        
-        user_roles = await get_current_user_roles(current_user)
-        if require_all:
-            if not all(role in user_roles for role in roles):
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail=f"角色不足，需要以下所有角色: {', '.join(roles)}"
-                )
-        else:
-            if not any(role in user_roles for role in roles):
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail=f"角色不足，需要以下任意一个角色: {', '.join(roles)}"
-                )
-    
-    return check_roles
+    return require_policy(RolePolicy(roles, require_all))
 
 def require_active_user():
     """检查用户是否处于活动状态"""
-    async def check_active(current_user: User = Depends(get_current_user)):
-        if not current_user.is_active:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="用户已被禁用"
-            )
-        return current_user
-    return check_active
+    return require_policy(ActiveUserPolicy(), return_user=True)
 
 def require_superuser():
     """检查用户是否是超级管理员"""
-    async def check_superuser(current_user: User = Depends(get_current_user)):
-        if not current_user.is_superadmin:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="需要超级管理员权限"
-            )
-        return current_user
-    return check_superuser
+    return require_policy(SuperuserPolicy(), return_user=True)
 
-def require_any(*requirements: Callable) -> Callable:
+def require_any(*requirements: Union[Policy, Callable]) -> Callable:
     """
     组合多个权限检查，只要满足其中任意一个即可
-    :param requirements: 权限检查函数列表
-    """
-    async def check_any(current_user: User = Depends(get_current_user)):
-        if current_user.is_superadmin:
-            return
-        
-        # 收集所有错误信息
-        errors = []
-        for requirement in requirements:
-            try:
-                # 尝试执行每个权限检查
-                await requirement()(current_user)
-                # 如果有一个检查通过，直接返回
-                return
-            except HTTPException as e:
-                # 收集错误信息
-                errors.append(e.detail)
-        
-        # 如果所有检查都失败，抛出组合的错误信息
-
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"需要满足以下条件之一: {' 或 '.join(errors)}"
-        )
-    
-    return check_any
+    组合在定义时编译为一个策略表达式，请求时基于同一个主体短路求值
+    :param requirements: 权限检查函数或策略
+    """
+    return require_policy(any_of(*map(_policy_of, requirements)))
 
-def require_all(*requirements: Callable) -> Callable:
+def require_all(*requirements: Union[Policy, Callable]) -> Callable:
     """
     组合多个权限检查，必须同时满足所有条件
-    :param requirements: 权限检查函数列表
-    """
-    async def check_all(current_user: User = Depends(get_current_user)):
-        if current_user.is_superadmin:
-            return
-        
-        # 依次执行所有权限检查
-        for requirement in requirements:
-            await requirement()(current_user)
-        
-        # 如果所有检查都通过，返回
-        return
-    
-    return check_all
\ No newline at end of file
+    组合在定义时编译为一个策略表达式，请求时基于同一个主体短路求值
+    :param requirements: 权限检查函数或策略
+    """
+    return require_policy(all_of(*map(_policy_of, requirements)))
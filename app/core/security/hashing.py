@@ -0,0 +1,148 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.security.token import get_password_hash, verify_password
+from app.log.config.log_config import get_logger
+from app.settings.config import (
+    PASSWORD_HASH_EXECUTOR,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_CONCURRENCY
+)
+
+logger = get_logger(__name__)
+
+
+def _hash_batch(passwords: List[str]) -> List[str]:
+    """在工作线程/进程中批量计算密码哈希"""
+    return [get_password_hash(password) for password in passwords]
+
+
+class PasswordHasher:
+    """
+    异步密码哈希服务
+    将 bcrypt 计算放到线程池/进程池中执行，避免阻塞事件循环
+    """
+
+    def __init__(self, executor_type: str = "thread", workers: int = 0, max_concurrency: int = 8):
+        """
+        Args:
+            executor_type: 执行器类型，thread 或 process
+            workers: 工作线程/进程数，0 表示使用 CPU 核数
+            max_concurrency: 同时进行的哈希运算上限，超出的请求排队等待
+        """
+        if executor_type not in ("thread", "process"):
+            raise ValueError(f"无效的密码哈希执行器类型: {executor_type}")
+        self.executor_type = executor_type
+        self.workers = workers or os.cpu_count() or 1
+        self.max_concurrency = max(1, max_concurrency)
+
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # 统计指标
+        self._in_flight = 0
+        self._waiting = 0
+        self._max_waiting = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        """延迟创建执行器"""
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="password-hasher"
+                )
+            logger.info(f"密码哈希执行器已创建: {self.executor_type} x {self.workers}")
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """在执行器中运行哈希函数，并受并发上限约束"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore()
+
+        self._waiting += 1
+        self._max_waiting = max(self._max_waiting, self._waiting)
+        started = loop.time()
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        self._total_wait_seconds += loop.time() - started
+
+        self._in_flight += 1
+        try:
+            result = await loop.run_in_executor(self._get_executor(), func, *args)
+            self._completed += 1
+            return result
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+            semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        """计算密码哈希"""
+        return await self._run(get_password_hash, password)
+
+    async def hash_many(self, passwords: List[str]) -> List[str]:
+        """
+        批量计算密码哈希，保持输入顺序
+        按工作线程/进程数均分后提交，减少进程间通信次数；每份占用一个并发名额，
+        与登录、注册等请求共用执行器和并发上限
+        """
+        if not passwords:
+            return []
+        size = -(-len(passwords) // self.workers)
+        parts = await asyncio.gather(*(
+            self._run(_hash_batch, passwords[i:i + size])
+            for i in range(0, len(passwords), size)
+        ))
+        return [password_hash for part in parts for password_hash in part]
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """验证密码"""
+        return await self._run(verify_password, password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取执行器统计指标"""
+        finished = self._completed + self._failed
+        return {
+            "executor": self.executor_type,
+            "workers": self.workers,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "queue_depth": self._waiting,
+            "max_queue_depth": self._max_waiting,
+            "completed": self._completed,
+            "failed": self._failed,
+            "avg_wait_ms": round(self._total_wait_seconds / finished * 1000, 3) if finished else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        """关闭执行器"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            logger.info("密码哈希执行器已关闭")
+        self._semaphore = None
+
+
+# 创建全局实例
+password_hasher = PasswordHasher(
+    executor_type=PASSWORD_HASH_EXECUTOR,
+    workers=PASSWORD_HASH_WORKERS,
+    max_concurrency=PASSWORD_HASH_MAX_CONCURRENCY,
+)
@@ -0,0 +1,191 @@
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Tuple, Type
+
+from app.core.security.principal import Principal
+
+
+class Policy(ABC):
+    """
+    权限策略表达式
+    叶子节点检查权限、角色或用户标志，AnyOf/AllOf 组合子节点，可用 | 和 & 组合；
+    求值只读取请求中已加载的主体（角色、权限位集、超级管理员标志），
+    按短路规则返回布尔值，不以异常控制流程
+    """
+
+    __slots__ = ()
+
+    @abstractmethod
+    def allows(self, principal: Principal) -> bool:
+        """判断主体是否满足策略"""
+
+    @abstractmethod
+    def describe(self) -> str:
+        """策略的文字说明"""
+
+    def explain(self, principal: Principal) -> str:
+        """主体不满足策略时的原因"""
+        return self.describe()
+
+    def __or__(self, other: "Policy") -> "Policy":
+        return any_of(self, other)
+
+    def __and__(self, other: "Policy") -> "Policy":
+        return all_of(self, other)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.describe()}>"
+
+
+class _CodesPolicy(Policy):
+    """按代码集合检查的叶子策略"""
+
+    __slots__ = ("codes", "require_all")
+
+    def __init__(self, codes: Iterable[str], require_all: bool = True):
+        """
+        Args:
+            codes: 代码列表
+            require_all: True 表示需要全部满足，False 表示满足其一即可
+        """
+        # 去重并保持顺序，同时作为位集编译缓存的键
+        self.codes: Tuple[str, ...] = tuple(dict.fromkeys(codes))
+        self.require_all = require_all
+
+    def merges_into(self, require_all: bool) -> bool:
+        """能否与同类、同模式的叶子合并（单个代码的全部/任意含义相同）"""
+        return self.require_all == require_all or len(self.codes) == 1
+
+
+class PermissionPolicy(_CodesPolicy):
+    """权限检查，超级管理员直接通过"""
+
+    __slots__ = ()
+
+    def allows(self, principal: Principal) -> bool:
+        return principal.is_superadmin or principal.has_permissions(self.codes, self.require_all)
+
+    def describe(self) -> str:
+        scope = "所有" if self.require_all else "任意一个"
+        return f"权限不足，需要以下{scope}权限: {', '.join(self.codes)}"
+
+
+class RolePolicy(_CodesPolicy):
+    """角色检查，超级管理员直接通过"""
+
+    __slots__ = ()
+
+    def allows(self, principal: Principal) -> bool:
+        return principal.is_superadmin or principal.has_roles(self.codes, self.require_all)
+
+    def describe(self) -> str:
+        scope = "所有" if self.require_all else "任意一个"
+        return f"角色不足，需要以下{scope}角色: {', '.join(self.codes)}"
+
+
+class SuperuserPolicy(Policy):
+    """超级管理员检查"""
+
+    __slots__ = ()
+
+    def allows(self, principal: Principal) -> bool:
+        return principal.is_superadmin
+
+    def describe(self) -> str:
+        return "需要超级管理员权限"
+
+
+class ActiveUserPolicy(Policy):
+    """用户激活状态检查"""
+
+    __slots__ = ()
+
+    def allows(self, principal: Principal) -> bool:
+        return principal.user.is_active
+
+    def describe(self) -> str:
+        return "用户已被禁用"
+
+
+class AnyOf(Policy):
+    """满足任意一个子策略即可，按顺序求值，遇到满足的子策略即停止"""
+
+    __slots__ = ("policies",)
+
+    def __init__(self, policies: Iterable[Policy]):
+        self.policies: Tuple[Policy, ...] = tuple(policies)
+
+    def allows(self, principal: Principal) -> bool:
+        return any(policy.allows(principal) for policy in self.policies)
+
+    def describe(self) -> str:
+        return f"需要满足以下条件之一: {' 或 '.join(policy.describe() for policy in self.policies)}"
+
+
+class AllOf(Policy):
+    """需要满足全部子策略，按顺序求值，遇到不满足的子策略即停止"""
+
+    __slots__ = ("policies",)
+
+    def __init__(self, policies: Iterable[Policy]):
+        self.policies: Tuple[Policy, ...] = tuple(policies)
+
+    def allows(self, principal: Principal) -> bool:
+        return all(policy.allows(principal) for policy in self.policies)
+
+    def describe(self) -> str:
+        return f"需要同时满足: {' 且 '.join(policy.describe() for policy in self.policies)}"
+
+    def explain(self, principal: Principal) -> str:
+        """返回第一个不满足的子策略的原因"""
+        for policy in self.policies:
+            if not policy.allows(principal):
+                return policy.explain(principal)
+        return self.describe()
+
+
+def _combine(
+    combinator: Type[Policy],
+    policies: Iterable[Policy],
+    require_all: bool
+) -> Policy:
+    """
+    构建组合策略并化简：
+    - 展开同类的嵌套组合
+    - 同一组合中同模式的权限叶子、角色叶子各合并为一个，合并后的权限只需一次位集运算
+    """
+    flattened: List[Policy] = []
+    for policy in policies:
+        if type(policy) is combinator:
+            flattened.extend(policy.policies)
+        else:
+            flattened.append(policy)
+
+    combined: List[Policy] = []
+    merged = {}
+    for policy in flattened:
+        if isinstance(policy, _CodesPolicy) and policy.merges_into(require_all):
+            leaf_type = type(policy)
+            if leaf_type in merged:
+                index = merged[leaf_type]
+                combined[index] = leaf_type(combined[index].codes + policy.codes, require_all)
+                continue
+            merged[leaf_type] = len(combined)
+        combined.append(policy)
+
+    if len(combined) == 1:
+        return combined[0]
+    return combinator(combined)
+
+
+def any_of(*policies: Policy) -> Policy:
+    """组合策略，满足任意一个即可"""
+    if not policies:
+        raise ValueError("至少需要一个策略")
+    return _combine(AnyOf, policies, require_all=False)
+
+
+def all_of(*policies: Policy) -> Policy:
+    """组合策略，需要全部满足"""
+    if not policies:
+        raise ValueError("至少需要一个策略")
+    return _combine(AllOf, policies, require_all=True)
@@ -0,0 +1,68 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import cached_property
+from typing import FrozenSet, Iterable, Optional
+
+from app.core.security.bitset import PermissionRegistry
+from app.core.security.rbac_cache import rbac_cache
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    当前请求的主体
+    包含用户及其角色代码、权限位集，每个请求只加载一次
+    """
+    user: User
+    roles: FrozenSet[str]
+    permission_mask: int
+    registry: PermissionRegistry
+
+    @property
+    def is_superadmin(self) -> bool:
+        return self.user.is_superadmin
+
+    @cached_property
+    def permissions(self) -> FrozenSet[str]:
+        """权限代码集合，仅在需要列出权限时才从位集解码"""
+        return self.registry.codes_of(self.permission_mask)
+
+    def has_permissions(self, permissions: Iterable[str], require_all: bool = True) -> bool:
+        """检查是否拥有权限，require_all 为 False 时只需满足其中一个"""
+        return self.registry.check(self.permission_mask, permissions, require_all)
+
+    def has_roles(self, roles: Iterable[str], require_all: bool = True) -> bool:
+        """检查是否拥有角色，require_all 为 False 时只需满足其中一个"""
+        if require_all:
+            return self.roles.issuperset(roles)
+        return not self.roles.isdisjoint(roles)
+
+
+# 当前请求的主体，供依赖注入之外的代码读取
+_current_principal: ContextVar[Optional[Principal]] = ContextVar("current_principal", default=None)
+
+
+async def load_principal(user: User) -> Principal:
+    """
+    加载用户的角色和权限
+    角色-权限映射来自进程级 RBAC 快照，只有用户-角色映射未缓存时才查询数据库
+    """
+    snapshot = await rbac_cache.get_snapshot()
+    role_ids = await rbac_cache.get_user_role_ids(user.id)
+    return Principal(
+        user=user,
+        roles=snapshot.roles_of(role_ids),
+        permission_mask=snapshot.mask_of(role_ids),
+        registry=snapshot.registry,
+    )
+
+
+def set_current_principal(principal: Principal) -> None:
+    """设置当前请求的主体"""
+    _current_principal.set(principal)
+
+
+def get_principal() -> Optional[Principal]:
+    """获取当前请求的主体，未加载时返回 None"""
+    return _current_principal.get()
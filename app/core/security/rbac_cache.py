@@ -0,0 +1,234 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Set
+
+from tortoise.expressions import F
+
+from app.core.security.bitset import PermissionRegistry
+from app.log.config.log_config import get_logger
+from app.models.rbac import PermissionClosure, RbacVersion, Role, UserRole
+from app.settings.config import (
+    RBAC_VERSION_CHECK_INTERVAL,
+    RBAC_USER_CACHE_SIZE,
+    RBAC_INHERIT_PERMISSIONS
+)
+
+logger = get_logger(__name__)
+
+# 版本号所在行的主键
+VERSION_ROW_ID = 1
+
+
+@dataclass(frozen=True)
+class RbacSnapshot:
+    """
+    RBAC 只读快照
+    保存某个版本下角色代码和角色权限位集，构建后不再修改
+    """
+    version: int
+    role_codes: Mapping[int, str]
+    # 角色ID -> 权限位集
+    role_masks: Mapping[int, int]
+    registry: PermissionRegistry
+
+    def roles_of(self, role_ids: Iterable[int]) -> FrozenSet[str]:
+        """获取角色ID对应的角色代码"""
+        return frozenset(self.role_codes[rid] for rid in role_ids if rid in self.role_codes)
+
+    def mask_of(self, role_ids: Iterable[int]) -> int:
+        """获取角色ID对应的权限位集并集"""
+        mask = 0
+        role_masks = self.role_masks
+        for rid in role_ids:
+            mask |= role_masks.get(rid, 0)
+        return mask
+
+    def permissions_of(self, role_ids: Iterable[int]) -> FrozenSet[str]:
+        """获取角色ID对应的权限代码并集"""
+        return self.registry.codes_of(self.mask_of(role_ids))
+
+
+class RbacCache:
+    """
+    进程级 RBAC 缓存
+    角色-权限映射整体缓存为只读快照，用户-角色映射按需加载；
+    数据库中的全局版本号变化时以写时复制方式重建快照
+    """
+
+    def __init__(
+        self,
+        check_interval: float = 1.0,
+        user_cache_size: int = 10000,
+        inherit_permissions: bool = False
+    ):
+        """
+        Args:
+            check_interval: 检查数据库版本号的最小间隔（秒）
+            user_cache_size: 用户-角色映射最大缓存条目数
+            inherit_permissions: 授予父权限时是否同时授予其全部子孙权限
+        """
+        self.check_interval = check_interval
+        self.user_cache_size = user_cache_size
+        self.inherit_permissions = inherit_permissions
+
+        self._snapshot: Optional[RbacSnapshot] = None
+        self._checked_at = 0.0
+        self._user_roles: "OrderedDict[int, FrozenSet[int]]" = OrderedDict()
+        self._lock = asyncio.Lock()
+
+        # 统计指标
+        self._rebuilds = 0
+        self._version_checks = 0
+        self._user_hits = 0
+        self._user_misses = 0
+
+    @staticmethod
+    async def fetch_version() -> int:
+        """读取数据库中的 RBAC 版本号"""
+        version = await RbacVersion.filter(id=VERSION_ROW_ID).values_list("version", flat=True)
+        if not version:
+            row, _ = await RbacVersion.get_or_create(id=VERSION_ROW_ID, defaults={"version": 0})
+            return row.version
+        return version[0]
+
+    async def get_snapshot(self) -> RbacSnapshot:
+        """获取当前快照，距离上次检查超过间隔时会核对数据库版本号"""
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked_at < self.check_interval:
+            return snapshot
+
+        async with self._lock:
+            # 等待锁期间可能已被其他协程刷新
+            if self._snapshot is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return self._snapshot
+            version = await self.fetch_version()
+            self._version_checks += 1
+            self._checked_at = time.monotonic()
+            if self._snapshot is None or self._snapshot.version != version:
+                await self._rebuild(version)
+            return self._snapshot
+
+    async def get_version(self) -> int:
+        """获取当前 RBAC 版本号，与快照使用相同的检查间隔"""
+        return (await self.get_snapshot()).version
+
+    async def _rebuild(self, version: int) -> None:
+        """按给定版本重建快照，并清空用户-角色缓存"""
+        # 默认管理器只过滤角色表，关联的权限需按 is_deleted 自行排除
+        rows = await Role.all().values_list(
+            "id", "code", "permissions__id", "permissions__code", "permissions__is_deleted"
+        )
+        role_codes: Dict[int, str] = {}
+        role_grants: Dict[int, Set[int]] = {}
+        # 被授予的权限：权限ID -> 权限代码
+        permission_codes: Dict[int, str] = {}
+        for role_id, role_code, perm_id, perm_code, perm_deleted in rows:
+            role_codes[role_id] = role_code
+            grants = role_grants.setdefault(role_id, set())
+            if perm_id is not None and not perm_deleted:
+                grants.add(perm_id)
+                permission_codes[perm_id] = perm_code
+
+        if self.inherit_permissions:
+            await self._expand_inherited(role_grants, permission_codes)
+
+        # 按权限ID排序后依次分配位序号 0..n-1，位集长度只与被授予的权限数有关，
+        # 不随权限ID增长；序号只在本版本快照内有效，令牌中的位图由 rv 绑定到版本
+        bits = {perm_id: bit for bit, perm_id in enumerate(sorted(permission_codes))}
+        role_masks: Dict[int, int] = {}
+        for role_id, grants in role_grants.items():
+            mask = 0
+            for perm_id in grants:
+                mask |= 1 << bits[perm_id]
+            role_masks[role_id] = mask
+
+        self._snapshot = RbacSnapshot(
+            version=version,
+            role_codes=MappingProxyType(role_codes),
+            role_masks=MappingProxyType(role_masks),
+            registry=PermissionRegistry({permission_codes[perm_id]: bit for perm_id, bit in bits.items()}),
+        )
+        self._user_roles = OrderedDict()
+        self._rebuilds += 1
+        logger.debug(f"RBAC 快照已重建，版本: {version}，角色数: {len(role_codes)}")
+
+    @staticmethod
+    async def _expand_inherited(
+        role_grants: Dict[int, Set[int]],
+        permission_codes: Dict[int, str]
+    ) -> None:
+        """权限继承：将角色被授予的权限扩展为其全部未删除的子孙权限"""
+        descendants: Dict[int, List[int]] = {}
+        codes: Dict[int, str] = {}
+        for ancestor_id, descendant_id, descendant_code in await PermissionClosure.filter(
+            depth__gt=0, descendant__is_deleted=False
+        ).values_list("ancestor_id", "descendant_id", "descendant__code"):
+            descendants.setdefault(ancestor_id, []).append(descendant_id)
+            codes[descendant_id] = descendant_code
+        if not descendants:
+            return
+        for grants in role_grants.values():
+            inherited = [d for perm_id in grants for d in descendants.get(perm_id, ())]
+            grants.update(inherited)
+            for perm_id in inherited:
+                permission_codes[perm_id] = codes[perm_id]
+
+    async def get_user_role_ids(self, user_id: int) -> FrozenSet[int]:
+        """获取用户的角色ID集合，按需从数据库加载"""
+        role_ids = self._user_roles.get(user_id)
+        if role_ids is not None:
+            self._user_roles.move_to_end(user_id)
+            self._user_hits += 1
+            return role_ids
+
+        self._user_misses += 1
+        # 加载期间快照可能被重建，结果只写入发起查询时的缓存
+        user_roles = self._user_roles
+        role_ids = frozenset(await UserRole.filter(user_id=user_id).values_list("role_id", flat=True))
+        user_roles[user_id] = role_ids
+        while len(user_roles) > self.user_cache_size:
+            user_roles.popitem(last=False)
+        return role_ids
+
+    async def bump_version(self) -> int:
+        """
+        递增数据库中的版本号并立即重建本地快照
+        其他工作进程会在下一次版本检查时发现变更
+        """
+        updated = await RbacVersion.filter(id=VERSION_ROW_ID).update(version=F("version") + 1)
+        if not updated:
+            await RbacVersion.get_or_create(id=VERSION_ROW_ID, defaults={"version": 1})
+        async with self._lock:
+            version = await self.fetch_version()
+            self._checked_at = time.monotonic()
+            await self._rebuild(version)
+        return version
+
+    def invalidate_user(self, user_id: int) -> None:
+        """移除用户-角色缓存条目"""
+        self._user_roles.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计指标"""
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "roles": len(snapshot.role_codes) if snapshot else 0,
+            "rebuilds": self._rebuilds,
+            "version_checks": self._version_checks,
+            "cached_users": len(self._user_roles),
+            "user_hits": self._user_hits,
+            "user_misses": self._user_misses,
+        }
+
+
+# 创建全局实例
+rbac_cache = RbacCache(
+    check_interval=RBAC_VERSION_CHECK_INTERVAL,
+    user_cache_size=RBAC_USER_CACHE_SIZE,
+    inherit_permissions=RBAC_INHERIT_PERMISSIONS,
+)
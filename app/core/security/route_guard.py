@@ -0,0 +1,242 @@
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.responses import ORJSONResponse
+from fastapi.security.utils import get_authorization_scheme_param
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.security.deps import authenticate_token, resolve_principal
+from app.core.security.principal import set_current_principal
+from app.core.security.rbac_cache import rbac_cache
+from app.log.config.log_config import get_logger
+from app.models.rbac import Permission
+
+logger = get_logger(__name__)
+
+# 不限请求方法的规则在节点中的键
+ANY_METHOD = "*"
+
+
+class _RouteNode:
+    """路由前缀树节点，每条边为一个完整的路径段"""
+
+    __slots__ = ("static", "param", "wildcard", "methods")
+
+    def __init__(self):
+        # 静态路径段 -> 子节点
+        self.static: Dict[str, "_RouteNode"] = {}
+        # 路径参数 {name}，匹配任意一个路径段
+        self.param: Optional["_RouteNode"] = None
+        # 结尾的 *，匹配剩余的全部路径：请求方法 -> 权限代码
+        self.wildcard: Dict[str, Tuple[str, ...]] = {}
+        # 路径在此结束：请求方法 -> 权限代码
+        self.methods: Dict[str, Tuple[str, ...]] = {}
+
+
+def parse_route(rule: str) -> Tuple[Tuple[str, ...], List[str]]:
+    """
+    解析接口权限的路径规则
+    格式为 [方法[,方法...] ]路径模板，如 "GET /api/users"、"PUT,PATCH /api/roles/{role_id}"、
+    "/api/system/*"；省略方法时匹配所有方法，{name} 匹配一个路径段，结尾的 * 匹配剩余路径
+    :return: (请求方法, 路径段)
+    :raises: ValueError 当规则格式无效时
+    """
+    parts = rule.split(None, 1)
+    if len(parts) == 2:
+        methods = tuple(m.strip().upper() for m in parts[0].split(",") if m.strip())
+        template = parts[1].strip()
+    else:
+        methods, template = (ANY_METHOD,), rule.strip()
+    if not template.startswith("/"):
+        raise ValueError(f"路径必须以 / 开头: {rule}")
+    segments = [segment for segment in template.split("?", 1)[0].split("/") if segment]
+    if "*" in segments[:-1]:
+        raise ValueError(f"* 只能出现在路径末尾: {rule}")
+    return methods or (ANY_METHOD,), segments
+
+
+class RouteTrie:
+    """
+    接口路由前缀树
+    按路径段逐级匹配，查找耗时与路径长度成正比，与规则数量无关；
+    同一位置静态段优先于路径参数，路径参数优先于结尾通配
+    """
+
+    def __init__(self):
+        self._root = _RouteNode()
+        self.size = 0
+
+    def insert(self, rule: str, code: str) -> None:
+        """
+        添加规则，同一方法和路径上的多个权限满足其一即可
+        :param rule: 路径规则，见 parse_route
+        :param code: 访问该路由需要的权限代码
+        """
+        methods, segments = parse_route(rule)
+        node = self._root
+        wildcard = bool(segments) and segments[-1] == "*"
+        for segment in segments[:-1] if wildcard else segments:
+            if segment.startswith("{") and segment.endswith("}"):
+                if node.param is None:
+                    node.param = _RouteNode()
+                node = node.param
+            else:
+                node = node.static.setdefault(segment, _RouteNode())
+        target = node.wildcard if wildcard else node.methods
+        for method in methods:
+            target[method] = target.get(method, ()) + (code,)
+        self.size += 1
+
+    def match(self, method: str, path: str) -> Optional[Tuple[str, ...]]:
+        """
+        查找请求需要的权限
+        :param method: 请求方法，HEAD 按 GET 匹配
+        :param path: 请求路径
+        :return: 权限代码（满足其一即可），没有匹配的规则时返回 None
+        """
+        if method == "HEAD":
+            method = "GET"
+        segments = [segment for segment in path.split("/") if segment]
+        return self._match(self._root, segments, 0, method)
+
+    def _match(
+        self,
+        node: _RouteNode,
+        segments: List[str],
+        index: int,
+        method: str
+    ) -> Optional[Tuple[str, ...]]:
+        if index == len(segments):
+            codes = node.methods.get(method) or node.methods.get(ANY_METHOD)
+            if codes:
+                return codes
+        else:
+            child = node.static.get(segments[index])
+            if child is not None:
+                codes = self._match(child, segments, index + 1, method)
+                if codes:
+                    return codes
+            if node.param is not None:
+                codes = self._match(node.param, segments, index + 1, method)
+                if codes:
+                    return codes
+        return node.wildcard.get(method) or node.wildcard.get(ANY_METHOD)
+
+
+def build_trie(rules: Iterable[Tuple[str, str]]) -> RouteTrie:
+    """
+    根据 (权限代码, 路径规则) 构建前缀树，忽略格式无效的规则
+    """
+    trie = RouteTrie()
+    for code, rule in rules:
+        try:
+            trie.insert(rule, code)
+        except ValueError as e:
+            logger.warning(f"忽略接口权限 {code} 的路径规则: {e}")
+    return trie
+
+
+class RouteGuard:
+    """
+    接口路由鉴权
+    将全部接口类型（api）权限的路径编译为前缀树，RBAC 版本号变化时重建；
+    请求命中规则时，在路由之前校验令牌并用缓存的主体检查权限，
+    未命中任何规则的请求不做处理，仍由路由自身的依赖鉴权
+    """
+
+    def __init__(self):
+        self._trie: Optional[RouteTrie] = None
+        self._version: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+        # 统计指标
+        self._rebuilds = 0
+        self._matched = 0
+        self._denied = 0
+
+    async def get_trie(self) -> RouteTrie:
+        """获取与当前 RBAC 版本一致的前缀树"""
+        version = await rbac_cache.get_version()
+        if self._trie is not None and self._version == version:
+            return self._trie
+        async with self._lock:
+            # 等待锁期间可能已被其他协程重建
+            if self._trie is None or self._version != version:
+                rows = await Permission.filter(type="api", path__isnull=False).values_list("code", "path")
+                self._trie = build_trie(rows)
+                self._version = version
+                self._rebuilds += 1
+                logger.debug(f"接口路由前缀树已重建，版本: {version}，规则数: {self._trie.size}")
+            return self._trie
+
+    async def authorize(self, scope: Scope) -> Optional[ORJSONResponse]:
+        """
+        检查请求是否有权访问
+        通过时将令牌载荷和主体保存到请求 state 中，供路由依赖复用
+        :return: 拒绝访问时的错误响应，允许访问时返回 None
+        """
+        required = (await self.get_trie()).match(scope["method"], scope["path"])
+        if required is None:
+            return None
+        self._matched += 1
+
+        scheme, token = get_authorization_scheme_param(Headers(scope=scope).get("authorization"))
+        try:
+            if not token or scheme.lower() != "bearer":
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="未提供认证凭据",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            user, payload = await authenticate_token(token)
+        except HTTPException as e:
+            self._denied += 1
+            return ORJSONResponse({"detail": e.detail}, status_code=e.status_code, headers=e.headers)
+
+        principal = await resolve_principal(user, payload)
+        state = scope.setdefault("state", {})
+        state["token_claims"] = payload
+        state["principal"] = principal
+        set_current_principal(principal)
+        if principal.is_superadmin or principal.has_permissions(required, require_all=False):
+            return None
+        self._denied += 1
+        return ORJSONResponse(
+            {"detail": f"权限不足，需要以下任意一个权限: {', '.join(required)}"},
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """获取统计指标"""
+        return {
+            "version": self._version,
+            "rules": self._trie.size if self._trie is not None else None,
+            "rebuilds": self._rebuilds,
+            "matched": self._matched,
+            "denied": self._denied,
+        }
+
+
+# 创建全局实例
+route_guard = RouteGuard()
+
+
+class AuthorizationMiddleware:
+    """
+    接口授权中间件
+    按接口权限的路径规则在路由之前鉴权，权限规则的变更无需修改代码即可生效；
+    CORS 预检请求（OPTIONS）不做检查
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["method"] != "OPTIONS":
+            response = await route_guard.authorize(scope)
+            if response is not None:
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
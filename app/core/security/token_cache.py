@@ -0,0 +1,163 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+from app.models.user import User
+from app.settings.config import (
+    TOKEN_CACHE_ENABLED,
+    TOKEN_CACHE_MAX_SIZE,
+    TOKEN_CACHE_TTL
+)
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """
+    用户轻量快照
+    只保存鉴权需要的字段，不包含密码哈希
+    """
+    id: int
+    username: str
+    email: str
+    is_active: bool
+    is_superadmin: bool
+    last_login: Optional[datetime]
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(**{f.name: getattr(user, f.name) for f in fields(cls)})
+
+    def to_user(self) -> User:
+        """
+        还原为 User 实例（部分字段）
+        由于缺少 password_hash，该实例只能通过 update_fields 保存
+        """
+        return User._init_from_db(**{f.name: getattr(self, f.name) for f in fields(self)})
+
+
+@dataclass(frozen=True)
+class CachedToken:
+    """已验证令牌的缓存条目"""
+    claims: Dict[str, Any]
+    user: UserSnapshot
+    expires_at: float
+
+
+class TokenCache:
+    """
+    已验证令牌的 LRU 缓存
+    以令牌摘要为键，缓存解码后的载荷和用户快照，条目在令牌过期时失效
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: int = 60, enabled: bool = True):
+        """
+        Args:
+            max_size: 最大缓存条目数
+            ttl: 条目最长存活秒数，用于限制多进程部署下用户状态变更的传播延迟
+            enabled: 是否启用缓存
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.enabled = enabled
+
+        self._entries: "OrderedDict[str, CachedToken]" = OrderedDict()
+        self._user_index: Dict[int, Set[str]] = {}
+
+        # 统计指标
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        """计算令牌摘要，避免在内存中保存原始令牌"""
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[CachedToken]:
+        """获取缓存条目，未命中或已过期时返回 None"""
+        if not self.enabled:
+            return None
+        key = self._digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+        if entry.expires_at <= time.time():
+            self._remove(key)
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry
+
+    def set(self, token: str, claims: Dict[str, Any], user: User) -> CachedToken:
+        """写入缓存条目，过期时间取令牌 exp 与 ttl 中较早者"""
+        now = time.time()
+        expires_at = now + self.ttl
+        exp = claims.get("exp")
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        entry = CachedToken(claims=claims, user=UserSnapshot.from_user(user), expires_at=expires_at)
+        if not self.enabled or expires_at <= now:
+            return entry
+
+        key = self._digest(token)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._user_index.setdefault(entry.user.id, set()).add(key)
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._evictions += 1
+        return entry
+
+    def invalidate_user(self, user_id: int) -> None:
+        """使指定用户的所有缓存条目失效"""
+        keys = self._user_index.pop(user_id, set())
+        for key in keys:
+            self._entries.pop(key, None)
+        self._invalidations += len(keys)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._entries.clear()
+        self._user_index.clear()
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._user_index.get(entry.user.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_index[entry.user.id]
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计指标"""
+        lookups = self._hits + self._misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            "evictions": self._evictions,
+            "invalidations": self._invalidations,
+        }
+
+
+# 创建全局实例
+token_cache = TokenCache(
+    max_size=TOKEN_CACHE_MAX_SIZE,
+    ttl=TOKEN_CACHE_TTL,
+    enabled=TOKEN_CACHE_ENABLED,
+)
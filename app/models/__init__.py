@@ -1,9 +1,11 @@
 # 只导出具体的数据库模型
 from app.models.user import User
-from app.models.rbac import Permission, Role, UserRole
+from app.models.rbac import Permission, PermissionClosure, Role, UserRole, RbacVersion
+from app.models.archive import ArchivedRecord
 
 
 __all__ = [
     'User',  # 用户模型
-    'Permission', 'Role', 'UserRole',  # 权限相关模型
+    'Permission', 'PermissionClosure', 'Role', 'UserRole', 'RbacVersion',  # 权限相关模型
+    'ArchivedRecord',  # 归档模型
 ]
@@ -0,0 +1,20 @@
+from tortoise import fields, models
+
+
+class ArchivedRecord(models.Model):
+    """
+    归档记录模型
+    保存从业务表中清理出的逻辑删除记录，data 为原记录的完整字段
+    """
+    id = fields.BigIntField(pk=True, description="主键ID")
+    table_name = fields.CharField(max_length=50, description="来源表名")
+    record_id = fields.BigIntField(description="原记录ID")
+    data = fields.JSONField(description="原记录数据")
+    deleted_at = fields.DatetimeField(null=True, description="原记录删除时间")
+    archived_at = fields.DatetimeField(auto_now_add=True, description="归档时间")
+
+    class Meta:
+        table = "archived_records"
+        table_description = "归档记录表"
+        # 同一记录只归档一次，多个 worker 并发归档时重复写入会失败并回滚
+        unique_together = (("table_name", "record_id"),)
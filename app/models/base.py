@@ -1,6 +1,8 @@
 from datetime import datetime
 
 from tortoise import fields, models
+from tortoise.manager import Manager
+from tortoise.queryset import QuerySet
 
 
 class TimestampMixin:
@@ -20,10 +22,21 @@ class TimestampMixin:
         description="更新时间"
     )
 
+class SoftDeleteManager(Manager):
+    """
+    逻辑删除管理器
+    默认查询只返回未删除的记录，需要包含已删除记录时使用 with_deleted()
+    """
+
+    def get_queryset(self) -> QuerySet:
+        return QuerySet(self._model).filter(is_deleted=False)
+
+
 class LogicalDeleteMixin:
     """
     逻辑删除混入类
     包含逻辑删除标记和删除时间字段
+    使用该混入的模型应在 Meta 中设置 manager = SoftDeleteManager()
     """
     # 逻辑删除
     is_deleted = fields.BooleanField(
@@ -43,7 +56,20 @@ class LogicalDeleteMixin:
         """
         self.is_deleted = True
         self.deleted_at = datetime.now()
-        await self.save()
+        await self.save(update_fields=["is_deleted", "deleted_at", "updated_at"])
+
+    @classmethod
+    def with_deleted(cls) -> QuerySet:
+        """
+        包含已删除记录的查询集
+        用于唯一性检查、恢复等需要看到全部记录的场景
+        """
+        return QuerySet(cls)
+
+    @classmethod
+    def only_deleted(cls) -> QuerySet:
+        """只包含已删除记录的查询集"""
+        return QuerySet(cls).filter(is_deleted=True)
 
 class AbstractBaseModel(models.Model):
     """
@@ -1,7 +1,7 @@
 from tortoise import fields, models
 from tortoise.contrib.pydantic import pydantic_model_creator
 
-from app.models.base import BaseModel,TimestampMixin
+from app.models.base import BaseModel, SoftDeleteManager, TimestampMixin
 
 
 class Permission(BaseModel):
@@ -36,6 +36,35 @@ class Permission(BaseModel):
     class Meta:
         table = "permissions"
         table_description = "权限表"
+        manager = SoftDeleteManager()
+
+
+class PermissionClosure(models.Model):
+    """
+    权限闭包表
+    保存权限树中每一对祖先-后代关系（包括自身，深度为 0），
+    子树和祖先查询只需一次索引查询；由权限的新建、移动和删除维护
+    """
+    id = fields.BigIntField(pk=True, description="主键ID")
+    ancestor = fields.ForeignKeyField(
+        'models.Permission',
+        related_name='descendant_links',
+        on_delete=fields.CASCADE,  # 权限删除时，自动删除相关的闭包记录
+        description="祖先权限"
+    )
+    descendant = fields.ForeignKeyField(
+        'models.Permission',
+        related_name='ancestor_links',
+        on_delete=fields.CASCADE,
+        description="后代权限"
+    )
+    depth = fields.IntField(description="层级距离")
+
+    class Meta:
+        table = "permission_closure"
+        table_description = "权限闭包表"
+        unique_together = ("ancestor_id", "descendant_id")
+        indexes = (("descendant_id", "depth"),)
 
 
 class Role(BaseModel):
@@ -57,6 +86,7 @@ class Role(BaseModel):
     class Meta:
         table = "roles"
         table_description = "角色表"
+        manager = SoftDeleteManager()
 
 
 class UserRole(models.Model,TimestampMixin):
@@ -97,6 +127,20 @@ class UserRole(models.Model,TimestampMixin):
         unique_together = ("user_id", "role_id")
 
 
+class RbacVersion(models.Model):
+    """
+    RBAC 版本号模型
+    角色、权限或用户角色变更时递增，各工作进程据此判断本地权限缓存是否过期
+    """
+    id = fields.IntField(pk=True, description="主键ID")
+    version = fields.BigIntField(default=0, description="版本号")
+    updated_at = fields.DatetimeField(auto_now=True, description="更新时间")
+
+    class Meta:
+        table = "rbac_version"
+        table_description = "RBAC版本表"
+
+
 # 创建Pydantic模型
 PermissionPydantic = pydantic_model_creator(Permission, name="Permission")
 RolePydantic = pydantic_model_creator(Role, name="Role")
@@ -4,7 +4,7 @@ from passlib.hash import bcrypt
 from tortoise import fields
 from tortoise.contrib.pydantic import pydantic_model_creator
 
-from app.models.base import BaseModel
+from app.models.base import BaseModel, SoftDeleteManager
 
 
 class PasswordMixin:
@@ -57,6 +57,7 @@ class User(BaseModel, PasswordMixin):
     class Meta:
         table = "users"
         table_description = "用户信息表"
+        manager = SoftDeleteManager()
     
     # 用户名，唯一
     username = fields.CharField(
@@ -66,9 +67,10 @@ class User(BaseModel, PasswordMixin):
         index=True
     )
     
-    # 邮箱
+    # 邮箱，唯一
     email = fields.CharField(
         max_length=100, 
+        unique=True, 
         description="邮箱地址",
         index=True
     )
@@ -110,17 +112,38 @@ class User(BaseModel, PasswordMixin):
         return await cls.filter(is_deleted=False, is_active=True)
 
     @classmethod
-    async def batch_soft_delete(cls, user_ids: list[int]):
+    async def batch_soft_delete(cls, user_ids: list[int]) -> int:
         """
         批量软删除用户
         
         Args:
             user_ids: 用户ID列表
+            
+        Returns:
+            int: 实际删除的用户数（已删除的用户不计入）
         """
         now = datetime.now()
-        await cls.filter(id__in=user_ids).update(
+        return await cls.filter(id__in=user_ids, is_deleted=False).update(
             is_deleted=True,
-            deleted_at=now
+            deleted_at=now,
+            updated_at=now
+        )
+
+    @classmethod
+    async def batch_restore(cls, user_ids: list[int]) -> int:
+        """
+        批量恢复已软删除的用户
+        
+        Args:
+            user_ids: 用户ID列表
+            
+        Returns:
+            int: 实际恢复的用户数
+        """
+        return await cls.only_deleted().filter(id__in=user_ids).update(
+            is_deleted=False,
+            deleted_at=None,
+            updated_at=datetime.now()
         )
 
     class PydanticMeta:
@@ -1,5 +1,5 @@
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class RoleCreate(BaseModel):
     """创建角色的请求模型"""
@@ -25,8 +25,9 @@ class RoleResponse(BaseModel):
 
 class RoleList(BaseModel):
     """角色列表响应模型"""
-    total: int
+    total: Optional[int] = None
     items: List[RoleResponse]
+    next_cursor: Optional[str] = None
 
 class PermissionCreate(BaseModel):
     """创建权限的请求模型"""
@@ -62,11 +63,55 @@ class PermissionResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class PermissionHierarchyItem(PermissionResponse):
+    """子树/祖先查询结果项"""
+    depth: int  # 与查询权限的层级距离
+
 class PermissionTreeNode(PermissionResponse):
     """权限树节点"""
     children: List['PermissionTreeNode'] = []
 
 class PermissionList(BaseModel):
     """权限列表响应模型"""
-    total: int
+    total: Optional[int] = None
     items: List[PermissionResponse]
+    next_cursor: Optional[str] = None
+
+class IdSetReplace(BaseModel):
+    """替换关联集合的请求模型，ids 为目标集合（可为空以清空）"""
+    ids: List[int] = Field(default_factory=list, description="目标ID集合")
+
+class IdSetPatch(BaseModel):
+    """增量修改关联集合的请求模型"""
+    add: List[int] = Field(default_factory=list, description="需要添加的ID")
+    remove: List[int] = Field(default_factory=list, description="需要移除的ID")
+
+class AssignmentResult(BaseModel):
+    """关联集合变更结果模型"""
+    added: int  # 新增的关联数
+    removed: int  # 移除的关联数
+    total: int  # 变更后的关联数
+
+class ManifestPermission(BaseModel):
+    """权限清单中的权限，children 中的权限以其为父权限"""
+    code: str
+    name: str
+    type: str  # menu/button/api
+    description: Optional[str] = None
+    path: Optional[str] = None
+    parent: Optional[str] = None  # 父权限代码，写在 children 中时可省略
+    sort_order: Optional[int] = None  # 省略时取在同级列表中的位置
+    children: List['ManifestPermission'] = []
+
+class ManifestRole(BaseModel):
+    """权限清单中的角色"""
+    code: str
+    name: str
+    description: Optional[str] = None
+    is_system: bool = False
+    permissions: Optional[List[str]] = None  # 授予的权限代码，省略时不修改角色的授权
+
+class RbacManifest(BaseModel):
+    """RBAC 权限清单"""
+    permissions: List[ManifestPermission] = []
+    roles: List[ManifestRole] = []
@@ -39,8 +39,9 @@ class UserList(BaseModel):
     """
     用户列表响应模型
     """
-    total: int  # 总数
+    total: Optional[int] = None  # 总数，不统计时为空
     items: List[UserResponse]  # 用户列表
+    next_cursor: Optional[str] = None  # 下一页游标，没有下一页时为空
 
 
 class UserRegisterRequest(BaseModel):
@@ -56,4 +57,20 @@ class PasswordChangeRequest(BaseModel):
     """密码更改请求模型"""
     old_password: str = Field(..., description="旧密码")
     new_password: str = Field(..., min_length=6, description="新密码") # 可以添加密码复杂度验证
-    confirm_password: str = Field(..., description="确认新密码")
\ No newline at end of file
+    confirm_password: str = Field(..., description="确认新密码")
+
+class BulkUserRequest(BaseModel):
+    """批量用户操作请求模型"""
+    user_ids: List[int] = Field(..., min_length=1, description="用户ID列表")
+
+
+class BulkUserRoleRequest(BaseModel):
+    """批量分配/撤销角色请求模型"""
+    user_ids: List[int] = Field(..., min_length=1, description="用户ID列表")
+    role_ids: List[int] = Field(..., min_length=1, description="角色ID列表")
+
+
+class BulkOperationResult(BaseModel):
+    """批量操作结果模型"""
+    requested: int  # 请求中的用户数（去重后）
+    affected: int  # 实际变更的行数
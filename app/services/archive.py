@@ -0,0 +1,245 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from tortoise import Model
+from tortoise.transactions import in_transaction
+
+from app.core.security.rbac_cache import rbac_cache
+from app.log.config.log_config import get_logger
+from app.models.archive import ArchivedRecord
+from app.models.rbac import Permission, Role, UserRole
+from app.models.user import User
+from app.services.permission_tree import permission_tree
+from app.services.rbac import PermissionService
+from app.settings.config import (
+    ARCHIVE_MODE,
+    ARCHIVE_RETENTION_DAYS,
+    ARCHIVE_BATCH_SIZE,
+    ARCHIVE_BATCH_SLEEP,
+    ARCHIVE_INTERVAL
+)
+from app.utils.serializer import serialize_model
+
+logger = get_logger(__name__)
+
+# 支持的处理方式
+ARCHIVE_MODES = ("archive", "purge")
+
+# 需要归档的模型，按依赖顺序处理
+ARCHIVE_MODELS: Tuple[Type[Model], ...] = (User, Role, Permission)
+
+# 不写入归档数据的字段
+ARCHIVE_EXCLUDE_FIELDS = frozenset({"password_hash"})
+
+
+async def _related_ids(model: Type[Model], ids: List[int]) -> Dict[int, Dict[str, List[int]]]:
+    """
+    读取随记录一同级联删除的关联ID，保存在归档数据中以便追溯
+    - 用户: 角色ID
+    - 角色: 权限ID
+    - 权限: 角色ID
+    """
+    if model is User:
+        key, rows = "role_ids", await UserRole.filter(user_id__in=ids).values_list("user_id", "role_id")
+    elif model is Role:
+        key, rows = "permission_ids", await Role.with_deleted().filter(id__in=ids).values_list("id", "permissions__id")
+    elif model is Permission:
+        key, rows = "role_ids", await Permission.with_deleted().filter(id__in=ids).values_list("id", "roles__id")
+    else:
+        return {}
+    related: Dict[int, Dict[str, List[int]]] = {}
+    for record_id, related_id in rows:
+        if related_id is not None:
+            related.setdefault(record_id, {key: []})[key].append(related_id)
+    return related
+
+
+@dataclass
+class ArchiveReport:
+    """归档结果"""
+    mode: str
+    cutoff: datetime
+    dry_run: bool = False
+    moved: Dict[str, int] = field(default_factory=dict)
+    batches: int = 0
+    elapsed: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "cutoff": self.cutoff.isoformat(),
+            "dry_run": self.dry_run,
+            "moved": self.moved,
+            "total": sum(self.moved.values()),
+            "batches": self.batches,
+            "elapsed": round(self.elapsed, 3),
+        }
+
+
+class ArchiveJob:
+    """
+    逻辑删除记录归档任务
+    将删除时间早于保留期的记录分批移入归档表（或直接删除），
+    每批在独立的短事务中完成，批次之间暂停以让出数据库资源
+    """
+
+    def __init__(
+        self,
+        mode: str = "archive",
+        retention_days: int = 90,
+        batch_size: int = 500,
+        batch_sleep: float = 0.2,
+        interval: float = 3600
+    ):
+        """
+        Args:
+            mode: 处理方式，archive 移入归档表，purge 直接删除
+            retention_days: 逻辑删除后保留的天数
+            batch_size: 每批处理的行数
+            batch_sleep: 批次之间的暂停时间（秒）
+            interval: 后台定时运行的间隔（秒）
+        """
+        if mode not in ARCHIVE_MODES:
+            raise ValueError(f"无效的归档方式: {mode}")
+        self.mode = mode
+        self.retention_days = retention_days
+        self.batch_size = max(1, batch_size)
+        self.batch_sleep = batch_sleep
+        self.interval = interval
+
+        self._task: Optional[asyncio.Task] = None
+        self._last_report: Optional[ArchiveReport] = None
+        self._runs = 0
+        self._failures = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def run_once(self, dry_run: bool = False) -> ArchiveReport:
+        """
+        执行一次归档
+        :param dry_run: 只统计待处理的行数，不做修改
+        :return: 归档结果
+        """
+        started = time.perf_counter()
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+        report = ArchiveReport(mode=self.mode, cutoff=cutoff, dry_run=dry_run)
+
+        for model in ARCHIVE_MODELS:
+            table = model._meta.db_table
+            query = model.only_deleted().filter(deleted_at__lt=cutoff)
+            if dry_run:
+                report.moved[table] = await query.count()
+                continue
+            report.moved[table] = 0
+            while True:
+                moved = await self._process_batch(model, query)
+                if not moved:
+                    break
+                report.moved[table] += moved
+                report.batches += 1
+                if moved < self.batch_size:
+                    break
+                # 批次之间让出数据库资源
+                await asyncio.sleep(self.batch_sleep)
+
+        if not dry_run and report.moved.get(Permission._meta.db_table):
+            # 删除父权限时子权限的 parent_id 被置空，需同步闭包表，
+            # 并递增版本号让各进程的快照和权限树重新加载
+            await PermissionService.rebuild_closure()
+            await rbac_cache.bump_version()
+            permission_tree.clear()
+
+        report.elapsed = time.perf_counter() - started
+        self._last_report = report
+        self._runs += 1
+        logger.info(
+            f"逻辑删除记录{'统计' if dry_run else '归档'}完成: {report.moved}，"
+            f"批次 {report.batches}，耗时 {report.elapsed:.1f}s"
+        )
+        return report
+
+    async def _process_batch(self, model: Type[Model], query) -> int:
+        """处理一批记录，返回处理的行数"""
+        table = model._meta.db_table
+        async with in_transaction():
+            # 每个 worker 都会运行归档任务：Postgres 上锁定本批记录并跳过其他 worker 已锁定的行，
+            # 同一记录只由一个 worker 处理；SQLite 不支持行锁，写事务本身串行，重复归档由唯一约束拦截
+            locked = await query.order_by("id").limit(self.batch_size).select_for_update(skip_locked=True).only("id")
+            if not locked:
+                return 0
+            ids = [record.id for record in locked]
+            rows = await model.with_deleted().filter(id__in=ids).order_by("id").values()
+            if self.mode == "archive":
+                related = await _related_ids(model, ids)
+                await ArchivedRecord.bulk_create([
+                    ArchivedRecord(
+                        table_name=table,
+                        record_id=row["id"],
+                        data={
+                            **serialize_model({
+                                k: v for k, v in row.items() if k not in ARCHIVE_EXCLUDE_FIELDS
+                            }),
+                            **related.get(row["id"], {}),
+                        },
+                        deleted_at=row["deleted_at"],
+                    )
+                    for row in rows
+                ])
+            await model.with_deleted().filter(id__in=ids).delete()
+        return len(ids)
+
+    async def _run(self) -> None:
+        """后台定时循环"""
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self._failures += 1
+                logger.error(f"归档逻辑删除记录失败: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """启动后台归档任务"""
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"归档任务已启动，方式: {self.mode}，保留 {self.retention_days} 天，间隔: {self.interval}s"
+        )
+
+    async def stop(self) -> None:
+        """停止后台归档任务，进行中的批次会随事务回滚"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("归档任务已停止")
+
+    def stats(self) -> Dict[str, Any]:
+        """获取统计指标"""
+        return {
+            "running": self.running,
+            "mode": self.mode,
+            "retention_days": self.retention_days,
+            "runs": self._runs,
+            "failures": self._failures,
+            "last_report": self._last_report.to_dict() if self._last_report else None,
+        }
+
+
+# 创建全局实例
+archive_job = ArchiveJob(
+    mode=ARCHIVE_MODE,
+    retention_days=ARCHIVE_RETENTION_DAYS,
+    batch_size=ARCHIVE_BATCH_SIZE,
+    batch_sleep=ARCHIVE_BATCH_SLEEP,
+    interval=ARCHIVE_INTERVAL,
+)
@@ -6,10 +6,11 @@ from app.models.user import User
 from app.core.security.token import (
     create_access_token,
     create_refresh_token,
-    verify_password,
     verify_token,
     oauth2_scheme
 )
+from app.core.security.claims import build_rbac_claims
+from app.core.security.hashing import password_hasher
 from app.core.exceptions.auth import (
     InvalidCredentialsError,
     InvalidTokenError,
@@ -17,10 +18,12 @@ from app.core.exceptions.auth import (
     InvalidTokenTypeError
 )
 from app.schemas.auth import TokenResponse, RefreshTokenResponse
+from app.services.last_login import last_login_recorder
 from app.settings.config import (
     ACCESS_TOKEN_EXPIRE_DELTA,
     REFRESH_TOKEN_EXPIRE_DELTA,
-    JWT_ACCESS_TOKEN_EXPIRE_MINUTES
+    JWT_ACCESS_TOKEN_EXPIRE_MINUTES,
+    JWT_EMBED_PERMISSIONS
 )
 
 
@@ -31,7 +34,7 @@ class AuthService:
     async def authenticate_user(username: str, password: str) -> User:
         """验证用户凭据"""
         user = await User.get_or_none(username=username)
-        if not user or not user.verify_password(password):
+        if not user or not await password_hasher.verify(password, user.password_hash):
             raise InvalidCredentialsError()
         return user
 
@@ -59,16 +62,29 @@ class AuthService:
             raise InvalidTokenError()
 
     @staticmethod
-    def create_tokens(user: User) -> TokenResponse:
-        """创建访问令牌和刷新令牌"""
+    async def build_token_data(user: User) -> Dict[str, Any]:
+        """构建令牌载荷，开启 JWT_EMBED_PERMISSIONS 时附带角色和权限声明"""
         token_data = {
             "uid": user.id,
             "sub": user.username,
             "scopes": [],  # 可以根据需要添加权限范围
         }
+        if JWT_EMBED_PERMISSIONS:
+            token_data.update(await build_rbac_claims(user))
+        return token_data
+
+    @classmethod
+    async def create_tokens(cls, user: User) -> TokenResponse:
+        """创建访问令牌和刷新令牌"""
+        token_data = await cls.build_token_data(user)
         
         access_token = create_access_token({**token_data, "type": "access"})
-        refresh_token = create_refresh_token({**token_data, "type": "refresh"})
+        refresh_token = create_refresh_token({
+            "uid": user.id,
+            "sub": user.username,
+            "scopes": [],
+            "type": "refresh",
+        })
         
         return TokenResponse(
             access_token=access_token,
@@ -146,9 +162,15 @@ class AuthService:
 
     @staticmethod
     async def update_last_login(user: User) -> None:
-        """更新用户最后登录时间"""
+        """
+        更新用户最后登录时间
+        后台写回任务运行时只记录到内存缓冲，由其批量写入数据库
+        """
         user.last_login = datetime.now()
-        await user.save()
+        if last_login_recorder.running:
+            last_login_recorder.record(user.id, user.last_login)
+        else:
+            await User.filter(id=user.id).update(last_login=user.last_login)
 
     @staticmethod
     def get_user_response(user: User) -> Dict[str, Any]:
@@ -166,7 +188,7 @@ class AuthService:
         """用户登录流程"""
         user = await cls.authenticate_user(username, password)
         await cls.update_last_login(user)
-        return cls.create_tokens(user)
+        return await cls.create_tokens(user)
         
     @classmethod
     async def refresh_token(cls, token: str) -> RefreshTokenResponse:
@@ -176,12 +198,8 @@ class AuthService:
         """
         user, _ = await cls.verify_token_and_get_user(token)
         
-        # 创建新的访问令牌
-        token_data = {
-            "uid": user.id,
-            "sub": user.username,
-            "scopes": [],
-        }
+        # 创建新的访问令牌，权限声明按当前 RBAC 版本重新签发
+        token_data = await cls.build_token_data(user)
         access_token = create_access_token({**token_data, "type": "access"})
         
         return RefreshTokenResponse(
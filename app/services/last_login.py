@@ -0,0 +1,149 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pypika import Table
+from pypika.terms import Parameter
+from tortoise import connections
+
+from app.log.config.log_config import get_logger
+from app.models.user import User
+from app.settings.config import (
+    LAST_LOGIN_FLUSH_INTERVAL,
+    LAST_LOGIN_MAX_PENDING
+)
+
+logger = get_logger(__name__)
+
+
+class LastLoginRecorder:
+    """
+    最后登录时间写回缓冲
+    登录时只在内存中记录时间，由后台任务按间隔批量写入数据库
+    """
+
+    def __init__(self, flush_interval: float = 5.0, max_pending: int = 10000):
+        """
+        Args:
+            flush_interval: 批量写入间隔（秒）
+            max_pending: 缓冲条目上限，达到后立即触发写入
+        """
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._pending: Dict[int, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+        # 统计指标
+        self._flushes = 0
+        self._flushed_rows = 0
+        self._failures = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def record(self, user_id: int, login_time: datetime) -> None:
+        """记录用户登录时间，同一用户只保留最新一次"""
+        self._put(user_id, login_time)
+        if len(self._pending) >= self.max_pending and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _put(self, user_id: int, login_time: datetime) -> None:
+        """写入缓冲，保留较新的时间"""
+        current = self._pending.get(user_id)
+        if current is None or login_time > current:
+            self._pending[user_id] = login_time
+
+    async def flush(self) -> int:
+        """将缓冲的登录时间写入数据库，返回写入行数"""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+
+        connection = connections.get(User._meta.default_connection)
+        field = User._meta.fields_map["last_login"]
+        table = Table(User._meta.db_table)
+        if connection.capabilities.dialect == "postgres":
+            value_param, id_param = Parameter("$1"), Parameter("$2")
+        elif connection.capabilities.dialect == "mysql":
+            value_param, id_param = Parameter("%s"), Parameter("%s")
+        else:
+            value_param, id_param = Parameter("?"), Parameter("?")
+        query = (
+            connection.query_class.update(table)
+            .set(table.last_login, value_param)
+            .where(table.id == id_param)
+        )
+        values = [
+            [field.to_db_value(login_time, User), user_id]
+            for user_id, login_time in pending.items()
+        ]
+
+        try:
+            await connection.execute_many(query.get_sql(), values)
+        except BaseException as e:
+            # 写入失败或任务被取消时放回缓冲，不触发立即写入，由后台任务按间隔重试
+            for user_id, login_time in pending.items():
+                self._put(user_id, login_time)
+            if isinstance(e, Exception):
+                self._failures += 1
+                logger.error(f"批量更新最后登录时间失败: {str(e)}")
+            raise
+
+        self._flushes += 1
+        self._flushed_rows += len(values)
+        return len(values)
+
+    async def _run(self) -> None:
+        """后台写入循环"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # 已记录日志；数据库不可用时缓冲可能持续处于上限，先等待一个间隔再重试，避免空转
+                await asyncio.sleep(self.flush_interval)
+
+    def start(self) -> None:
+        """启动后台写入任务"""
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"最后登录时间写回任务已启动，间隔: {self.flush_interval}s")
+
+    async def stop(self) -> None:
+        """停止后台写入任务并写入剩余数据"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+        flushed = await self.flush()
+        logger.info(f"最后登录时间写回任务已停止，关闭前写入 {flushed} 条")
+
+    def stats(self) -> Dict[str, Any]:
+        """获取统计指标"""
+        return {
+            "running": self.running,
+            "pending": len(self._pending),
+            "flushes": self._flushes,
+            "flushed_rows": self._flushed_rows,
+            "failures": self._failures,
+        }
+
+
+# 创建全局实例
+last_login_recorder = LastLoginRecorder(
+    flush_interval=LAST_LOGIN_FLUSH_INTERVAL,
+    max_pending=LAST_LOGIN_MAX_PENDING,
+)
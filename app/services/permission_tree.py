@@ -0,0 +1,181 @@
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+from tortoise.functions import Count, Max
+
+from app.core.security.rbac_cache import rbac_cache
+from app.log.config.log_config import get_logger
+from app.models.rbac import Permission
+
+logger = get_logger(__name__)
+
+# 权限树节点输出的字段，与 PermissionTreeNode 一致（children 在组装时添加）
+TREE_FIELDS = ("id", "name", "code", "description", "type", "path", "parent_id", "sort_order")
+
+
+class PermissionTreeCache:
+    """
+    权限树缓存
+    在内存中保存全部权限节点，本进程的权限增删改直接修补节点，
+    序列化后的 JSON 字节按 RBAC 版本号缓存；读取时通常只是返回缓存的字节。
+
+    RBAC 版本号变化但不是由本进程的权限写入引起时（如角色变更或其他进程写入），
+    先用一次聚合查询比对权限表指纹（行数、最大ID、最大修改时间），
+    指纹不变则直接沿用缓存，否则整体重新加载
+    """
+
+    def __init__(self):
+        # 权限ID -> 节点字段（不含 children），额外保存 updated_at 用于计算指纹
+        self._nodes: Optional[Dict[int, Dict[str, Any]]] = None
+        self._fingerprint: Optional[Tuple[Any, ...]] = None
+        # 节点对应的 RBAC 版本号
+        self._version: Optional[int] = None
+        self._body: Optional[bytes] = None
+        self._lock = asyncio.Lock()
+
+        # 统计指标
+        self._hits = 0
+        self._loads = 0
+        self._patches = 0
+        self._fingerprint_checks = 0
+
+    @staticmethod
+    async def _fetch_fingerprint() -> Tuple[Any, ...]:
+        """读取权限表指纹"""
+        row = await Permission.all().annotate(
+            count=Count("id"), max_id=Max("id"), max_updated=Max("updated_at")
+        ).first().values("count", "max_id", "max_updated")
+        return row["count"], row["max_id"], row["max_updated"]
+
+    def _local_fingerprint(self) -> Tuple[Any, ...]:
+        """根据内存中的节点计算指纹"""
+        nodes = self._nodes
+        if not nodes:
+            return 0, None, None
+        return len(nodes), max(nodes), max(node["updated_at"] for node in nodes.values())
+
+    async def _load(self) -> None:
+        """从数据库加载全部权限节点"""
+        rows = await Permission.all().values(*TREE_FIELDS, "updated_at")
+        self._nodes = {row["id"]: row for row in rows}
+        self._fingerprint = self._local_fingerprint()
+        self._body = None
+        self._loads += 1
+        logger.debug(f"权限树已加载，节点数: {len(rows)}")
+
+    def _build(self) -> List[Dict[str, Any]]:
+        """
+        组装嵌套结构
+        同级节点按 sort_order、id 排序；父节点不存在的节点不出现在树中
+        """
+        nodes = {
+            pid: {field: node[field] for field in TREE_FIELDS} | {"children": []}
+            for pid, node in self._nodes.items()
+        }
+        roots = []
+        for node in sorted(nodes.values(), key=lambda n: (n["sort_order"], n["id"])):
+            if node["parent_id"] is None:
+                roots.append(node)
+            else:
+                parent = nodes.get(node["parent_id"])
+                if parent is not None:
+                    parent["children"].append(node)
+        return roots
+
+    async def _ensure(self) -> None:
+        """确保节点与当前 RBAC 版本一致"""
+        version = await rbac_cache.get_version()
+        if self._nodes is not None and self._version == version:
+            self._hits += 1
+            return
+        async with self._lock:
+            # 等待锁期间可能已被其他协程刷新
+            if self._nodes is not None and self._version == version:
+                self._hits += 1
+                return
+            if self._nodes is not None:
+                self._fingerprint_checks += 1
+                if await self._fetch_fingerprint() == self._fingerprint:
+                    self._version = version
+                    return
+            await self._load()
+            self._version = version
+
+    async def get_tree(self) -> List[Dict[str, Any]]:
+        """获取权限树（嵌套字典）"""
+        await self._ensure()
+        return self._build()
+
+    async def get_json(self) -> bytes:
+        """获取序列化后的权限树 JSON 字节"""
+        await self._ensure()
+        if self._body is None:
+            self._body = orjson.dumps(self._build())
+        return self._body
+
+    def _begin_patch(self, version: int) -> bool:
+        """
+        判断能否在内存中修补到给定版本
+        仅当缓存恰好是上一个版本时才修补；已是该版本说明加载时已包含本次变更；
+        其他情况（期间有别的变更）丢弃缓存，下次读取时重新校验
+        """
+        if self._nodes is None or self._version == version:
+            return False
+        if self._version != version - 1:
+            self.clear()
+            return False
+        return True
+
+    def _end_patch(self, version: int) -> None:
+        self._fingerprint = self._local_fingerprint()
+        self._version = version
+        self._body = None
+        self._patches += 1
+
+    def upsert(self, permission: Permission, version: int) -> None:
+        """
+        写入新建或更新后的权限节点
+        :param permission: 已保存的权限
+        :param version: 本次写入递增后的 RBAC 版本号
+        """
+        if not self._begin_patch(version):
+            return
+        node = {field: getattr(permission, field) for field in TREE_FIELDS}
+        node["updated_at"] = permission.updated_at
+        self._nodes[permission.id] = node
+        self._end_patch(version)
+
+    def remove(self, permission_ids: Iterable[int], version: int) -> None:
+        """
+        移除已删除的权限节点
+        :param permission_ids: 被删除的权限ID
+        :param version: 本次删除递增后的 RBAC 版本号
+        """
+        if not self._begin_patch(version):
+            return
+        for permission_id in permission_ids:
+            self._nodes.pop(permission_id, None)
+        self._end_patch(version)
+
+    def clear(self) -> None:
+        """丢弃缓存"""
+        self._nodes = None
+        self._fingerprint = None
+        self._version = None
+        self._body = None
+
+    def stats(self) -> Dict[str, Any]:
+        """获取统计指标"""
+        return {
+            "version": self._version,
+            "nodes": len(self._nodes) if self._nodes is not None else None,
+            "hits": self._hits,
+            "loads": self._loads,
+            "patches": self._patches,
+            "fingerprint_checks": self._fingerprint_checks,
+        }
+
+
+# 创建全局实例
+permission_tree = PermissionTreeCache()
@@ -1,23 +1,96 @@
-from typing import Optional, List
-from app.models.rbac import Role, Permission
-from app.schemas.rbac import RoleCreate, RoleUpdate, PermissionCreate, PermissionUpdate, PermissionTreeNode
-from tortoise.expressions import Q
+from typing import Any, Dict, Iterable, Optional, List, Set, Tuple
+from pypika import Table
+from tortoise.exceptions import IntegrityError
+from tortoise.expressions import Subquery
+from tortoise.transactions import in_transaction
+from app.core.security.rbac_cache import rbac_cache
+from app.models.rbac import Role, Permission, PermissionClosure
+from app.schemas.rbac import (
+    RoleCreate, RoleUpdate, RoleResponse,
+    PermissionCreate, PermissionUpdate, PermissionResponse, PermissionTreeNode
+)
+from app.services.permission_tree import permission_tree
+from app.services.search import search_index
+from app.utils.integrity import unique_violation_message
+from app.utils.pagination import paginate, parse_fields
+
+# 角色和权限列表支持的排序字段
+RBAC_SORT_FIELDS = ("id", "created_at", "code")
+
+# 角色和权限列表可选的返回字段
+ROLE_LIST_FIELDS = tuple(RoleResponse.model_fields)
+PERMISSION_LIST_FIELDS = tuple(PermissionResponse.model_fields)
+
+# 唯一约束冲突时的错误信息
+ROLE_UNIQUE_MESSAGES = {"name": "角色名称已存在", "code": "角色代码已存在"}
+PERMISSION_UNIQUE_MESSAGES = {"name": "权限名称已存在", "code": "权限代码已存在"}
+
+# 批量分配时单条 SQL 的最大 ID 数
+ASSIGN_CHUNK_SIZE = 500
+
+
+def resolve_assignment(
+    current: Set[int],
+    replace: Optional[Iterable[int]] = None,
+    add: Iterable[int] = (),
+    remove: Iterable[int] = ()
+) -> Tuple[List[int], List[int]]:
+    """
+    计算关联集合的变更
+    :param current: 当前关联的ID集合
+    :param replace: 目标ID集合，提供时忽略 add/remove
+    :param add: 需要添加的ID
+    :param remove: 需要移除的ID
+    :return: (需插入的ID, 需删除的ID)
+    :raises: ValueError 当同一ID同时出现在 add 和 remove 中时
+    """
+    if replace is not None:
+        target = set(replace)
+        return sorted(target - current), sorted(current - target)
+    add, remove = set(add), set(remove)
+    if add & remove:
+        raise ValueError(f"不能同时添加和移除: {sorted(add & remove)}")
+    return sorted(add - current), sorted(remove & current)
+
+
+async def write_role_permissions(
+    removals: Dict[int, List[int]],
+    additions: List[Tuple[int, int]]
+) -> None:
+    """
+    直接写入角色-权限关联表，按块执行 DELETE/INSERT，应在调用方的事务中执行
+    :param removals: 角色ID -> 需删除关联的权限ID
+    :param additions: 需插入的 (角色ID, 权限ID)
+    """
+    field = Role._meta.fields_map["permissions"]
+    table = Table(field.through)
+    role_column, permission_column = table[field.backward_key], table[field.forward_key]
+    db = Role._meta.db
+    for role_id, permission_ids in removals.items():
+        for i in range(0, len(permission_ids), ASSIGN_CHUNK_SIZE):
+            chunk = permission_ids[i:i + ASSIGN_CHUNK_SIZE]
+            await db.execute_query(str(
+                db.query_class.from_(table)
+                .where((role_column == role_id) & permission_column.isin(chunk))
+                .delete()
+            ))
+    for i in range(0, len(additions), ASSIGN_CHUNK_SIZE):
+        query = db.query_class.into(table).columns(role_column, permission_column)
+        for role_id, permission_id in additions[i:i + ASSIGN_CHUNK_SIZE]:
+            query = query.insert(role_id, permission_id)
+        await db.execute_query(str(query))
+
 
 class RoleService:
     @staticmethod
     async def create_role(role_data: RoleCreate) -> Role:
         """创建角色"""
-        # 检查角色名称和代码是否已存在
-        existing_role = await Role.filter(
-            Q(name=role_data.name) | Q(code=role_data.code)
-        ).first()
-        if existing_role:
-            if existing_role.name == role_data.name:
-                raise ValueError("角色名称已存在")
-            raise ValueError("角色代码已存在")
-            
-        # 创建角色
-        role = await Role.create(**role_data.model_dump())
+        # 创建角色，名称和代码冲突由唯一约束判断（已软删除的角色仍占用）
+        try:
+            role = await Role.create(**role_data.model_dump())
+        except IntegrityError as e:
+            raise ValueError(unique_violation_message(e, ROLE_UNIQUE_MESSAGES)) from e
+        await rbac_cache.bump_version()
         return role
 
     @staticmethod
@@ -27,25 +100,15 @@ class RoleService:
         if not role:
             raise ValueError("角色不存在")
         
-        # 检查更新的名称或代码是否与其他角色冲突
         update_data = role_data.model_dump(exclude_unset=True)
         if update_data:
-            if 'name' in update_data or 'code' in update_data:
-                query = Q()
-                if 'name' in update_data:
-                    query |= Q(name=update_data['name'])
-                if 'code' in update_data:
-                    query |= Q(code=update_data['code'])
-                existing_role = await Role.filter(query).exclude(id=role_id).first()
-                if existing_role:
-                    if 'name' in update_data and existing_role.name == update_data['name']:
-                        raise ValueError("角色名称已存在")
-                    if 'code' in update_data and existing_role.code == update_data['code']:
-                        raise ValueError("角色代码已存在")
-            
-            # 更新角色
+            # 只更新变更的列，名称或代码冲突由唯一约束判断
             await role.update_from_dict(update_data)
-            await role.save()
+            try:
+                await role.save(update_fields=[*update_data, "updated_at"])
+            except IntegrityError as e:
+                raise ValueError(unique_violation_message(e, ROLE_UNIQUE_MESSAGES)) from e
+            await rbac_cache.bump_version()
         
         return role
 
@@ -56,48 +119,101 @@ class RoleService:
         if not role:
             raise ValueError("角色不存在")
         await role.delete()
+        await rbac_cache.bump_version()
 
     @staticmethod
     async def get_role(role_id: int) -> Optional[Role]:
         """获取角色详情"""
         return await Role.get_or_none(id=role_id)
 
+    @staticmethod
+    async def get_role_permission_ids(role_id: int) -> List[int]:
+        """
+        获取角色直接授予的权限ID
+        :raises: ValueError 当角色不存在时
+        """
+        rows = await Role.filter(id=role_id).values_list("permissions__id", flat=True)
+        if not rows:
+            raise ValueError("角色不存在")
+        return sorted(pid for pid in rows if pid is not None)
+
+    @staticmethod
+    async def assign_permissions(
+        role_id: int,
+        replace: Optional[Iterable[int]] = None,
+        add: Iterable[int] = (),
+        remove: Iterable[int] = ()
+    ) -> Tuple[int, int, int]:
+        """
+        替换或增量修改角色的权限集合
+        锁定角色行后读取当前集合并在内存中比对，对 roles_permissions 按块执行 INSERT/DELETE，
+        全部在同一事务中完成，提交后只递增一次 RBAC 版本号
+        :param role_id: 角色ID
+        :param replace: 目标权限ID集合，提供时忽略 add/remove
+        :param add: 需要添加的权限ID
+        :param remove: 需要移除的权限ID
+        :return: (新增数, 移除数, 变更后的权限数)
+        :raises: ValueError 当角色或权限不存在、同一权限同时添加和移除、或与并发修改冲突时
+        """
+        try:
+            async with in_transaction():
+                # 锁定角色行，同一角色的并发修改依次执行，比对基于其他修改提交后的权限集合
+                if await Role.select_for_update().get_or_none(id=role_id) is None:
+                    raise ValueError("角色不存在")
+                current = set(await RoleService.get_role_permission_ids(role_id))
+                to_add, to_remove = resolve_assignment(current, replace, add, remove)
+                if to_add:
+                    found = set(await Permission.filter(id__in=to_add).values_list("id", flat=True))
+                    missing = [pid for pid in to_add if pid not in found]
+                    if missing:
+                        raise ValueError(f"权限不存在: {missing}")
+                if to_add or to_remove:
+                    await write_role_permissions(
+                        {role_id: to_remove}, [(role_id, pid) for pid in to_add]
+                    )
+        except IntegrityError as e:
+            # 不支持行锁的数据库上，并发修改可能插入相同的授权
+            raise ValueError("角色权限已被同时修改，请重试") from e
+
+        if to_add or to_remove:
+            # 提交后再递增版本号：事务中重建快照会读到未提交的数据，SQLite 下还会与快照刷新互相等待
+            await rbac_cache.bump_version()
+        return len(to_add), len(to_remove), len(current) + len(to_add) - len(to_remove)
+
     @staticmethod
     async def list_roles(
         page: int = 1,
         page_size: int = 10,
         name: Optional[str] = None,
-        code: Optional[str] = None
-    ) -> tuple[List[Role], int]:
-        """获取角色列表"""
+        code: Optional[str] = None,
+        cursor: Optional[str] = None,
+        sort: str = "id",
+        with_total: bool = True,
+        total_mode: str = "exact",
+        fields: Optional[str] = None
+    ) -> tuple[List[Dict[str, Any]], Optional[int], Optional[str]]:
+        """获取角色列表，只查询 fields 指定的列（默认全部），结果为字典"""
         query = Role.all()
         
         # 添加过滤条件
         if name:
-            query = query.filter(name__icontains=name)
+            query = search_index.filter(query, "name", name)
         if code:
-            query = query.filter(code__icontains=code)
-        
-        # 获取总数
-        total = await query.count()
+            query = search_index.filter(query, "code", code)
         
-        # 分页
-        roles = await query.offset((page - 1) * page_size).limit(page_size)
-        return roles, total
+        # 分页，提供游标时使用键集分页；总数按 total_mode 统计
+        roles, total, next_cursor = await paginate(
+            query, page, page_size, cursor, sort, RBAC_SORT_FIELDS,
+            total_mode=total_mode if with_total else None,
+            filters={"name": name, "code": code},
+            fields=parse_fields(fields, ROLE_LIST_FIELDS)
+        )
+        return roles, total, next_cursor
 
 class PermissionService:
     @staticmethod
     async def create_permission(permission_data: PermissionCreate) -> Permission:
         """创建权限"""
-        # 检查权限名称和代码是否已存在
-        existing_permission = await Permission.filter(
-            Q(name=permission_data.name) | Q(code=permission_data.code)
-        ).first()
-        if existing_permission:
-            if existing_permission.name == permission_data.name:
-                raise ValueError("权限名称已存在")
-            raise ValueError("权限代码已存在")
-        
         # 检查权限类型是否有效
         if permission_data.type not in Permission.TYPE_CHOICES:
             raise ValueError(f"无效的权限类型，可选值：{list(Permission.TYPE_CHOICES.keys())}")
@@ -112,7 +228,16 @@ class PermissionService:
         permission_dict = permission_data.model_dump()
         if permission_data.parent_id:
             permission_dict["parent_id"] = permission_data.parent_id
-        permission = await Permission.create(**permission_dict)
+        # 名称和代码冲突由唯一约束判断（已软删除的权限仍占用）
+        try:
+            async with in_transaction():
+                permission = await Permission.create(**permission_dict)
+                await PermissionService._closure_attach(
+                    [(permission.id, 0)], permission.parent_id, created=True
+                )
+        except IntegrityError as e:
+            raise ValueError(unique_violation_message(e, PERMISSION_UNIQUE_MESSAGES)) from e
+        permission_tree.upsert(permission, await rbac_cache.bump_version())
         return permission
 
     @staticmethod
@@ -122,55 +247,177 @@ class PermissionService:
         if not permission:
             raise ValueError("权限不存在")
         
-        # 检查更新的名称或代码是否与其他权限冲突
         update_data = permission_data.model_dump(exclude_unset=True)
         if update_data:
-            if 'name' in update_data or 'code' in update_data:
-                query = Q()
-                if 'name' in update_data:
-                    query |= Q(name=update_data['name'])
-                if 'code' in update_data:
-                    query |= Q(code=update_data['code'])
-                existing_permission = await Permission.filter(query).exclude(id=permission_id).first()
-                if existing_permission:
-                    if 'name' in update_data and existing_permission.name == update_data['name']:
-                        raise ValueError("权限名称已存在")
-                    if 'code' in update_data and existing_permission.code == update_data['code']:
-                        raise ValueError("权限代码已存在")
-            
             # 检查权限类型是否有效
             if 'type' in update_data and update_data['type'] not in Permission.TYPE_CHOICES:
                 raise ValueError(f"无效的权限类型，可选值：{list(Permission.TYPE_CHOICES.keys())}")
             
-            # 检查父权限是否存在且不是自己
-            if 'parent_id' in update_data:
+            # 检查父权限是否存在且不是自己或自己的子孙
+            subtree = None
+            if 'parent_id' in update_data and update_data['parent_id'] != permission.parent_id:
                 if update_data['parent_id'] == permission_id:
                     raise ValueError("不能将自己设为父权限")
+                subtree = await PermissionClosure.filter(
+                    ancestor_id=permission_id
+                ).values_list("descendant_id", "depth")
                 if update_data['parent_id']:
+                    if update_data['parent_id'] in {d for d, _ in subtree}:
+                        raise ValueError("不能将子权限设为父权限")
                     parent = await Permission.get_or_none(id=update_data['parent_id'])
                     if not parent:
                         raise ValueError("父权限不存在")
             
-            # 更新权限
+            # 只更新变更的列，名称或代码冲突由唯一约束判断
             await permission.update_from_dict(update_data)
-            await permission.save()
+            try:
+                async with in_transaction():
+                    await permission.save(update_fields=[*update_data, "updated_at"])
+                    if subtree is not None:
+                        await PermissionService._closure_move(subtree, permission.parent_id)
+            except IntegrityError as e:
+                raise ValueError(unique_violation_message(e, PERMISSION_UNIQUE_MESSAGES)) from e
+            permission_tree.upsert(permission, await rbac_cache.bump_version())
         
         return permission
 
     @staticmethod
-    async def delete_permission(permission_id: int):
-        """删除权限"""
+    async def delete_permission(permission_id: int, cascade: bool = False) -> int:
+        """
+        删除权限
+        :param permission_id: 权限ID
+        :param cascade: 是否同时删除整棵子树，否则存在子权限时拒绝删除
+        :return: 删除的权限数
+        """
         permission = await Permission.get_or_none(id=permission_id)
         if not permission:
             raise ValueError("权限不存在")
         
+        if cascade:
+            # 通过闭包表取出子树，一条 DELETE 删除（闭包记录和角色关联由外键级联删除）
+            subtree = PermissionClosure.filter(ancestor_id=permission_id)
+            ids = await subtree.values_list("descendant_id", flat=True)
+            await Permission.with_deleted().filter(
+                id__in=Subquery(subtree.values("descendant_id"))
+            ).delete()
+            permission_tree.remove(ids, await rbac_cache.bump_version())
+            # SQLite 返回的影响行数包含级联删除的闭包记录，按子树的权限数返回
+            return len(ids)
+
         # 检查是否有子权限
         has_children = await Permission.filter(parent_id=permission_id).exists()
         if has_children:
-            raise ValueError("该权限存在子权限，无法删除")
+            raise ValueError("该权限存在子权限，无法删除（可级联删除整棵子树）")
         
         # 删除权限
         await permission.delete()
+        permission_tree.remove([permission_id], await rbac_cache.bump_version())
+        return 1
+
+    @staticmethod
+    async def _closure_attach(
+        subtree: List[Tuple[int, int]],
+        parent_id: Optional[int],
+        created: bool = False
+    ) -> None:
+        """
+        将子树挂到父权限下：写入子树内各节点与父权限及其祖先的闭包记录
+        :param subtree: 子树的 (后代ID, 与子树根的距离)，新建权限时为 [(ID, 0)]
+        :param parent_id: 新的父权限ID
+        :param created: 是否为新建的权限，新建时还需写入指向自身的记录
+        """
+        records = []
+        if created:
+            records.extend(
+                PermissionClosure(ancestor_id=descendant_id, descendant_id=descendant_id, depth=0)
+                for descendant_id, _ in subtree
+            )
+        if parent_id:
+            ancestors = await PermissionClosure.filter(
+                descendant_id=parent_id
+            ).values_list("ancestor_id", "depth")
+            records.extend(
+                PermissionClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=a_depth + d_depth + 1)
+                for ancestor_id, a_depth in ancestors
+                for descendant_id, d_depth in subtree
+            )
+        if records:
+            await PermissionClosure.bulk_create(records)
+
+    @staticmethod
+    async def _closure_move(subtree: List[Tuple[int, int]], parent_id: Optional[int]) -> None:
+        """
+        移动子树：删除子树与原祖先之间的闭包记录，再挂到新的父权限下
+        :param subtree: 子树的 (后代ID, 与子树根的距离)
+        :param parent_id: 新的父权限ID
+        """
+        ids = [descendant_id for descendant_id, _ in subtree]
+        await PermissionClosure.filter(descendant_id__in=ids).exclude(ancestor_id__in=ids).delete()
+        await PermissionService._closure_attach(subtree, parent_id)
+
+    @staticmethod
+    async def rebuild_closure() -> int:
+        """
+        根据 parent_id 重建整个闭包表
+        :return: 写入的闭包记录数
+        """
+        parents = dict(await Permission.with_deleted().all().values_list("id", "parent_id"))
+        records = []
+        for permission_id in parents:
+            # 沿父链向上，遇到环时停止
+            node, depth, seen = permission_id, 0, set()
+            while node is not None and node in parents and node not in seen:
+                seen.add(node)
+                records.append(PermissionClosure(ancestor_id=node, descendant_id=permission_id, depth=depth))
+                node, depth = parents[node], depth + 1
+        async with in_transaction():
+            await PermissionClosure.all().delete()
+            await PermissionClosure.bulk_create(records, batch_size=1000)
+        return len(records)
+
+    @staticmethod
+    async def ensure_closure() -> None:
+        """启动时检查闭包表，已有权限但闭包表为空时（如通过 generate_schemas 建表）重建"""
+        if await Permission.with_deleted().exists() and not await PermissionClosure.exists():
+            await PermissionService.rebuild_closure()
+
+    @staticmethod
+    async def _hierarchy(
+        permission_id: int,
+        relation: str,
+        include_self: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        通过闭包表的一次索引查询获取子树或祖先
+        :param relation: descendant（子树）或 ancestor（祖先）
+        """
+        key = "ancestor_id" if relation == "descendant" else "descendant_id"
+        rows = await PermissionClosure.filter(
+            **{key: permission_id, f"{relation}__is_deleted": False}
+        ).order_by("depth" if relation == "descendant" else "-depth").values(
+            "depth", **{field: f"{relation}__{field}" for field in PERMISSION_LIST_FIELDS}
+        )
+        if not any(row["depth"] == 0 for row in rows):
+            raise ValueError("权限不存在")
+        if include_self:
+            return rows
+        return [row for row in rows if row["depth"] != 0]
+
+    @staticmethod
+    async def get_subtree(permission_id: int, include_self: bool = False) -> List[Dict[str, Any]]:
+        """
+        获取权限的全部子孙，按层级距离排序
+        :raises: ValueError 当权限不存在时
+        """
+        return await PermissionService._hierarchy(permission_id, "descendant", include_self)
+
+    @staticmethod
+    async def get_ancestors(permission_id: int, include_self: bool = False) -> List[Dict[str, Any]]:
+        """
+        获取权限的全部祖先，从根权限开始排列
+        :raises: ValueError 当权限不存在时
+        """
+        return await PermissionService._hierarchy(permission_id, "ancestor", include_self)
 
     @staticmethod
     async def get_permission(permission_id: int) -> Permission:
@@ -186,56 +433,42 @@ class PermissionService:
         page_size: int = 10,
         name: Optional[str] = None,
         code: Optional[str] = None,
-        type: Optional[str] = None
-    ) -> tuple[List[Permission], int]:
-        """获取权限列表"""
+        type: Optional[str] = None,
+        cursor: Optional[str] = None,
+        sort: str = "id",
+        with_total: bool = True,
+        total_mode: str = "exact",
+        fields: Optional[str] = None
+    ) -> tuple[List[Dict[str, Any]], Optional[int], Optional[str]]:
+        """获取权限列表，只查询 fields 指定的列（默认全部），结果为字典"""
         query = Permission.all()
         
         # 应用过滤条件
         if name:
-            query = query.filter(name__icontains=name)
+            query = search_index.filter(query, "name", name)
         if code:
-            query = query.filter(code__icontains=code)
+            query = search_index.filter(query, "code", code)
         if type:
             if type not in Permission.TYPE_CHOICES:
                 raise ValueError(f"无效的权限类型，可选值：{list(Permission.TYPE_CHOICES.keys())}")
             query = query.filter(type=type)
         
-        # 计算总数
-        total = await query.count()
-        
-        # 分页查询
-        permissions = await query.offset((page - 1) * page_size).limit(page_size).all()
+        # 分页查询，提供游标时使用键集分页；总数按 total_mode 统计
+        permissions, total, next_cursor = await paginate(
+            query, page, page_size, cursor, sort, RBAC_SORT_FIELDS,
+            total_mode=total_mode if with_total else None,
+            filters={"name": name, "code": code, "type": type},
+            fields=parse_fields(fields, PERMISSION_LIST_FIELDS)
+        )
         
-        return permissions, total
+        return permissions, total, next_cursor
 
     @staticmethod
     async def get_permission_tree() -> List[PermissionTreeNode]:
         """获取权限树"""
-        # 获取所有权限
-        permissions = await Permission.all().order_by('sort_order')
-        
-        # 构建权限字典，key 是权限 ID
-        permission_dict = {p.id: PermissionTreeNode(
-            id=p.id,
-            name=p.name,
-            code=p.code,
-            description=p.description,
-            type=p.type,
-            path=p.path,
-            parent_id=p.parent_id,
-            sort_order=p.sort_order,
-            children=[]
-        ) for p in permissions}
-        
-        # 构建树形结构
-        root_nodes = []
-        for permission in permission_dict.values():
-            if permission.parent_id is None:
-                root_nodes.append(permission)
-            else:
-                parent = permission_dict.get(permission.parent_id)
-                if parent:
-                    parent.children.append(permission)
-        
-        return root_nodes
+        return [PermissionTreeNode.model_validate(node) for node in await permission_tree.get_tree()]
+
+    @staticmethod
+    async def get_permission_tree_json() -> bytes:
+        """获取序列化后的权限树，内容按 RBAC 版本缓存"""
+        return await permission_tree.get_json()
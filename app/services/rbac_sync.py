@@ -0,0 +1,503 @@
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple, Type, Union
+
+from pydantic import ValidationError
+from tortoise import Model
+from tortoise.exceptions import IntegrityError
+from tortoise.transactions import in_transaction
+
+try:
+    import yaml
+except ImportError:  # PyYAML 为可选依赖，未安装时只支持 JSON 清单
+    yaml = None
+
+from app.core.security.rbac_cache import rbac_cache
+from app.log.config.log_config import get_logger
+from app.models.rbac import Permission, Role
+from app.schemas.rbac import ManifestPermission, RbacManifest
+from app.services.permission_tree import permission_tree
+from app.services.rbac import (
+    PERMISSION_UNIQUE_MESSAGES,
+    ROLE_UNIQUE_MESSAGES,
+    PermissionService,
+    write_role_permissions
+)
+from app.utils.integrity import unique_violation_message
+
+logger = get_logger(__name__)
+
+# 支持的清单格式
+MANIFEST_FORMATS = ("yaml", "json")
+
+# 由清单管理的字段（权限的父权限按代码单独比对）
+PERMISSION_SYNC_FIELDS = ("name", "description", "type", "path", "sort_order")
+ROLE_SYNC_FIELDS = ("name", "description", "is_system")
+
+# 批量写入时每条 SQL 的最大行数
+SYNC_BATCH_SIZE = 500
+
+
+def load_manifest(content: Union[str, bytes], fmt: str = "yaml") -> RbacManifest:
+    """
+    解析权限清单
+    :param content: 清单内容
+    :param fmt: 清单格式 yaml/json
+    :return: 权限清单
+    :raises: ValueError 当格式无效、未安装 PyYAML 或清单内容有误时
+    """
+    if fmt not in MANIFEST_FORMATS:
+        raise ValueError(f"无效的清单格式，可选值：{list(MANIFEST_FORMATS)}")
+    if fmt == "yaml" and yaml is None:
+        raise ValueError("未安装 PyYAML，无法解析 YAML 清单，请改用 JSON 格式")
+    parse_errors = (ValueError,) if yaml is None else (ValueError, yaml.YAMLError)
+    try:
+        data = json.loads(content) if fmt == "json" else yaml.safe_load(content)
+    except parse_errors as e:
+        raise ValueError(f"清单解析失败: {e}") from e
+    try:
+        return RbacManifest.model_validate(data or {})
+    except ValidationError as e:
+        message = "; ".join(
+            f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+            for err in e.errors()
+        )
+        raise ValueError(f"清单内容有误: {message}") from e
+
+
+@dataclass
+class SyncPlan:
+    """
+    同步计划
+    权限和角色以代码标识；更新项记录每个变化字段的 [原值, 新值]，
+    权限的父权限以代码表示（字段名 parent）
+    """
+    dry_run: bool = False
+    prune: bool = False
+    create_permissions: List[str] = field(default_factory=list)
+    update_permissions: Dict[str, Dict[str, List[Any]]] = field(default_factory=dict)
+    restore_permissions: List[str] = field(default_factory=list)
+    delete_permissions: List[str] = field(default_factory=list)
+    create_roles: List[str] = field(default_factory=list)
+    update_roles: Dict[str, Dict[str, List[Any]]] = field(default_factory=dict)
+    restore_roles: List[str] = field(default_factory=list)
+    delete_roles: List[str] = field(default_factory=list)
+    # 角色代码 -> 需授予/收回的权限代码
+    grants: Dict[str, List[str]] = field(default_factory=dict)
+    revokes: Dict[str, List[str]] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def empty(self) -> bool:
+        """是否没有任何变更"""
+        return not any((
+            self.create_permissions, self.update_permissions,
+            self.restore_permissions, self.delete_permissions,
+            self.create_roles, self.update_roles, self.restore_roles, self.delete_roles,
+            self.grants, self.revokes,
+        ))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "dry_run": self.dry_run,
+            "prune": self.prune,
+            "changed": not self.empty,
+            "permissions": {
+                "create": self.create_permissions,
+                "update": self.update_permissions,
+                "restore": self.restore_permissions,
+                "delete": self.delete_permissions,
+            },
+            "roles": {
+                "create": self.create_roles,
+                "update": self.update_roles,
+                "restore": self.restore_roles,
+                "delete": self.delete_roles,
+            },
+            "grants": self.grants,
+            "revokes": self.revokes,
+            "elapsed": round(self.elapsed, 3),
+        }
+
+
+@dataclass
+class _SyncState:
+    """同步过程中的数据库快照和清单目标状态"""
+    # 权限代码 -> 数据库中的行（parent 为父权限代码）
+    permission_rows: Dict[str, Dict[str, Any]]
+    role_rows: Dict[str, Dict[str, Any]]
+    # 权限代码 -> 清单中的目标字段（parent 为父权限代码）
+    permission_targets: Dict[str, Dict[str, Any]]
+    role_targets: Dict[str, Dict[str, Any]]
+    # 角色代码 -> 清单中授予的权限代码，清单未指定授权的角色不在其中
+    role_grants: Dict[str, Set[str]]
+
+
+def _flatten_permissions(
+    items: List[ManifestPermission],
+    parent: Optional[str] = None
+) -> List[Tuple[ManifestPermission, Optional[str], int]]:
+    """
+    展开嵌套的权限清单
+    :return: (权限, 父权限代码, 在同级列表中的位置) 列表，父权限在前
+    """
+    flattened = []
+    for position, item in enumerate(items):
+        if parent is not None and item.parent not in (None, parent):
+            raise ValueError(f"权限 {item.code} 的 parent 与所在层级不一致")
+        flattened.append((item, parent if parent is not None else item.parent, position))
+        flattened.extend(_flatten_permissions(item.children, item.code))
+    return flattened
+
+
+def _field_changes(row: Dict[str, Any], target: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """比对数据库行和目标字段，返回变化字段的 [原值, 新值]"""
+    return {
+        name: [row[name], value]
+        for name, value in target.items()
+        if row[name] != value
+    }
+
+
+class RbacSyncService:
+    """
+    RBAC 声明式同步
+    将清单中的权限（含父子关系和排序）、角色和角色授权与数据库比对，
+    在内存中算出差异后，在同一事务中用批量语句写入：
+    - 新建权限按层级 bulk_create，每层一条 INSERT
+    - 字段变化（含恢复已逻辑删除的记录）用 bulk_update 合并为 CASE 更新
+    - 授权变化按块直接写入 roles_permissions
+    权限结构变化时在事务中重建闭包表，提交后只递增一次 RBAC 版本号
+    """
+
+    @staticmethod
+    async def sync(manifest: RbacManifest, dry_run: bool = False, prune: bool = False) -> SyncPlan:
+        """
+        同步权限清单
+        :param manifest: 权限清单
+        :param dry_run: 只计算同步计划，不做修改
+        :param prune: 删除清单中未出现的权限和角色，否则保留
+        :return: 同步计划
+        :raises: ValueError 当清单内容与数据库状态冲突时
+        """
+        started = time.perf_counter()
+        plan = SyncPlan(dry_run=dry_run, prune=prune)
+        async with in_transaction():
+            state = await RbacSyncService._load_state(manifest)
+            await RbacSyncService._diff(state, plan)
+            if not dry_run and not plan.empty:
+                await RbacSyncService._apply(state, plan)
+        if not dry_run and not plan.empty:
+            # 提交后再递增版本号，事务中重建快照会读到未提交的数据并长时间占用连接
+            await rbac_cache.bump_version()
+            permission_tree.clear()
+        plan.elapsed = time.perf_counter() - started
+        logger.info(
+            f"RBAC 清单{'预览' if dry_run else '同步'}完成: "
+            f"权限 +{len(plan.create_permissions)} ~{len(plan.update_permissions)} -{len(plan.delete_permissions)}，"
+            f"角色 +{len(plan.create_roles)} ~{len(plan.update_roles)} -{len(plan.delete_roles)}，"
+            f"授权 +{sum(map(len, plan.grants.values()))} -{sum(map(len, plan.revokes.values()))}，"
+            f"耗时 {plan.elapsed:.2f}s"
+        )
+        return plan
+
+    @staticmethod
+    async def _load_state(manifest: RbacManifest) -> _SyncState:
+        """校验清单自身的一致性，并读取数据库中的权限、角色（包括已逻辑删除的）"""
+        permission_targets: Dict[str, Dict[str, Any]] = {}
+        names: Set[str] = set()
+        for item, parent, position in _flatten_permissions(manifest.permissions):
+            if item.code in permission_targets:
+                raise ValueError(f"清单中权限代码重复: {item.code}")
+            if item.name in names:
+                raise ValueError(f"清单中权限名称重复: {item.name}")
+            if item.type not in Permission.TYPE_CHOICES:
+                raise ValueError(
+                    f"权限 {item.code} 的类型无效，可选值：{list(Permission.TYPE_CHOICES.keys())}"
+                )
+            names.add(item.name)
+            permission_targets[item.code] = {
+                "name": item.name,
+                "description": item.description,
+                "type": item.type,
+                "path": item.path,
+                "sort_order": position if item.sort_order is None else item.sort_order,
+                "parent": parent,
+            }
+
+        role_targets: Dict[str, Dict[str, Any]] = {}
+        role_grants: Dict[str, Set[str]] = {}
+        names = set()
+        for item in manifest.roles:
+            if item.code in role_targets:
+                raise ValueError(f"清单中角色代码重复: {item.code}")
+            if item.name in names:
+                raise ValueError(f"清单中角色名称重复: {item.name}")
+            names.add(item.name)
+            role_targets[item.code] = {
+                "name": item.name,
+                "description": item.description,
+                "is_system": item.is_system,
+            }
+            if item.permissions is not None:
+                role_grants[item.code] = set(item.permissions)
+
+        rows = await Permission.with_deleted().all().values(
+            "id", "code", "parent_id", "is_deleted", *PERMISSION_SYNC_FIELDS
+        )
+        codes = {row["id"]: row["code"] for row in rows}
+        permission_rows = {}
+        for row in rows:
+            row["parent"] = codes.get(row.pop("parent_id"))
+            permission_rows[row["code"]] = row
+        role_rows = {
+            row["code"]: row
+            for row in await Role.with_deleted().all().values("id", "code", "is_deleted", *ROLE_SYNC_FIELDS)
+        }
+        return _SyncState(permission_rows, role_rows, permission_targets, role_targets, role_grants)
+
+    @staticmethod
+    async def _diff(state: _SyncState, plan: SyncPlan) -> None:
+        """计算同步计划"""
+        # 权限：清单之外仍然保留的记录（prune 时未逻辑删除的记录会被删除）
+        kept = {
+            code: row for code, row in state.permission_rows.items()
+            if code not in state.permission_targets and not (plan.prune and not row["is_deleted"])
+        }
+        plan.delete_permissions = sorted(
+            code for code, row in state.permission_rows.items()
+            if code not in state.permission_targets and code not in kept
+        )
+        RbacSyncService._check_permission_tree(state, kept)
+        kept_names = {row["name"]: code for code, row in kept.items()}
+        for code, target in state.permission_targets.items():
+            if target["name"] in kept_names:
+                raise ValueError(f"权限名称已存在: {target['name']}（被 {kept_names[target['name']]} 占用）")
+            row = state.permission_rows.get(code)
+            if row is None:
+                plan.create_permissions.append(code)
+                continue
+            if row["is_deleted"]:
+                plan.restore_permissions.append(code)
+            changes = _field_changes(row, target)
+            if changes:
+                plan.update_permissions[code] = changes
+
+        # 角色
+        kept_roles = {
+            code: row for code, row in state.role_rows.items()
+            if code not in state.role_targets and not (plan.prune and not row["is_deleted"])
+        }
+        plan.delete_roles = sorted(
+            code for code in state.role_rows
+            if code not in state.role_targets and code not in kept_roles
+        )
+        kept_names = {row["name"]: code for code, row in kept_roles.items()}
+        for code, target in state.role_targets.items():
+            if target["name"] in kept_names:
+                raise ValueError(f"角色名称已存在: {target['name']}（被 {kept_names[target['name']]} 占用）")
+            row = state.role_rows.get(code)
+            if row is None:
+                plan.create_roles.append(code)
+                continue
+            if row["is_deleted"]:
+                plan.restore_roles.append(code)
+            changes = _field_changes(row, target)
+            if changes:
+                plan.update_roles[code] = changes
+
+        # 授权：只能授予同步后仍然存在且未逻辑删除的权限
+        grantable = set(state.permission_targets) | {
+            code for code, row in kept.items() if not row["is_deleted"]
+        }
+        current = await RbacSyncService._current_grants(state)
+        for code, target in state.role_grants.items():
+            missing = sorted(target - grantable)
+            if missing:
+                raise ValueError(f"角色 {code} 引用了不存在的权限: {missing}")
+            granted = current.get(code, set())
+            if target - granted:
+                plan.grants[code] = sorted(target - granted)
+            if granted - target:
+                plan.revokes[code] = sorted(granted - target)
+
+    @staticmethod
+    def _check_permission_tree(state: _SyncState, kept: Dict[str, Dict[str, Any]]) -> None:
+        """检查同步后的父权限都存在且未逻辑删除，并且父子关系中没有环"""
+        parents = {code: row["parent"] for code, row in kept.items() if not row["is_deleted"]}
+        parents.update({code: target["parent"] for code, target in state.permission_targets.items()})
+        for code, target in state.permission_targets.items():
+            if target["parent"] is not None and target["parent"] not in parents:
+                raise ValueError(f"权限 {code} 的父权限不存在: {target['parent']}")
+            node, seen = code, set()
+            while node is not None:
+                if node in seen:
+                    raise ValueError(f"权限 {code} 的父子关系存在循环")
+                seen.add(node)
+                node = parents.get(node)
+
+    @staticmethod
+    async def _current_grants(state: _SyncState) -> Dict[str, Set[str]]:
+        """读取清单中指定了授权的已有角色的当前授权（权限代码）"""
+        role_ids = {
+            state.role_rows[code]["id"]: code
+            for code in state.role_grants if code in state.role_rows
+        }
+        if not role_ids:
+            return {}
+        rows = await Role.with_deleted().filter(id__in=list(role_ids)).values_list("id", "permissions__code")
+        current: Dict[str, Set[str]] = {}
+        for role_id, permission_code in rows:
+            if permission_code is not None:
+                current.setdefault(role_ids[role_id], set()).add(permission_code)
+        return current
+
+    @staticmethod
+    async def _apply(state: _SyncState, plan: SyncPlan) -> None:
+        """按同步计划写入，应在事务中执行"""
+        now = datetime.now()
+        try:
+            # 先删除，释放被占用的名称；闭包记录和授权由外键级联删除
+            if plan.delete_permissions:
+                await Permission.with_deleted().filter(code__in=plan.delete_permissions).delete()
+            ids = {code: row["id"] for code, row in state.permission_rows.items()}
+            # 先更新和恢复已有权限，再新建：已有权限改名后释放的名称可以被新建的权限使用
+            changed = sorted(set(plan.update_permissions) | set(plan.restore_permissions))
+            # 新的父权限尚未创建的已有权限，先置空父权限（原父权限可能已被删除），新建后再设置
+            deferred = {
+                code for code in changed
+                if state.permission_targets[code]["parent"] is not None
+                and state.permission_targets[code]["parent"] not in ids
+            }
+            await RbacSyncService._release_names(Permission, [
+                ids[code] for code in changed if "name" in plan.update_permissions.get(code, {})
+            ])
+            if changed:
+                fields = {
+                    "parent_id" if name == "parent" else name
+                    for code in plan.update_permissions
+                    for name in plan.update_permissions[code]
+                }
+                await Permission.with_deleted().bulk_update(
+                    [
+                        Permission(
+                            id=ids[code],
+                            parent_id=None if code in deferred else ids.get(state.permission_targets[code]["parent"]),
+                            is_deleted=False,
+                            deleted_at=None,
+                            updated_at=now,
+                            **{name: state.permission_targets[code][name] for name in PERMISSION_SYNC_FIELDS},
+                        )
+                        for code in changed
+                    ],
+                    fields=sorted(fields) + (["is_deleted", "deleted_at"] if plan.restore_permissions else []) + ["updated_at"],
+                    batch_size=SYNC_BATCH_SIZE,
+                )
+            await RbacSyncService._create_permissions(state, plan.create_permissions, ids)
+            if deferred:
+                await Permission.with_deleted().bulk_update(
+                    [
+                        Permission(id=ids[code], parent_id=ids[state.permission_targets[code]["parent"]])
+                        for code in sorted(deferred)
+                    ],
+                    fields=["parent_id"],
+                    batch_size=SYNC_BATCH_SIZE,
+                )
+        except IntegrityError as e:
+            raise ValueError(unique_violation_message(e, PERMISSION_UNIQUE_MESSAGES)) from e
+
+        try:
+            if plan.delete_roles:
+                await Role.with_deleted().filter(code__in=plan.delete_roles).delete()
+            role_ids = {code: row["id"] for code, row in state.role_rows.items()}
+            # 同权限，先更新和恢复已有角色，再新建
+            changed = sorted(set(plan.update_roles) | set(plan.restore_roles))
+            await RbacSyncService._release_names(Role, [
+                role_ids[code] for code in changed if "name" in plan.update_roles.get(code, {})
+            ])
+            if changed:
+                fields = {name for code in plan.update_roles for name in plan.update_roles[code]}
+                await Role.with_deleted().bulk_update(
+                    [
+                        Role(
+                            id=role_ids[code],
+                            is_deleted=False,
+                            deleted_at=None,
+                            updated_at=now,
+                            **state.role_targets[code],
+                        )
+                        for code in changed
+                    ],
+                    fields=sorted(fields) + (["is_deleted", "deleted_at"] if plan.restore_roles else []) + ["updated_at"],
+                    batch_size=SYNC_BATCH_SIZE,
+                )
+            if plan.create_roles:
+                await Role.bulk_create(
+                    [Role(code=code, **state.role_targets[code]) for code in plan.create_roles],
+                    batch_size=SYNC_BATCH_SIZE,
+                )
+                role_ids.update(await Role.filter(code__in=plan.create_roles).values_list("code", "id"))
+        except IntegrityError as e:
+            raise ValueError(unique_violation_message(e, ROLE_UNIQUE_MESSAGES)) from e
+
+        if plan.grants or plan.revokes:
+            await write_role_permissions(
+                {
+                    role_ids[code]: [ids[permission_code] for permission_code in codes]
+                    for code, codes in plan.revokes.items()
+                },
+                [
+                    (role_ids[code], ids[permission_code])
+                    for code, codes in plan.grants.items()
+                    for permission_code in codes
+                ],
+            )
+
+        # 新建、移动或删除权限后重建闭包表
+        if (
+            plan.create_permissions or plan.delete_permissions
+            or any("parent" in changes for changes in plan.update_permissions.values())
+        ):
+            await PermissionService.rebuild_closure()
+
+    @staticmethod
+    async def _release_names(model: Type[Model], ids: List[int]) -> None:
+        """
+        将改名的记录先改为占位名称，再由后续更新写入新名称
+        同一条 UPDATE 按行检查唯一约束，名称互换（a: X→Y, b: Y→X）或链式改名（a: X→Y, b: Y→Z）
+        直接写入新名称时会与尚未更新的行冲突
+        """
+        if not ids:
+            return
+        await model.with_deleted().bulk_update(
+            [model(id=id_, name=f"__sync_{id_}") for id_ in ids],
+            fields=["name"],
+            batch_size=SYNC_BATCH_SIZE,
+        )
+
+    @staticmethod
+    async def _create_permissions(state: _SyncState, codes: List[str], ids: Dict[str, int]) -> None:
+        """
+        按层级新建权限，每层一条 INSERT，创建后读取ID供下一层设置父权限
+        :param ids: 权限代码 -> ID，新建的权限会写入其中
+        """
+        targets = state.permission_targets
+        pending = list(codes)
+        while pending:
+            # 父权限已存在（或没有父权限）的权限构成当前层
+            level = [code for code in pending if targets[code]["parent"] is None or targets[code]["parent"] in ids]
+            pending = [code for code in pending if code not in set(level)]
+            await Permission.bulk_create(
+                [
+                    Permission(
+                        code=code,
+                        parent_id=ids.get(targets[code]["parent"]),
+                        **{name: targets[code][name] for name in PERMISSION_SYNC_FIELDS},
+                    )
+                    for code in level
+                ],
+                batch_size=SYNC_BATCH_SIZE,
+            )
+            ids.update(await Permission.filter(code__in=level).values_list("code", "id"))
@@ -0,0 +1,136 @@
+from typing import Dict, Optional, Set, Tuple, Type
+
+from tortoise import Model, connections
+from tortoise.expressions import RawSQL
+from tortoise.queryset import QuerySet
+
+from app.log.config.log_config import get_logger
+from app.models.rbac import Permission, Role
+from app.models.user import User
+
+logger = get_logger(__name__)
+
+# 支持子串搜索的模型字段
+SEARCH_FIELDS: Dict[Type[Model], Tuple[str, ...]] = {
+    User: ("username", "email"),
+    Role: ("name", "code"),
+    Permission: ("name", "code"),
+}
+
+# 三元组索引可用的最短关键字长度
+MIN_TRIGRAM_LENGTH = 3
+
+
+def _quote_literal(value: str) -> str:
+    """转义为 SQL 字符串字面量"""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _escape_like(value: str) -> str:
+    """转义 LIKE 通配符，配合 ESCAPE '\\' 使用"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class SearchIndex:
+    """
+    子串搜索索引
+    - Postgres: 使用 pg_trgm 的 GIN 索引（由迁移创建），查询使用 ILIKE
+    - SQLite: 为每张表维护 FTS5 trigram 影子表，由触发器在写入时同步
+    其他数据库或关键字过短时回退为 icontains 扫描
+    """
+
+    def __init__(self):
+        self._dialect: Optional[str] = None
+        # 已建立 FTS5 影子表的数据表
+        self._fts_tables: Set[str] = set()
+
+    @staticmethod
+    def _shadow_table(table: str) -> str:
+        return f"{table}_search"
+
+    async def setup(self) -> None:
+        """启动时检查并建立搜索索引"""
+        connection = connections.get("default")
+        self._dialect = connection.capabilities.dialect
+        if self._dialect == "postgres":
+            rows = await connection.execute_query_dict(
+                "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+            )
+            if not rows:
+                logger.warning("未安装 pg_trgm 扩展，子串搜索将无法使用三元组索引")
+        elif self._dialect == "sqlite":
+            for model, search_fields in SEARCH_FIELDS.items():
+                await self._setup_sqlite(model, search_fields)
+
+    async def _setup_sqlite(self, model: Type[Model], search_fields: Tuple[str, ...]) -> None:
+        """建立 FTS5 影子表及同步触发器，新建时从原表重建索引"""
+        connection = connections.get(model._meta.default_connection)
+        table = model._meta.db_table
+        shadow = self._shadow_table(table)
+        columns = ", ".join(search_fields)
+        new_values = ", ".join(f"new.{f}" for f in search_fields)
+        old_values = ", ".join(f"old.{f}" for f in search_fields)
+
+        try:
+            exists = await connection.execute_query_dict(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", [shadow]
+            )
+            await connection.execute_script(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS "{shadow}" USING fts5(
+                    {columns}, content='{table}', content_rowid='id', tokenize='trigram'
+                );
+                CREATE TRIGGER IF NOT EXISTS "{shadow}_ai" AFTER INSERT ON "{table}" BEGIN
+                    INSERT INTO "{shadow}"(rowid, {columns}) VALUES (new.id, {new_values});
+                END;
+                CREATE TRIGGER IF NOT EXISTS "{shadow}_ad" AFTER DELETE ON "{table}" BEGIN
+                    INSERT INTO "{shadow}"("{shadow}", rowid, {columns})
+                    VALUES ('delete', old.id, {old_values});
+                END;
+                CREATE TRIGGER IF NOT EXISTS "{shadow}_au" AFTER UPDATE OF {columns} ON "{table}" BEGIN
+                    INSERT INTO "{shadow}"("{shadow}", rowid, {columns})
+                    VALUES ('delete', old.id, {old_values});
+                    INSERT INTO "{shadow}"(rowid, {columns}) VALUES (new.id, {new_values});
+                END;
+            """)
+            if not exists:
+                await connection.execute_script(
+                    f"""INSERT INTO "{shadow}"("{shadow}") VALUES ('rebuild');"""
+                )
+                logger.info(f"已建立搜索索引: {shadow}")
+        except Exception as e:
+            # SQLite 未编译 FTS5 或版本低于 3.34（不支持 trigram）时回退为扫描
+            logger.warning(f"建立搜索索引 {shadow} 失败，将使用 LIKE 扫描: {str(e)}")
+            return
+        self._fts_tables.add(table)
+
+    def filter(self, query: QuerySet, field: str, term: str) -> QuerySet:
+        """
+        按字段进行不区分大小写的子串过滤
+        :param query: 待过滤的查询集
+        :param field: 字段名，须在 SEARCH_FIELDS 中声明
+        :param term: 搜索关键字
+        """
+        model = query.model
+        if field not in SEARCH_FIELDS.get(model, ()):
+            raise ValueError(f"字段 {field} 不支持搜索")
+        table = model._meta.db_table
+        column = f'"{table}"."{model._meta.fields_map[field].source_field or field}"'
+
+        if self._dialect == "postgres":
+            # 以注解形式附加 ILIKE 条件，Postgres 会将 "条件 = true" 化简为条件本身并使用 GIN 索引
+            pattern = _quote_literal(f"%{_escape_like(term)}%")
+            alias = f"_search_{field}"
+            condition = RawSQL(f"({column} ILIKE {pattern} ESCAPE '\\')")
+            return query.annotate(**{alias: condition}).filter(**{alias: True})
+        if table in self._fts_tables and len(term) >= MIN_TRIGRAM_LENGTH:
+            # 从影子表中取出匹配的 rowid，由主键直接定位
+            shadow = self._shadow_table(table)
+            phrase = _quote_literal('"' + term.replace('"', '""') + '"')
+            return query.filter(id__in=RawSQL(
+                f'(SELECT rowid FROM "{shadow}" WHERE "{shadow}"."{field}" MATCH {phrase})'
+            ))
+        return query.filter(**{f"{field}__icontains": term})
+
+
+# 创建全局实例
+search_index = SearchIndex()
@@ -1,12 +1,47 @@
 # app/services/user.py
 
-from typing import Optional, List, Dict, Any
+from datetime import datetime
+from typing import Optional, List, Dict, Any, AsyncIterator, Iterable, Iterator, Tuple
+from tortoise.exceptions import IntegrityError
 from tortoise.expressions import Q
+from tortoise.queryset import QuerySet
+from tortoise.transactions import in_transaction
 
+from app.models.rbac import Role, UserRole
 from app.models.user import User
 # 保持 UserCreate 的导入，因为 admin_create_user 需要它
-from app.schemas.user import UserCreate, UserUpdate, UserRegisterRequest
-from app.core.security.token import get_password_hash, verify_password
+from app.schemas.user import UserCreate, UserUpdate, UserRegisterRequest, UserResponse
+from app.core.security.hashing import password_hasher
+from app.core.security.rbac_cache import rbac_cache
+from app.core.security.token_cache import token_cache
+from app.services.rbac import resolve_assignment
+from app.services.search import search_index
+from app.utils.integrity import unique_violation_message
+from app.utils.pagination import iter_keyset, paginate, parse_fields
+
+# 用户列表支持的排序字段
+USER_SORT_FIELDS = ("id", "created_at", "username")
+
+# 唯一约束冲突时的错误信息
+USER_UNIQUE_MESSAGES = {"username": "用户名已存在", "email": "邮箱已存在"}
+
+# 用户列表可选的返回字段
+USER_LIST_FIELDS = tuple(UserResponse.model_fields)
+
+# 用户导出的字段
+USER_EXPORT_FIELDS = (
+    "id", "username", "email", "is_active", "is_superadmin", "last_login", "created_at",
+    "is_deleted"
+)
+
+# 批量操作中单条 SQL 的最大 ID 数，避免超出数据库参数个数限制
+BULK_CHUNK_SIZE = 500
+
+
+def _chunked(ids: List[int], size: int = BULK_CHUNK_SIZE) -> Iterator[List[int]]:
+    """将 ID 列表按固定大小分块"""
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
 
 class UserService:
     """
@@ -22,17 +57,17 @@ class UserService:
         :return: 创建的用户对象
         :raises: ValueError 当用户名或邮箱已存在时
         """
-        if await User.filter(username=user_data.username).exists():
-            raise ValueError("用户名已存在")
-        if await User.filter(email=user_data.email).exists():
-            raise ValueError("邮箱已存在")
-
-        user = await User.create(
-            username=user_data.username,
-            email=user_data.email,
-            password_hash=get_password_hash(user_data.password),
-            is_active=True # 注册用户默认激活
-        )
+        # 依赖唯一约束判断冲突（已软删除的用户仍占用用户名和邮箱），只需一次写入
+        password_hash = await password_hasher.hash(user_data.password)
+        try:
+            user = await User.create(
+                username=user_data.username,
+                email=user_data.email,
+                password_hash=password_hash,
+                is_active=True # 注册用户默认激活
+            )
+        except IntegrityError as e:
+            raise ValueError(unique_violation_message(e, USER_UNIQUE_MESSAGES)) from e
         return user
 
     @staticmethod
@@ -43,17 +78,17 @@ class UserService:
         :return: 创建的用户对象
         :raises: ValueError 当用户名或邮箱已存在时
         """
-        if await User.filter(username=user_data.username).exists():
-            raise ValueError("用户名已存在")
-        if await User.filter(email=user_data.email).exists():
-            raise ValueError("邮箱已存在")
-
-        user = await User.create(
-            username=user_data.username,
-            email=user_data.email,
-            password_hash=get_password_hash(user_data.password),
-            is_active=user_data.is_active # 使用 UserCreate 中的 is_active 值
-        )
+        # 依赖唯一约束判断冲突（已软删除的用户仍占用用户名和邮箱），只需一次写入
+        password_hash = await password_hasher.hash(user_data.password)
+        try:
+            user = await User.create(
+                username=user_data.username,
+                email=user_data.email,
+                password_hash=password_hash,
+                is_active=user_data.is_active # 使用 UserCreate 中的 is_active 值
+            )
+        except IntegrityError as e:
+            raise ValueError(unique_violation_message(e, USER_UNIQUE_MESSAGES)) from e
         return user
 
 
@@ -71,37 +106,216 @@ class UserService:
         if not user:
             raise ValueError("用户不存在")
         update_data = user_data.model_dump(exclude_unset=True)
-        if "username" in update_data:
-            exists = await User.filter(
-                username=update_data["username"]
-            ).exclude(id=user_id).exists()
-            if exists:
-                raise ValueError("用户名已存在")
-        if "email" in update_data:
-            exists = await User.filter(
-                email=update_data["email"]
-            ).exclude(id=user_id).exists()
-            if exists:
-                raise ValueError("邮箱已存在")
+        if not update_data:
+            return user
         if "password" in update_data:
-            update_data["password_hash"] = get_password_hash(update_data.pop("password"))
+            update_data["password_hash"] = await password_hasher.hash(update_data.pop("password"))
 
+        # 只更新变更的列，用户名/邮箱冲突由唯一约束判断
         await user.update_from_dict(update_data)
-        await user.save()
+        try:
+            await user.save(update_fields=[*update_data, "updated_at"])
+        except IntegrityError as e:
+            raise ValueError(unique_violation_message(e, USER_UNIQUE_MESSAGES)) from e
+        # 用户信息变更后，使已缓存的令牌快照失效
+        token_cache.invalidate_user(user_id)
         return user
 
 
     @staticmethod
     async def delete_user(user_id: int) -> None:
         """
-        删除用户
+        删除用户（逻辑删除，可通过批量恢复接口恢复）
         :param user_id: 用户ID
         :raises: ValueError 当用户不存在时
         """
         user = await User.get_or_none(id=user_id)
         if not user:
             raise ValueError("用户不存在")
-        await user.delete()
+        await user.soft_delete()
+        token_cache.invalidate_user(user_id)
+        rbac_cache.invalidate_user(user_id)
+
+    @staticmethod
+    def _invalidate_users(user_ids: List[int]) -> None:
+        """使批量操作涉及用户的令牌缓存和用户-角色缓存失效"""
+        for user_id in user_ids:
+            token_cache.invalidate_user(user_id)
+            rbac_cache.invalidate_user(user_id)
+
+    @staticmethod
+    async def bulk_set_active(user_ids: List[int], is_active: bool) -> Tuple[int, int]:
+        """
+        批量激活/禁用用户
+        每批执行一条 UPDATE ... WHERE id IN (...)，所有批次在同一事务中完成
+        :param user_ids: 用户ID列表
+        :param is_active: 目标激活状态
+        :return: (去重后的用户数, 实际更新的行数)
+        """
+        ids = sorted(set(user_ids))
+        affected = 0
+        now = datetime.now()
+        async with in_transaction():
+            for chunk in _chunked(ids):
+                # 批量更新不会触发 auto_now，需显式刷新 updated_at（ETag 依赖此字段）
+                affected += await User.filter(id__in=chunk, is_active=not is_active).update(
+                    is_active=is_active,
+                    updated_at=now
+                )
+        UserService._invalidate_users(ids)
+        return len(ids), affected
+
+    @staticmethod
+    async def bulk_soft_delete(user_ids: List[int]) -> Tuple[int, int]:
+        """
+        批量软删除用户
+        :param user_ids: 用户ID列表
+        :return: (去重后的用户数, 实际删除的行数)
+        """
+        ids = sorted(set(user_ids))
+        affected = 0
+        async with in_transaction():
+            for chunk in _chunked(ids):
+                affected += await User.batch_soft_delete(chunk)
+        UserService._invalidate_users(ids)
+        return len(ids), affected
+
+    @staticmethod
+    async def bulk_restore(user_ids: List[int]) -> Tuple[int, int]:
+        """
+        批量恢复已软删除的用户
+        :param user_ids: 用户ID列表
+        :return: (去重后的用户数, 实际恢复的行数)
+        """
+        ids = sorted(set(user_ids))
+        affected = 0
+        async with in_transaction():
+            for chunk in _chunked(ids):
+                affected += await User.batch_restore(chunk)
+        UserService._invalidate_users(ids)
+        return len(ids), affected
+
+    @staticmethod
+    async def bulk_assign_roles(user_ids: List[int], role_ids: List[int]) -> Tuple[int, int]:
+        """
+        批量为用户分配角色
+        每批先查询已存在的用户-角色关联，只插入缺失的部分；
+        有变更时递增一次 RBAC 版本号
+        :param user_ids: 用户ID列表，不存在的用户会被忽略
+        :param role_ids: 角色ID列表
+        :return: (去重后的用户数, 新增的关联数)
+        :raises: ValueError 当角色不存在时
+        """
+        ids = sorted(set(user_ids))
+        role_ids = sorted(set(role_ids))
+        existing_roles = set(await Role.filter(
+            id__in=role_ids, is_deleted=False
+        ).values_list("id", flat=True))
+        missing = [role_id for role_id in role_ids if role_id not in existing_roles]
+        if missing:
+            raise ValueError(f"角色不存在: {missing}")
+
+        affected = 0
+        async with in_transaction():
+            for chunk in _chunked(ids):
+                found_users = await User.filter(id__in=chunk).values_list("id", flat=True)
+                assigned = set(await UserRole.filter(
+                    user_id__in=chunk, role_id__in=role_ids
+                ).values_list("user_id", "role_id"))
+                links = [
+                    UserRole(user_id=user_id, role_id=role_id)
+                    for user_id in found_users
+                    for role_id in role_ids
+                    if (user_id, role_id) not in assigned
+                ]
+                if links:
+                    await UserRole.bulk_create(links)
+                    affected += len(links)
+        # 提交后再递增版本号：事务中重建快照会读到未提交的数据，SQLite 下还会与快照刷新互相等待
+        if affected:
+            await rbac_cache.bump_version()
+        UserService._invalidate_users(ids)
+        return len(ids), affected
+
+    @staticmethod
+    async def bulk_revoke_roles(user_ids: List[int], role_ids: List[int]) -> Tuple[int, int]:
+        """
+        批量撤销用户的角色
+        有变更时递增一次 RBAC 版本号
+        :param user_ids: 用户ID列表
+        :param role_ids: 角色ID列表
+        :return: (去重后的用户数, 删除的关联数)
+        """
+        ids = sorted(set(user_ids))
+        role_ids = sorted(set(role_ids))
+        affected = 0
+        async with in_transaction():
+            for chunk in _chunked(ids):
+                affected += await UserRole.filter(
+                    user_id__in=chunk, role_id__in=role_ids
+                ).delete()
+        if affected:
+            await rbac_cache.bump_version()
+        UserService._invalidate_users(ids)
+        return len(ids), affected
+
+    @staticmethod
+    async def get_user_role_ids(user_id: int) -> List[int]:
+        """
+        获取用户的角色ID
+        :raises: ValueError 当用户不存在时
+        """
+        rows = await User.filter(id=user_id).values_list("user_roles__role_id", flat=True)
+        if not rows:
+            raise ValueError("用户不存在")
+        return sorted(role_id for role_id in rows if role_id is not None)
+
+    @staticmethod
+    async def assign_roles(
+        user_id: int,
+        replace: Optional[Iterable[int]] = None,
+        add: Iterable[int] = (),
+        remove: Iterable[int] = ()
+    ) -> Tuple[int, int, int]:
+        """
+        替换或增量修改用户的角色集合
+        锁定用户行后读取当前集合并在内存中比对，对 user_roles 按块批量插入/删除，
+        全部在同一事务中完成，提交后只递增一次 RBAC 版本号
+        :param user_id: 用户ID
+        :param replace: 目标角色ID集合，提供时忽略 add/remove
+        :param add: 需要添加的角色ID
+        :param remove: 需要移除的角色ID
+        :return: (新增数, 移除数, 变更后的角色数)
+        :raises: ValueError 当用户或角色不存在、同一角色同时添加和移除、或与并发修改冲突时
+        """
+        try:
+            async with in_transaction():
+                # 锁定用户行，同一用户的并发修改依次执行，比对基于其他修改提交后的角色集合
+                if await User.select_for_update().get_or_none(id=user_id) is None:
+                    raise ValueError("用户不存在")
+                current = set(await UserService.get_user_role_ids(user_id))
+                to_add, to_remove = resolve_assignment(current, replace, add, remove)
+                if to_add:
+                    found = set(await Role.filter(id__in=to_add).values_list("id", flat=True))
+                    missing = [role_id for role_id in to_add if role_id not in found]
+                    if missing:
+                        raise ValueError(f"角色不存在: {missing}")
+                for chunk in _chunked(to_remove):
+                    await UserRole.filter(user_id=user_id, role_id__in=chunk).delete()
+                if to_add:
+                    await UserRole.bulk_create(
+                        [UserRole(user_id=user_id, role_id=role_id) for role_id in to_add],
+                        batch_size=BULK_CHUNK_SIZE
+                    )
+        except IntegrityError as e:
+            # 不支持行锁的数据库上，并发修改可能插入相同的用户角色
+            raise ValueError("用户角色已被同时修改，请重试") from e
+
+        if to_add or to_remove:
+            # 提交后再递增版本号
+            await rbac_cache.bump_version()
+            UserService._invalidate_users([user_id])
+        return len(to_add), len(to_remove), len(current) + len(to_add) - len(to_remove)
 
     @staticmethod
     async def get_user(user_id: int) -> User:
@@ -117,32 +331,94 @@ class UserService:
         return user
 
     @staticmethod
-    async def list_users(
-        page: int = 1,
-        page_size: int = 10,
+    async def get_user_updated_at(user_id: int) -> datetime:
+        """
+        获取用户的最后修改时间，只读取单列，用于在加载完整记录前判断条件请求
+        :param user_id: 用户ID
+        :return: 最后修改时间
+        :raises: ValueError 当用户不存在时
+        """
+        rows = await User.filter(id=user_id).values_list("updated_at", flat=True)
+        if not rows:
+            raise ValueError("用户不存在")
+        return rows[0]
+
+    @staticmethod
+    def filter_users(
         username: Optional[str] = None,
         email: Optional[str] = None,
-        is_active: Optional[bool] = None
-    ) -> tuple[List[User], int]:
+        is_active: Optional[bool] = None,
+        include_deleted: bool = False
+    ) -> QuerySet:
         """
-        获取用户列表
-        :param page: 页码
-        :param page_size: 每页数量
+        构建用户过滤查询，用户列表和导出共用
         :param username: 用户名过滤
         :param email: 邮箱过滤
         :param is_active: 是否激活过滤
-        :return: (用户列表, 总数)
+        :param include_deleted: 是否包含已逻辑删除的用户
         """
-        query = User.all()
+        query = User.with_deleted() if include_deleted else User.all()
         if username:
-            query = query.filter(username__icontains=username)
+            query = search_index.filter(query, "username", username)
         if email:
-            query = query.filter(email__icontains=email)
+            query = search_index.filter(query, "email", email)
         if is_active is not None:
             query = query.filter(is_active=is_active)
-        total = await query.count()
-        users = await query.offset((page - 1) * page_size).limit(page_size)
-        return users, total
+        return query
+
+    @staticmethod
+    async def list_users(
+        page: int = 1,
+        page_size: int = 10,
+        username: Optional[str] = None,
+        email: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        cursor: Optional[str] = None,
+        sort: str = "id",
+        with_total: bool = True,
+        total_mode: str = "exact",
+        fields: Optional[str] = None
+    ) -> tuple[List[Dict[str, Any]], Optional[int], Optional[str]]:
+        """
+        获取用户列表
+        只查询返回所需的列，结果为字典，不实例化模型
+        :param page: 页码（offset 分页）
+        :param page_size: 每页数量，超过上限时按上限处理
+        :param username: 用户名过滤
+        :param email: 邮箱过滤
+        :param is_active: 是否激活过滤
+        :param cursor: 分页游标（键集分页），提供时忽略 page
+        :param sort: 排序字段 id/created_at/username，"-" 前缀表示降序
+        :param with_total: 是否统计总数，为 False 时总数返回 None
+        :param total_mode: 总数统计方式 exact/window/estimate
+        :param fields: 逗号分隔的返回字段，默认返回全部字段
+        :return: (用户字典列表, 总数, 下一页游标)
+        :raises: ValueError 当排序字段、游标、统计方式或返回字段无效时
+        """
+        query = UserService.filter_users(username, email, is_active)
+        users, total, next_cursor = await paginate(
+            query, page, page_size, cursor, sort, USER_SORT_FIELDS,
+            total_mode=total_mode if with_total else None,
+            filters={"username": username, "email": email, "is_active": is_active},
+            fields=parse_fields(fields, USER_LIST_FIELDS)
+        )
+        return users, total, next_cursor
+
+    @staticmethod
+    async def export_users(
+        username: Optional[str] = None,
+        email: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        chunk_size: int = 1000,
+        include_deleted: bool = False
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        按主键顺序分块导出用户，过滤条件与用户列表相同
+        :return: 用户字典列表的异步迭代器，每块最多 chunk_size 行
+        """
+        query = UserService.filter_users(username, email, is_active, include_deleted)
+        async for chunk in iter_keyset(query, chunk_size, USER_EXPORT_FIELDS):
+            yield chunk
 
     @staticmethod
     async def change_password(
@@ -159,10 +435,10 @@ class UserService:
         user = await User.get_or_none(id=user_id)
         if not user:
             raise ValueError("用户不存在")
-        if not user.verify_password(old_password):
+        if not await password_hasher.verify(old_password, user.password_hash):
             raise ValueError("旧密码错误")
         if new_password != confirm_password:
             raise ValueError("新密码和确认密码不一致")
-        user.password_hash = get_password_hash(new_password)
-        await user.save()
+        user.password_hash = await password_hasher.hash(new_password)
+        await user.save(update_fields=["password_hash", "updated_at"])
         return None
@@ -0,0 +1,345 @@
+import csv
+import json
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+from tortoise import connections
+from tortoise.exceptions import IntegrityError
+
+from app.core.security.hashing import PasswordHasher, password_hasher
+from app.log.config.log_config import get_logger
+from app.models.user import User
+from app.schemas.user import UserCreate
+from app.services.user import USER_UNIQUE_MESSAGES
+from app.settings.config import IMPORT_CHUNK_SIZE, IMPORT_MAX_ERRORS
+from app.utils.integrity import unique_violation_message
+
+logger = get_logger(__name__)
+
+# 支持的导入格式
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], encoding: str = "utf-8") -> AsyncIterator[str]:
+    """将字节流切分为文本行，去掉开头的 UTF-8 BOM（Excel 等工具导出的 CSV 常带有）"""
+    buffer = b""
+    first = True
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            text = line.decode(encoding).rstrip("\r")
+            if first:
+                text, first = text.removeprefix("\ufeff"), False
+            yield text
+    if buffer:
+        text = buffer.decode(encoding).rstrip("\r")
+        yield text.removeprefix("\ufeff") if first else text
+
+
+class _LineFeed:
+    """
+    供同一个 csv.reader 读取的行缓冲，由异步行流填充
+    只在缓冲中已有完整记录时才读取，因此不会在记录中途耗尽
+    """
+
+    def __init__(self):
+        self.lines: Deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def parse_records(
+    lines: AsyncIterator[str],
+    fmt: str
+) -> AsyncIterator[Tuple[int, Union[Dict[str, Any], str]]]:
+    """
+    逐行解析导入数据
+    CSV 首行为表头，带引号的字段可以跨行；NDJSON 每行一个 JSON 对象。空行会被跳过
+    :return: (行号, 记录) 的异步迭代器，行号为记录的起始行，解析失败时记录为错误信息
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"无效的导入格式，可选值：{list(IMPORT_FORMATS)}")
+    header: Optional[List[str]] = None
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    # 当前 CSV 记录的起始行号和已读到的引号数
+    record_start: Optional[int] = None
+    quotes = 0
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if fmt == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_no, "JSON 格式错误"
+                continue
+            if not isinstance(record, dict):
+                yield line_no, "每行必须是一个 JSON 对象"
+                continue
+            yield line_no, record
+            continue
+
+        if record_start is None:
+            if not line.strip():
+                continue
+            record_start = line_no
+        feed.lines.append(line + "\n")
+        quotes += line.count('"')
+        if quotes % 2:
+            # 引号未闭合，换行属于字段内容，继续读取下一行
+            continue
+        values = next(reader)
+        start, record_start, quotes = record_start, None, 0
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start, f"列数与表头不一致，应为 {len(header)} 列"
+            continue
+        # CSV 中的空值视为未提供
+        yield start, {k: v for k, v in zip(header, values) if v != ""}
+
+    if record_start is not None:
+        yield record_start, "引号未闭合"
+
+
+@dataclass
+class ImportReport:
+    """导入结果"""
+    processed: int = 0
+    created: int = 0
+    failed: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    elapsed: float = 0.0
+    max_errors: int = IMPORT_MAX_ERRORS
+
+    def add_error(self, line: int, username: Optional[str], error: str) -> None:
+        """记录失败行，超过上限的错误只计数不保留明细"""
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "username": username, "error": error})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "processed": self.processed,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["line"]),
+            "errors_truncated": self.failed > len(self.errors),
+            "elapsed": round(self.elapsed, 3),
+        }
+
+
+class UserImporter:
+    """
+    用户批量导入
+    流式读取 CSV/NDJSON，按批处理：
+    - 用户名/邮箱冲突通过 IN 查询一次性判断
+    - 密码通过密码哈希服务批量计算，与其他请求共用执行器和并发上限
+    - Postgres(asyncpg) 使用 COPY 写入，其他数据库使用 bulk_create
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        hasher: Optional[PasswordHasher] = None,
+        max_errors: int = 1000
+    ):
+        """
+        Args:
+            chunk_size: 每批处理的行数
+            hasher: 密码哈希服务，默认使用全局实例
+            max_errors: 导入报告中保留的错误行数上限
+        """
+        self.chunk_size = max(1, chunk_size)
+        self.hasher = hasher or password_hasher
+        self.max_errors = max_errors
+
+        # 进行中的导入任务进度
+        self._running: Dict[int, ImportReport] = {}
+        self._next_id = 0
+
+    async def run(
+        self,
+        lines: AsyncIterator[str],
+        fmt: str,
+        on_progress: Optional[Callable[[ImportReport], Any]] = None
+    ) -> ImportReport:
+        """
+        执行导入
+        :param lines: 文本行的异步迭代器
+        :param fmt: 导入格式 csv/ndjson
+        :param on_progress: 每批处理完成后的回调
+        :return: 导入结果
+        :raises: ValueError 当导入格式无效时
+        """
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f"无效的导入格式，可选值：{list(IMPORT_FORMATS)}")
+        report = ImportReport(max_errors=self.max_errors)
+        self._next_id += 1
+        import_id = self._next_id
+        self._running[import_id] = report
+        started = time.perf_counter()
+
+        # 本次导入中已出现的用户名和邮箱，用于发现文件内的重复行
+        seen_usernames = set()
+        seen_emails = set()
+        chunk: List[Tuple[int, UserCreate]] = []
+        try:
+            async for line_no, record in parse_records(lines, fmt):
+                report.processed += 1
+                if isinstance(record, str):
+                    report.add_error(line_no, None, record)
+                    continue
+                try:
+                    data = UserCreate.model_validate(record)
+                except ValidationError as e:
+                    message = "; ".join(
+                        f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+                        for err in e.errors()
+                    )
+                    report.add_error(line_no, record.get("username"), message)
+                    continue
+                if data.username in seen_usernames:
+                    report.add_error(line_no, data.username, "文件中用户名重复")
+                    continue
+                if data.email in seen_emails:
+                    report.add_error(line_no, data.username, "文件中邮箱重复")
+                    continue
+                seen_usernames.add(data.username)
+                seen_emails.add(data.email)
+
+                chunk.append((line_no, data))
+                if len(chunk) >= self.chunk_size:
+                    await self._import_chunk(chunk, report)
+                    chunk = []
+                    self._report_progress(report, started, on_progress)
+            if chunk:
+                await self._import_chunk(chunk, report)
+            self._report_progress(report, started, on_progress)
+        finally:
+            self._running.pop(import_id, None)
+
+        logger.info(
+            f"用户导入完成: 处理 {report.processed} 行，创建 {report.created}，"
+            f"失败 {report.failed}，耗时 {report.elapsed:.1f}s"
+        )
+        return report
+
+    @staticmethod
+    def _report_progress(
+        report: ImportReport,
+        started: float,
+        on_progress: Optional[Callable[[ImportReport], Any]]
+    ) -> None:
+        report.elapsed = time.perf_counter() - started
+        if on_progress is not None:
+            on_progress(report)
+
+    async def _import_chunk(
+        self,
+        chunk: List[Tuple[int, UserCreate]],
+        report: ImportReport
+    ) -> None:
+        """导入一批数据"""
+        # 已软删除的用户仍占用用户名和邮箱
+        existing_usernames = set(await User.with_deleted().filter(
+            username__in=[data.username for _, data in chunk]
+        ).values_list("username", flat=True))
+        existing_emails = set(await User.with_deleted().filter(
+            email__in=[data.email for _, data in chunk]
+        ).values_list("email", flat=True))
+
+        rows: List[Tuple[int, UserCreate]] = []
+        for line_no, data in chunk:
+            if data.username in existing_usernames:
+                report.add_error(line_no, data.username, "用户名已存在")
+            elif data.email in existing_emails:
+                report.add_error(line_no, data.username, "邮箱已存在")
+            else:
+                rows.append((line_no, data))
+        if not rows:
+            return
+
+        hashes = await self.hasher.hash_many([data.password for _, data in rows])
+        users = [
+            User(
+                username=data.username,
+                email=data.email,
+                password_hash=password_hash,
+                is_active=data.is_active if data.is_active is not None else True,
+            )
+            for (_, data), password_hash in zip(rows, hashes)
+        ]
+        try:
+            await self._insert(users)
+            report.created += len(users)
+        except IntegrityError:
+            # 与并发写入冲突时逐行插入，定位具体的冲突行
+            for (line_no, data), user in zip(rows, users):
+                try:
+                    await user.save()
+                    report.created += 1
+                except IntegrityError as e:
+                    report.add_error(
+                        line_no, data.username, unique_violation_message(e, USER_UNIQUE_MESSAGES)
+                    )
+
+    async def _insert(self, users: List[User]) -> None:
+        """写入一批用户"""
+        connection = connections.get(User._meta.default_connection)
+        if connection.capabilities.dialect == "postgres":
+            async with connection.acquire_connection() as conn:
+                if hasattr(conn, "copy_records_to_table"):
+                    records = [
+                        (user.username, user.email, user.password_hash, user.is_active)
+                        for user in users
+                    ]
+                    try:
+                        # 其余字段使用表上的默认值
+                        await conn.copy_records_to_table(
+                            User._meta.db_table,
+                            records=records,
+                            columns=["username", "email", "password_hash", "is_active"],
+                        )
+                    except Exception as e:
+                        # 完整性约束类错误（SQLSTATE 23xxx）
+                        if str(getattr(e, "sqlstate", "")).startswith("23"):
+                            raise IntegrityError(e) from e
+                        raise
+                    return
+        await User.bulk_create(users, batch_size=self.chunk_size)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取进行中的导入任务进度"""
+        return {
+            "running": [
+                {
+                    "id": import_id,
+                    "processed": report.processed,
+                    "created": report.created,
+                    "failed": report.failed,
+                }
+                for import_id, report in self._running.items()
+            ]
+        }
+
+
+# 创建全局实例
+user_importer = UserImporter(
+    chunk_size=IMPORT_CHUNK_SIZE,
+    max_errors=IMPORT_MAX_ERRORS,
+)
@@ -34,11 +34,17 @@ JWT_SECRET_KEY = config.get('JWT', 'SECRET_KEY')
 JWT_ALGORITHM = config.get('JWT', 'ALGORITHM')
 JWT_ACCESS_TOKEN_EXPIRE_MINUTES = config.getint('JWT', 'ACCESS_TOKEN_EXPIRE_MINUTES')
 JWT_REFRESH_TOKEN_EXPIRE_DAYS = config.getint('JWT', 'REFRESH_TOKEN_EXPIRE_DAYS')
+# 是否在访问令牌中嵌入角色和权限声明
+JWT_EMBED_PERMISSIONS = config.getboolean('JWT', 'EMBED_PERMISSIONS', fallback=False)
 
 # 计算token过期时间
 ACCESS_TOKEN_EXPIRE_DELTA = timedelta(minutes=JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
 REFRESH_TOKEN_EXPIRE_DELTA = timedelta(days=JWT_REFRESH_TOKEN_EXPIRE_DAYS)
 
+# 分页配置
+MAX_PAGE_SIZE = config.getint('PAGINATION', 'MAX_PAGE_SIZE', fallback=100)
+TOTAL_CACHE_TTL = config.getfloat('PAGINATION', 'TOTAL_CACHE_TTL', fallback=5.0)
+
 # 日志配置
 LOG_LEVEL = config.get('LOG', 'LEVEL')
 LOG_FORMAT = config.get('LOG', 'FORMAT')
@@ -53,3 +59,33 @@ CORS_ORIGINS = eval(config.get('CORS', 'ORIGINS'))  # 从字符串转换为列
 CORS_METHODS = eval(config.get('CORS', 'METHODS'))
 CORS_HEADERS = eval(config.get('CORS', 'HEADERS'))
 CORS_CREDENTIALS = config.getboolean('CORS', 'ALLOW_CREDENTIALS')
+
+# 安全配置
+PASSWORD_HASH_EXECUTOR = config.get('SECURITY', 'PASSWORD_HASH_EXECUTOR', fallback='thread').lower()
+PASSWORD_HASH_WORKERS = config.getint('SECURITY', 'PASSWORD_HASH_WORKERS', fallback=0)
+PASSWORD_HASH_MAX_CONCURRENCY = config.getint('SECURITY', 'PASSWORD_HASH_MAX_CONCURRENCY', fallback=8)
+TOKEN_CACHE_ENABLED = config.getboolean('SECURITY', 'TOKEN_CACHE_ENABLED', fallback=True)
+TOKEN_CACHE_MAX_SIZE = config.getint('SECURITY', 'TOKEN_CACHE_MAX_SIZE', fallback=10000)
+TOKEN_CACHE_TTL = config.getint('SECURITY', 'TOKEN_CACHE_TTL', fallback=60)
+LAST_LOGIN_FLUSH_INTERVAL = config.getfloat('SECURITY', 'LAST_LOGIN_FLUSH_INTERVAL', fallback=5.0)
+LAST_LOGIN_MAX_PENDING = config.getint('SECURITY', 'LAST_LOGIN_MAX_PENDING', fallback=10000)
+
+# RBAC配置
+RBAC_VERSION_CHECK_INTERVAL = config.getfloat('RBAC', 'VERSION_CHECK_INTERVAL', fallback=1.0)
+RBAC_USER_CACHE_SIZE = config.getint('RBAC', 'USER_CACHE_SIZE', fallback=10000)
+RBAC_INHERIT_PERMISSIONS = config.getboolean('RBAC', 'INHERIT_PERMISSIONS', fallback=False)
+RBAC_ROUTE_AUTHORIZATION = config.getboolean('RBAC', 'ROUTE_AUTHORIZATION', fallback=False)
+
+# 批量导入/导出配置
+IMPORT_CHUNK_SIZE = config.getint('IMPORT', 'CHUNK_SIZE', fallback=1000)
+IMPORT_HASH_WORKERS = config.getint('IMPORT', 'HASH_WORKERS', fallback=0)
+IMPORT_MAX_ERRORS = config.getint('IMPORT', 'MAX_ERRORS', fallback=1000)
+EXPORT_CHUNK_SIZE = config.getint('IMPORT', 'EXPORT_CHUNK_SIZE', fallback=1000)
+
+# 逻辑删除记录归档配置
+ARCHIVE_ENABLED = config.getboolean('ARCHIVE', 'ENABLED', fallback=False)
+ARCHIVE_MODE = config.get('ARCHIVE', 'MODE', fallback='archive').lower()
+ARCHIVE_RETENTION_DAYS = config.getint('ARCHIVE', 'RETENTION_DAYS', fallback=90)
+ARCHIVE_BATCH_SIZE = config.getint('ARCHIVE', 'BATCH_SIZE', fallback=500)
+ARCHIVE_BATCH_SLEEP = config.getfloat('ARCHIVE', 'BATCH_SLEEP', fallback=0.2)
+ARCHIVE_INTERVAL = config.getfloat('ARCHIVE', 'INTERVAL', fallback=3600)
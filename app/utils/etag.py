@@ -0,0 +1,52 @@
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+# 需要认证的资源只允许客户端私有缓存，且每次使用前须向服务端验证
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    根据资源的版本信息生成强 ETag
+    :param parts: 决定响应内容的版本信息，如 updated_at、RBAC 版本号、查询参数
+    :return: 带引号的 ETag
+    """
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return '"' + hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """判断请求的 If-None-Match 是否与 ETag 匹配（按弱比较处理 W/ 前缀）"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag
+        for tag in header.split(",")
+    )
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    etag: str,
+    cache_control: str = CACHE_CONTROL
+) -> Optional[Response]:
+    """
+    处理条件请求
+    ETag 匹配时返回 304 响应，路由应直接返回它以跳过查询和序列化；
+    否则在 response 上设置缓存头并返回 None
+    :param request: 当前请求
+    :param response: 路由注入的响应对象
+    :param etag: 当前资源的 ETag
+    :param cache_control: Cache-Control 头
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
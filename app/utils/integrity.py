@@ -0,0 +1,58 @@
+import re
+from typing import Dict, List
+
+from tortoise.exceptions import IntegrityError
+
+# 各数据库错误信息中的约束名或列名，不包含冲突的值
+_IDENTIFIER_PATTERNS = (
+    # SQLite: UNIQUE constraint failed: users.email[, users.xxx]
+    re.compile(r"unique constraint failed: ([^\n]+)"),
+    # Postgres: duplicate key value violates unique constraint "users_email_key"
+    re.compile(r'unique constraint "([^"]+)"'),
+    # MySQL: Duplicate entry '...' for key 'users.email'
+    re.compile(r"for key '([^']+)'"),
+)
+
+# Postgres 冲突详情: Key (email)=(...) already exists.
+_DETAIL_KEY_PATTERN = re.compile(r"key \(([^)]*)\)=")
+
+
+def _conflict_identifiers(error: IntegrityError) -> List[str]:
+    """提取冲突涉及的约束名和列名"""
+    names: List[str] = []
+    for pattern in _IDENTIFIER_PATTERNS:
+        for match in pattern.findall(str(error).lower()):
+            names.extend(match.split(","))
+    # asyncpg 的约束名和冲突详情在原始异常的属性中
+    origin = error.args[0] if error.args else None
+    constraint_name = getattr(origin, "constraint_name", None)
+    if constraint_name:
+        names.append(constraint_name.lower())
+    for match in _DETAIL_KEY_PATTERN.findall((getattr(origin, "detail", None) or "").lower()):
+        names.extend(match.split(","))
+    return [name.strip().strip('"') for name in names if name.strip()]
+
+
+def unique_violation_message(
+    error: IntegrityError,
+    messages: Dict[str, str],
+    default: str = "数据已存在"
+) -> str:
+    """
+    将唯一约束冲突转换为业务错误信息
+    只根据约束名和列名判断冲突字段，不匹配冲突的值（如邮箱中包含其他字段名）：
+    - SQLite: UNIQUE constraint failed: users.email
+    - Postgres: 约束名 users_email_key / uid_users_email_xxx，或详情 Key (email)=(...)
+    - MySQL: Duplicate entry '...' for key 'users.email'
+    :param error: 数据库抛出的完整性错误
+    :param messages: 字段名到错误信息的映射
+    :param default: 无法识别冲突字段时的错误信息
+    :return: 错误信息
+    """
+    names = _conflict_identifiers(error)
+    for field, message in messages.items():
+        # 字段名在约束名或 表名.列名 中以 . 或 _ 分隔
+        pattern = re.compile(rf"(^|[._]){re.escape(field.lower())}($|[._])")
+        if any(pattern.search(name) for name in names):
+            return message
+    return default
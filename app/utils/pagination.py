@@ -0,0 +1,290 @@
+import base64
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Hashable, List, Optional, Tuple
+
+from tortoise import connections
+from tortoise.expressions import Q, RawSQL
+from tortoise.queryset import QuerySet
+
+from app.settings.config import MAX_PAGE_SIZE, TOTAL_CACHE_TTL
+
+# 支持的总数统计方式
+TOTAL_MODES = ("exact", "window", "estimate")
+
+
+def clamp_page_size(page_size: int) -> int:
+    """将每页数量限制在 1 到 MAX_PAGE_SIZE 之间"""
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def _dump_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _load_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def _get(item: Any, key: str) -> Any:
+    """从模型实例或字典中取值"""
+    if isinstance(item, dict):
+        return item[key]
+    return getattr(item, key)
+
+
+def encode_cursor(sort: str, values: Tuple[Any, ...]) -> str:
+    """
+    编码分页游标
+    游标内容为排序方式和上一页最后一行的排序键，对客户端不透明
+    """
+    payload = {"s": sort, "v": [_dump_value(v) for v in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, sort: str) -> List[Any]:
+    """
+    解码分页游标
+    :raises: ValueError 当游标无效或与排序方式不匹配时
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [_load_value(v) for v in payload["v"]]
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("无效的分页游标")
+    if payload.get("s") != sort:
+        raise ValueError("分页游标与排序方式不匹配")
+    return values
+
+
+def parse_sort(sort: str, sort_fields: Tuple[str, ...]) -> Tuple[str, bool]:
+    """
+    解析排序参数，"-" 前缀表示降序
+    :return: (排序字段, 是否降序)
+    :raises: ValueError 当排序字段不受支持时
+    """
+    descending = sort.startswith("-")
+    field = sort[1:] if descending else sort
+    if field not in sort_fields:
+        raise ValueError(f"无效的排序字段，可选值：{list(sort_fields)}")
+    return field, descending
+
+
+def parse_fields(fields: Optional[str], allowed: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    解析逗号分隔的字段列表（稀疏字段集），未提供时返回全部可选字段
+    :return: 去重后按请求顺序排列的字段
+    :raises: ValueError 当包含不支持的字段时
+    """
+    if not fields:
+        return allowed
+    requested = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    invalid = [f for f in requested if f not in allowed]
+    if invalid or not requested:
+        raise ValueError(f"无效的字段：{invalid}，可选值：{list(allowed)}")
+    return requested
+
+
+class TotalCache:
+    """
+    列表总数缓存
+    以模型、统计方式和过滤条件为键，在短时间内复用总数，避免每次翻页都重新统计
+    """
+
+    def __init__(self, ttl: float = 5.0, max_size: int = 1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Tuple[float, int]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable) -> Optional[int]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._misses += 1
+            return None
+        self._hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, total: int) -> None:
+        if self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, total)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+
+
+# 创建全局实例
+total_cache = TotalCache(ttl=TOTAL_CACHE_TTL)
+
+
+async def estimate_count(query: QuerySet, filtered: bool) -> int:
+    """
+    估算查询结果行数
+    - Postgres: 读取查询计划中的估算行数
+    - SQLite: 无过滤条件时读取 sqlite_stat1 统计信息（需执行过 ANALYZE）
+    其他情况回退为精确统计
+    """
+    model = query.model
+    connection = connections.get(model._meta.default_connection)
+    dialect = connection.capabilities.dialect
+    try:
+        if dialect == "postgres":
+            rows = await connection.execute_query_dict(f"EXPLAIN (FORMAT JSON) {query.sql()}")
+            plan = rows[0]["QUERY PLAN"]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+        if dialect == "sqlite" and not filtered:
+            rows = await connection.execute_query_dict(
+                "SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", [model._meta.db_table]
+            )
+            if rows:
+                return int(rows[0]["stat"].split()[0])
+    except Exception:
+        # 统计信息不可用时使用精确统计
+        pass
+    return await query.count()
+
+
+async def paginate(
+    query: QuerySet,
+    page: int = 1,
+    page_size: int = 10,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    sort_fields: Tuple[str, ...] = ("id",),
+    total_mode: Optional[str] = "exact",
+    filters: Optional[Dict[str, Any]] = None,
+    fields: Optional[Tuple[str, ...]] = None,
+) -> Tuple[List[Any], Optional[int], Optional[str]]:
+    """
+    分页查询
+    按排序键（以 id 作为次序键）稳定排序；提供 cursor 时使用键集分页，
+    否则使用 offset 分页。每页多取一行用于判断是否存在下一页
+
+    指定 fields 时通过 .values() 只查询这些列并返回字典，不实例化模型；
+    游标所需的排序键会一并查询，返回前移除
+
+    total_mode 决定总数的统计方式：
+    - exact: 单独执行 COUNT 查询
+    - window: 在分页查询中附带 COUNT(*) OVER()，只需一次查询（游标分页时回退为 exact）
+    - estimate: 使用数据库统计信息估算
+    - None: 不统计总数
+    exact/estimate 的结果按过滤条件缓存 TOTAL_CACHE_TTL 秒
+
+    :return: (当前页数据, 总数, 下一页游标)
+    :raises: ValueError 当排序字段、游标或统计方式无效时
+    """
+    if total_mode is not None and total_mode not in TOTAL_MODES:
+        raise ValueError(f"无效的总数统计方式，可选值：{list(TOTAL_MODES)}")
+    field, descending = parse_sort(sort, sort_fields)
+    page_size = clamp_page_size(page_size)
+    filters = filters or {}
+    cache_key = (
+        query.model.__name__,
+        total_mode,
+        tuple(sorted((k, v) for k, v in filters.items() if v is not None)),
+    )
+    filtered = bool(cache_key[2])
+    total = total_cache.get(cache_key) if total_mode is not None else None
+    use_window = total_mode == "window" and total is None and not cursor
+
+    count_query = query
+    prefix = "-" if descending else ""
+    keys = (field,) if field == "id" else (field, "id")
+    query = query.order_by(*(f"{prefix}{key}" for key in keys))
+
+    if cursor:
+        values = decode_cursor(cursor, sort)
+        if len(values) != len(keys):
+            raise ValueError("无效的分页游标")
+        op = "lt" if descending else "gt"
+        if len(keys) == 1:
+            condition = Q(**{f"id__{op}": values[0]})
+        else:
+            condition = Q(**{f"{field}__{op}": values[0]}) | Q(
+                **{field: values[0], f"id__{op}": values[1]}
+            )
+        query = query.filter(condition)
+    else:
+        query = query.offset((max(page, 1) - 1) * page_size)
+
+    if use_window:
+        query = query.annotate(window_total=RawSQL("COUNT(*) OVER ()"))
+
+    query = query.limit(page_size + 1)
+    extra: Tuple[str, ...] = ()
+    if fields:
+        extra = tuple(key for key in keys if key not in fields)
+        if use_window:
+            extra += ("window_total",)
+        query = query.values(*fields, *extra)
+    items = list(await query)
+
+    if total_mode is not None and total is None:
+        if use_window and items:
+            total = _get(items[0], "window_total")
+        elif use_window and page <= 1:
+            total = 0
+        elif total_mode == "estimate":
+            total = await estimate_count(count_query, filtered)
+        else:
+            total = await count_query.count()
+        total_cache.set(cache_key, total)
+
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor(sort, tuple(_get(last, key) for key in keys))
+    if extra:
+        items = [{key: item[key] for key in fields} for item in items]
+    return items, total, next_cursor
+
+
+async def iter_keyset(
+    query: QuerySet,
+    chunk_size: int = 1000,
+    fields: Tuple[str, ...] = ()
+) -> AsyncIterator[List[Any]]:
+    """
+    按主键顺序分块遍历查询结果
+    每块通过 id > 上一块最大 id 的条件定位，内存占用与表大小无关
+    :param query: 查询集
+    :param chunk_size: 每块行数
+    :param fields: 指定时以字典形式返回这些字段（须包含 id），否则返回模型实例
+    """
+    last_id = None
+    while True:
+        chunk_query = query.order_by("id").limit(chunk_size)
+        if last_id is not None:
+            chunk_query = chunk_query.filter(id__gt=last_id)
+        if fields:
+            chunk_query = chunk_query.values(*fields)
+        items = list(await chunk_query)
+        if not items:
+            return
+        yield items
+        if len(items) < chunk_size:
+            return
+        last_id = _get(items[-1], "id")
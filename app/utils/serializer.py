@@ -1,19 +1,56 @@
 from datetime import datetime
-from typing import Any
+from typing import Any, Optional
 
+import orjson
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
 
-def serialize_model(obj: Any) -> Any:
-    """
-    序列化对象为 JSON 可序列化的格式
-    """
+def _default(obj: Any) -> Any:
+    """orjson 无法原生处理的类型"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError
+
+
+def _serialize_python(obj: Any) -> Any:
+    """逐层递归转换，用于 orjson 无法处理的数据"""
     if isinstance(obj, BaseModel):
         return obj.model_dump()
     elif isinstance(obj, datetime):
         return obj.isoformat()
     elif isinstance(obj, (list, tuple)):
-        return [serialize_model(item) for item in obj]
+        return [_serialize_python(item) for item in obj]
     elif isinstance(obj, dict):
-        return {key: serialize_model(value) for key, value in obj.items()}
+        return {key: _serialize_python(value) for key, value in obj.items()}
     return obj
+
+
+def serialize_model(obj: Any) -> Any:
+    """
+    序列化对象为 JSON 可序列化的格式
+    优先由 orjson 在 C 层完成转换（datetime 输出为 ISO 8601 格式），
+    遇到 orjson 不支持的类型或非字符串键时回退为逐层递归
+    """
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    try:
+        return orjson.loads(orjson.dumps(obj, default=_default))
+    except TypeError:
+        return _serialize_python(obj)
+
+
+def json_response(content: Any, response: Optional[Response] = None) -> Response:
+    """
+    使用 orjson 将内容直接序列化为响应，跳过响应模型校验
+    适用于已是字典/列表等原生结构的数据（如 .values() 的查询结果）
+    :param content: 响应内容，为 bytes 时视为已序列化的 JSON 直接输出
+    :param response: 路由注入的响应对象，其上设置的响应头（如 ETag）会被保留
+    """
+    headers = None
+    if response is not None:
+        headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    if isinstance(content, bytes):
+        return Response(content, media_type="application/json", headers=headers)
+    return ORJSONResponse(content, headers=headers)
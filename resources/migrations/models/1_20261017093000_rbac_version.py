@@ -0,0 +1,20 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "rbac_version" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "version" BIGINT NOT NULL  DEFAULT 0,
+    "updated_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP
+);
+COMMENT ON COLUMN "rbac_version"."id" IS '主键ID';
+COMMENT ON COLUMN "rbac_version"."version" IS '版本号';
+COMMENT ON COLUMN "rbac_version"."updated_at" IS '更新时间';
+COMMENT ON TABLE "rbac_version" IS 'RBAC版本表';
+INSERT INTO "rbac_version" ("id", "version") VALUES (1, 0) ON CONFLICT DO NOTHING;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "rbac_version";"""
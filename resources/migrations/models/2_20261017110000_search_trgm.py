@@ -0,0 +1,22 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS "idx_users_username_trgm" ON "users" USING GIN ("username" gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS "idx_users_email_trgm" ON "users" USING GIN ("email" gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS "idx_roles_name_trgm" ON "roles" USING GIN ("name" gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS "idx_roles_code_trgm" ON "roles" USING GIN ("code" gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS "idx_permissions_name_trgm" ON "permissions" USING GIN ("name" gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS "idx_permissions_code_trgm" ON "permissions" USING GIN ("code" gin_trgm_ops);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_users_username_trgm";
+DROP INDEX IF EXISTS "idx_users_email_trgm";
+DROP INDEX IF EXISTS "idx_roles_name_trgm";
+DROP INDEX IF EXISTS "idx_roles_code_trgm";
+DROP INDEX IF EXISTS "idx_permissions_name_trgm";
+DROP INDEX IF EXISTS "idx_permissions_code_trgm";"""
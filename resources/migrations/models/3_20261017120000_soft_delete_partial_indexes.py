@@ -0,0 +1,21 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE INDEX IF NOT EXISTS "idx_users_username_live" ON "users" ("username") WHERE "is_deleted" = false;
+CREATE INDEX IF NOT EXISTS "idx_users_email_live" ON "users" ("email") WHERE "is_deleted" = false;
+CREATE INDEX IF NOT EXISTS "idx_users_id_live" ON "users" ("id") INCLUDE ("username", "email", "is_active") WHERE "is_deleted" = false;
+CREATE INDEX IF NOT EXISTS "idx_roles_code_live" ON "roles" ("code") WHERE "is_deleted" = false;
+CREATE INDEX IF NOT EXISTS "idx_permissions_code_live" ON "permissions" ("code") WHERE "is_deleted" = false;
+CREATE INDEX IF NOT EXISTS "idx_permissions_parent_live" ON "permissions" ("parent_id", "sort_order") WHERE "is_deleted" = false;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_users_username_live";
+DROP INDEX IF EXISTS "idx_users_email_live";
+DROP INDEX IF EXISTS "idx_users_id_live";
+DROP INDEX IF EXISTS "idx_roles_code_live";
+DROP INDEX IF EXISTS "idx_permissions_code_live";
+DROP INDEX IF EXISTS "idx_permissions_parent_live";"""
@@ -0,0 +1,32 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "archived_records" (
+    "id" BIGSERIAL NOT NULL PRIMARY KEY,
+    "table_name" VARCHAR(50) NOT NULL,
+    "record_id" BIGINT NOT NULL,
+    "data" JSONB NOT NULL,
+    "deleted_at" TIMESTAMPTZ,
+    "archived_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP
+);
+CREATE UNIQUE INDEX IF NOT EXISTS "uid_archived_re_table_n_5b1c2e" ON "archived_records" ("table_name", "record_id");
+COMMENT ON COLUMN "archived_records"."id" IS '主键ID';
+COMMENT ON COLUMN "archived_records"."table_name" IS '来源表名';
+COMMENT ON COLUMN "archived_records"."record_id" IS '原记录ID';
+COMMENT ON COLUMN "archived_records"."data" IS '原记录数据';
+COMMENT ON COLUMN "archived_records"."deleted_at" IS '原记录删除时间';
+COMMENT ON COLUMN "archived_records"."archived_at" IS '归档时间';
+COMMENT ON TABLE "archived_records" IS '归档记录表';
+CREATE INDEX IF NOT EXISTS "idx_users_deleted_at" ON "users" ("deleted_at") WHERE "is_deleted" = true;
+CREATE INDEX IF NOT EXISTS "idx_roles_deleted_at" ON "roles" ("deleted_at") WHERE "is_deleted" = true;
+CREATE INDEX IF NOT EXISTS "idx_permissions_deleted_at" ON "permissions" ("deleted_at") WHERE "is_deleted" = true;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_users_deleted_at";
+DROP INDEX IF EXISTS "idx_roles_deleted_at";
+DROP INDEX IF EXISTS "idx_permissions_deleted_at";
+DROP TABLE IF EXISTS "archived_records";"""
@@ -0,0 +1,32 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "permission_closure" (
+    "id" BIGSERIAL NOT NULL PRIMARY KEY,
+    "depth" INT NOT NULL,
+    "ancestor_id" INT NOT NULL REFERENCES "permissions" ("id") ON DELETE CASCADE,
+    "descendant_id" INT NOT NULL REFERENCES "permissions" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_permission__ancesto_3f8a1c" UNIQUE ("ancestor_id", "descendant_id")
+);
+CREATE INDEX IF NOT EXISTS "idx_permission__descend_7b2e4d" ON "permission_closure" ("descendant_id", "depth");
+COMMENT ON COLUMN "permission_closure"."id" IS '主键ID';
+COMMENT ON COLUMN "permission_closure"."depth" IS '层级距离';
+COMMENT ON COLUMN "permission_closure"."ancestor_id" IS '祖先权限';
+COMMENT ON COLUMN "permission_closure"."descendant_id" IS '后代权限';
+COMMENT ON TABLE "permission_closure" IS '权限闭包表';
+INSERT INTO "permission_closure" ("ancestor_id", "descendant_id", "depth")
+WITH RECURSIVE "tree" AS (
+    SELECT "id" AS "ancestor_id", "id" AS "descendant_id", 0 AS "depth" FROM "permissions"
+    UNION ALL
+    SELECT "tree"."ancestor_id", "p"."id", "tree"."depth" + 1
+    FROM "tree" JOIN "permissions" "p" ON "p"."parent_id" = "tree"."descendant_id"
+    WHERE "tree"."depth" < 100
+)
+SELECT "ancestor_id", "descendant_id", MIN("depth") FROM "tree" GROUP BY "ancestor_id", "descendant_id";"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "permission_closure";"""
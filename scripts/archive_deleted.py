@@ -0,0 +1,54 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from tortoise import Tortoise
+from app.core.events.database import TORTOISE_ORM
+from app.services.archive import ArchiveJob
+from app.settings.config import (
+    ARCHIVE_MODE,
+    ARCHIVE_RETENTION_DAYS,
+    ARCHIVE_BATCH_SIZE,
+    ARCHIVE_BATCH_SLEEP
+)
+
+
+async def archive_deleted(args) -> None:
+    # 初始化数据库连接
+    await Tortoise.init(config=TORTOISE_ORM)
+    try:
+        job = ArchiveJob(
+            mode="purge" if args.purge else ARCHIVE_MODE,
+            retention_days=args.retention_days,
+            batch_size=args.batch_size,
+            batch_sleep=args.sleep,
+        )
+        report = await job.run_once(dry_run=args.dry_run)
+        result = report.to_dict()
+        for table, count in result["moved"].items():
+            print(f"{table}: {count} 行")
+        action = "待处理" if args.dry_run else ("已删除" if job.mode == "purge" else "已归档")
+        print(f"{action}共 {result['total']} 行，批次 {result['batches']}，耗时 {result['elapsed']}s")
+        if args.json:
+            print(json.dumps(result, ensure_ascii=False))
+    finally:
+        # 关闭数据库连接
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="归档或清理逻辑删除的用户、角色和权限")
+    parser.add_argument("--retention-days", type=int, default=ARCHIVE_RETENTION_DAYS, help="逻辑删除后保留的天数")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="每批处理的行数")
+    parser.add_argument("--sleep", type=float, default=ARCHIVE_BATCH_SLEEP, help="批次之间的暂停时间（秒）")
+    parser.add_argument("--purge", action="store_true", help="直接删除而不移入归档表")
+    parser.add_argument("--dry-run", action="store_true", help="只统计待处理的行数")
+    parser.add_argument("--json", action="store_true", help="额外输出 JSON 格式的结果")
+    args = parser.parse_args()
+    asyncio.run(archive_deleted(args))
@@ -0,0 +1,85 @@
+import os
+import sys
+import random
+import timeit
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from app.core.security.bitset import PermissionRegistry
+
+# 基准参数
+PERMISSION_COUNT = 2000   # 权限总数
+ROLE_COUNT = 50           # 角色总数
+PERMISSIONS_PER_ROLE = 80 # 每个角色的权限数
+USER_ROLE_COUNT = 8       # 用户拥有的角色数
+REQUIRED_COUNT = 3        # 每次检查要求的权限数
+NUMBER = 20000            # 每项测试的执行次数
+
+
+def build_fixture():
+    """构造权限、角色和用户数据"""
+    rng = random.Random(42)
+    codes = [f"module{i // 20}.action{i % 20}" for i in range(PERMISSION_COUNT)]
+    # 权限ID从1开始，与数据库自增主键一致
+    registry = PermissionRegistry({code: i + 1 for i, code in enumerate(codes)})
+
+    role_sets = []
+    role_masks = []
+    for _ in range(ROLE_COUNT):
+        granted = rng.sample(codes, PERMISSIONS_PER_ROLE)
+        role_sets.append(frozenset(granted))
+        role_masks.append(registry.mask_of(granted))
+
+    user_roles = rng.sample(range(ROLE_COUNT), USER_ROLE_COUNT)
+    held = frozenset().union(*(role_sets[r] for r in user_roles))
+    required_hit = rng.sample(sorted(held), REQUIRED_COUNT)
+    required_miss = rng.sample(codes, REQUIRED_COUNT)
+    return registry, role_sets, role_masks, user_roles, required_hit, required_miss
+
+
+def main():
+    registry, role_sets, role_masks, user_roles, required_hit, required_miss = build_fixture()
+
+    def set_path(required, require_all):
+        # 原实现：每个请求构建权限代码集合，再逐个判断
+        user_permissions = set()
+        for r in user_roles:
+            user_permissions.update(role_sets[r])
+        if require_all:
+            return all(perm in user_permissions for perm in required)
+        return any(perm in user_permissions for perm in required)
+
+    def bitset_path(required, require_all):
+        # 位集实现：角色位集按位或，要求编译为位集后按位与
+        mask = 0
+        for r in user_roles:
+            mask |= role_masks[r]
+        return registry.check(mask, required, require_all)
+
+    # 两种实现结果必须一致
+    for required in (required_hit, required_miss):
+        for require_all in (True, False):
+            assert set_path(required, require_all) == bitset_path(required, require_all)
+
+    held = sum(len(role_sets[r]) for r in user_roles)
+    print(f"权限总数: {PERMISSION_COUNT}，用户角色数: {USER_ROLE_COUNT}，用户权限数(含重复): {held}")
+    print(f"{'场景':<24}{'字符串集合(us)':>16}{'位集(us)':>12}{'加速比':>10}")
+    cases = [
+        ("require_all 命中", required_hit, True),
+        ("require_all 未命中", required_miss, True),
+        ("require_any 命中", required_hit, False),
+        ("require_any 未命中", required_miss, False),
+    ]
+    for name, required, require_all in cases:
+        set_time = timeit.timeit(lambda: set_path(required, require_all), number=NUMBER)
+        bit_time = timeit.timeit(lambda: bitset_path(required, require_all), number=NUMBER)
+        print(
+            f"{name:<24}{set_time / NUMBER * 1e6:>16.2f}{bit_time / NUMBER * 1e6:>12.2f}"
+            f"{set_time / bit_time:>10.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
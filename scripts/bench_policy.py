@@ -0,0 +1,160 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from fastapi import HTTPException, status
+
+from app.core.security.bitset import PermissionRegistry
+from app.core.security.deps import require_all, require_any, require_permissions, require_roles
+from app.core.security.principal import Principal
+
+# 基准参数
+PERMISSION_COUNT = 2000   # 权限总数
+USER_PERMISSION_COUNT = 300  # 用户拥有的权限数
+NUMBER = 20000            # 每项测试的执行次数
+
+
+# ---- 原实现：每个组合在请求时调用工厂生成检查函数，以 HTTPException 作为失败分支 ----
+
+def legacy_permissions(permissions, require_all=True):
+    async def check(principal):
+        if principal.is_superadmin:
+            return
+        if not principal.has_permissions(permissions, require_all=require_all):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"权限不足: {', '.join(permissions)}")
+    return check
+
+
+def legacy_roles(roles, require_all=True):
+    async def check(principal):
+        if principal.is_superadmin:
+            return
+        if not principal.has_roles(roles, require_all=require_all):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"角色不足: {', '.join(roles)}")
+    return check
+
+
+def legacy_any(*requirements):
+    async def check(principal):
+        if principal.is_superadmin:
+            return
+        errors = []
+        for requirement in requirements:
+            try:
+                await requirement()(principal)
+                return
+            except HTTPException as e:
+                errors.append(e.detail)
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=" 或 ".join(errors))
+    return check
+
+
+def legacy_all(*requirements):
+    async def check(principal):
+        if principal.is_superadmin:
+            return
+        for requirement in requirements:
+            await requirement()(principal)
+    return check
+
+
+def build_principal(rng: random.Random, codes, roles) -> Principal:
+    """构造拥有部分权限和角色的普通用户主体"""
+    registry = PermissionRegistry({code: i + 1 for i, code in enumerate(codes)})
+    return Principal(
+        user=SimpleNamespace(id=1, is_superadmin=False, is_active=True),
+        roles=frozenset(roles),
+        permission_mask=registry.mask_of(rng.sample(codes, USER_PERMISSION_COUNT)),
+        registry=registry,
+    )
+
+
+def build_cases(principal: Principal, codes):
+    """构造 (名称, 原实现检查函数, 新实现检查函数) 列表"""
+    held = sorted(principal.permissions)
+    missing = sorted(set(codes) - principal.permissions)
+
+    # 每项为 (原实现的检查函数工厂, 新实现的检查函数)
+    def p(*permissions, **kwargs):
+        return lambda: legacy_permissions(list(permissions), **kwargs), require_permissions(list(permissions), **kwargs)
+
+    def r(*roles, **kwargs):
+        return lambda: legacy_roles(list(roles), **kwargs), require_roles(list(roles), **kwargs)
+
+    def any_(*items):
+        return lambda: legacy_any(*(i[0] for i in items)), require_any(*(i[1] for i in items))
+
+    def all_(*items):
+        return lambda: legacy_all(*(i[0] for i in items)), require_all(*(i[1] for i in items))
+
+    cases = {
+        # 三选一，只有最后一个分支满足
+        "any(3) 末项命中": any_(r("admin"), p(missing[0], missing[1]), p(held[0])),
+        "any(3) 全部未命中": any_(r("admin"), p(missing[0], missing[1]), p(missing[2])),
+        "all(3) 命中": all_(p(held[0]), r("editor"), p(held[1], missing[0], require_all=False)),
+        "all(3) 首项未命中": all_(p(missing[0]), r("editor"), p(held[1])),
+        # 嵌套：all(权限, any(角色, all(权限, 权限), any(角色, 权限)))
+        "嵌套 命中": all_(
+            p(held[2]),
+            any_(r("admin"), all_(p(held[3]), p(missing[3])), any_(r("auditor"), p(held[4]))),
+        ),
+        "嵌套 未命中": all_(
+            p(held[2]),
+            any_(r("admin"), all_(p(held[3]), p(missing[3])), any_(r("auditor"), p(missing[4]))),
+        ),
+    }
+    return [(name, legacy(), optimized) for name, (legacy, optimized) in cases.items()]
+
+
+async def timed(check, principal, number: int) -> float:
+    """返回单次检查的平均耗时（微秒），失败时的 HTTPException 计入耗时"""
+    begin = time.perf_counter()
+    for _ in range(number):
+        try:
+            await check(principal)
+        except HTTPException:
+            pass
+    return (time.perf_counter() - begin) / number * 1e6
+
+
+async def allowed(check, principal) -> bool:
+    try:
+        await check(principal)
+        return True
+    except HTTPException:
+        return False
+
+
+async def main(number: int) -> None:
+    rng = random.Random(42)
+    codes = [f"module{i // 20}.action{i % 20}" for i in range(PERMISSION_COUNT)]
+    principal = build_principal(rng, codes, ["editor"])
+
+    print(f"权限总数: {PERMISSION_COUNT}，用户权限数: {USER_PERMISSION_COUNT}")
+    print(f"{'场景':<20}{'原实现(us)':>12}{'策略表达式(us)':>16}{'仅求值(us)':>12}{'加速比':>8}")
+    for name, legacy, optimized in build_cases(principal, codes):
+        # 两种实现的结果必须一致
+        assert await allowed(legacy, principal) == await allowed(optimized, principal) \
+            == optimized.policy.allows(principal), name
+        legacy_us = await timed(legacy, principal, number)
+        optimized_us = await timed(optimized, principal, number)
+        begin = time.perf_counter()
+        for _ in range(number):
+            optimized.policy.allows(principal)
+        eval_us = (time.perf_counter() - begin) / number * 1e6
+        print(f"{name:<20}{legacy_us:>12.2f}{optimized_us:>16.2f}{eval_us:>12.2f}{legacy_us / optimized_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="组合权限检查基准（异常控制流与策略表达式）")
+    parser.add_argument("--number", type=int, default=NUMBER, help="每项测试的执行次数")
+    args = parser.parse_args()
+    asyncio.run(main(args.number))
@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from tortoise import Tortoise, connections
+from app.models.user import User
+from app.services.search import search_index
+
+# 基准参数
+DEFAULT_USERS = 1_000_000  # 用户数
+BATCH_SIZE = 50_000        # 每批插入行数
+REPEAT = 5                 # 每个关键字的查询次数
+TERMS = ["user0004242", "42424", "mple.org", "notfound"]
+
+
+async def seed(count: int) -> None:
+    """批量写入测试用户，触发器同步维护搜索影子表"""
+    connection = connections.get("default")
+    sql = (
+        'INSERT INTO "users" ("username", "email", "password_hash", "is_active", '
+        '"is_superadmin", "is_deleted", "created_at", "updated_at") '
+        "VALUES (?, ?, '', 1, 0, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+    )
+    for start in range(0, count, BATCH_SIZE):
+        rows = [
+            [f"user{i:07d}", f"u{i}@{'example.org' if i % 2 else 'example.com'}"]
+            for i in range(start, min(start + BATCH_SIZE, count))
+        ]
+        await connection.execute_many(sql, rows)
+
+
+async def timed(query) -> tuple:
+    """返回 (平均耗时毫秒, 命中行数)"""
+    elapsed = 0.0
+    for _ in range(REPEAT):
+        begin = time.perf_counter()
+        total = await query.count()
+        elapsed += time.perf_counter() - begin
+    return elapsed / REPEAT * 1000, total
+
+
+async def main(count: int) -> None:
+    with tempfile.TemporaryDirectory() as workdir:
+        await Tortoise.init(
+            db_url=f"sqlite://{os.path.join(workdir, 'bench.sqlite3')}",
+            modules={"models": ["app.models"]},
+        )
+        try:
+            await Tortoise.generate_schemas()
+            # 先建立索引再写入，同时计入触发器的写入开销
+            await search_index.setup()
+            begin = time.perf_counter()
+            await seed(count)
+            print(f"写入 {count} 个用户耗时: {time.perf_counter() - begin:.1f}s")
+
+            print(f"{'字段':<10}{'关键字':<14}{'LIKE扫描(ms)':>14}{'三元组索引(ms)':>16}{'命中行数':>10}")
+            for field in ("username", "email"):
+                for term in TERMS:
+                    scan_ms, scan_total = await timed(User.filter(**{f"{field}__icontains": term}))
+                    index_ms, index_total = await timed(search_index.filter(User.all(), field, term))
+                    # 两种实现结果必须一致
+                    assert scan_total == index_total, (field, term, scan_total, index_total)
+                    print(f"{field:<10}{term:<14}{scan_ms:>14.2f}{index_ms:>16.2f}{index_total:>10}")
+        finally:
+            await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="用户子串搜索基准（SQLite FTS5 trigram）")
+    parser.add_argument("--users", type=int, default=DEFAULT_USERS, help="用户数量")
+    args = parser.parse_args()
+    asyncio.run(main(args.users))
@@ -0,0 +1,119 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+from datetime import datetime
+from typing import List
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.schemas.rbac import PermissionTreeNode
+from app.schemas.user import UserList
+from app.utils.serializer import _serialize_python, json_response, serialize_model
+
+# 基准参数
+SIZES = (10, 1_000, 10_000)  # 每个响应包含的条目数
+TREE_FANOUT = 10             # 权限树每个节点的子节点数
+MIN_SECONDS = 0.5            # 每项至少运行的时间
+
+
+def build_users(count: int) -> dict:
+    """构造用户列表响应内容（字典形式，与 .values() 的结果相同）"""
+    return {
+        "total": count,
+        "items": [
+            {"id": i, "username": f"user{i:07d}", "email": f"u{i}@example.org", "is_active": bool(i % 2)}
+            for i in range(count)
+        ],
+        "next_cursor": None,
+    }
+
+
+def build_tree(count: int) -> List[PermissionTreeNode]:
+    """构造包含 count 个节点、每层 TREE_FANOUT 个分支的权限树"""
+    nodes = [
+        PermissionTreeNode(
+            id=i, name=f"权限{i}", code=f"perm.{i}", description=None, type="api",
+            path=f"/api/perm/{i}", parent_id=None if i == 0 else (i - 1) // TREE_FANOUT,
+            sort_order=i, children=[]
+        )
+        for i in range(count)
+    ]
+    for node in nodes[1:]:
+        nodes[node.parent_id].children.append(node)
+    return [nodes[0]]
+
+
+async def timed(func) -> float:
+    """返回单次调用的平均耗时（毫秒）"""
+    runs = 0
+    begin = time.perf_counter()
+    while True:
+        result = func()
+        if asyncio.iscoroutine(result):
+            await result
+        runs += 1
+        elapsed = time.perf_counter() - begin
+        if elapsed >= MIN_SECONDS:
+            return elapsed / runs * 1000
+
+
+async def fastapi_path(field, content, response_class) -> bytes:
+    """模拟 FastAPI 对带 response_model 的路由的处理：校验、转换后由响应类编码"""
+    data = await serialize_response(field=field, response_content=content, is_coroutine=True)
+    return response_class(data).body
+
+
+async def main(sizes) -> None:
+    user_field = create_model_field("UserList", UserList, mode="serialization")
+    tree_field = create_model_field("PermissionTree", List[PermissionTreeNode], mode="serialization")
+    archive_row = {"id": 1, "created_at": datetime.now(), "tags": ["a", "b"], "extra": {"at": datetime.now()}}
+
+    print(f"{'场景':<28}{'条目数':>8}{'json(ms)':>12}{'orjson(ms)':>12}{'加速比':>8}")
+    for size in sizes:
+        users = build_users(size)
+        tree = build_tree(size)
+        rows = [dict(archive_row, id=i) for i in range(size)]
+        cases = [
+            (
+                "UserList 响应模型",
+                lambda: fastapi_path(user_field, users, JSONResponse),
+                lambda: fastapi_path(user_field, users, ORJSONResponse),
+            ),
+            (
+                "UserList 字典直出",
+                lambda: fastapi_path(user_field, users, JSONResponse),
+                lambda: json_response(users).body,
+            ),
+            (
+                "PermissionTreeNode 树",
+                lambda: fastapi_path(tree_field, tree, JSONResponse),
+                lambda: fastapi_path(tree_field, tree, ORJSONResponse),
+            ),
+            (
+                "serialize_model",
+                lambda: _serialize_python(rows),
+                lambda: serialize_model(rows),
+            ),
+        ]
+        for name, baseline, optimized in cases:
+            baseline_ms = await timed(baseline)
+            optimized_ms = await timed(optimized)
+            print(
+                f"{name:<28}{size:>8}{baseline_ms:>12.3f}{optimized_ms:>12.3f}"
+                f"{baseline_ms / optimized_ms:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="响应序列化基准（标准库 json 与 orjson）")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="每个响应的条目数")
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes))
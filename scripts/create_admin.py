@@ -9,7 +9,8 @@ sys.path.append(project_root)
 
 from tortoise import Tortoise
 from app.models.user import User
-from app.models.rbac import Role, UserRole  # Import Role and UserRole models
+from app.models.rbac import Role  # Import Role model
+from app.services.user import UserService
 from app.core.events.database import TORTOISE_ORM
 
 def hash_password(password: str) -> str:
@@ -40,7 +41,7 @@ async def create_admin_user():
             )
 
             # Assign admin role to admin user
-            await UserRole.create(user=admin_user, role=admin_role)
+            await UserService.assign_roles(admin_user.id, add=[admin_role.id])
             print("管理员用户创建成功，并分配了管理员角色")
         else:
             print("管理员用户已经存在，跳过创建")
@@ -0,0 +1,76 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from tortoise import Tortoise
+from app.core.events.database import TORTOISE_ORM
+from app.core.security.hashing import PasswordHasher
+from app.services.search import search_index
+from app.services.user_import import IMPORT_FORMATS, UserImporter
+from app.settings.config import IMPORT_CHUNK_SIZE, IMPORT_HASH_WORKERS, IMPORT_MAX_ERRORS
+
+
+async def read_lines(path: str):
+    """逐行读取导入文件"""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for line in f:
+            yield line.rstrip("\r\n")
+
+
+def print_progress(report) -> None:
+    rate = report.processed / report.elapsed if report.elapsed else 0
+    print(
+        f"\r已处理 {report.processed} 行，创建 {report.created}，失败 {report.failed}，"
+        f"{rate:.0f} 行/秒",
+        end="",
+        flush=True,
+    )
+
+
+async def import_users(args) -> None:
+    # 命令行导入独占本进程，使用进程池哈希密码，并发上限与进程数一致
+    workers = args.workers or os.cpu_count() or 1
+    hasher = PasswordHasher(executor_type="process", workers=workers, max_concurrency=workers)
+    # 初始化数据库连接
+    await Tortoise.init(config=TORTOISE_ORM)
+    try:
+        await search_index.setup()
+        importer = UserImporter(
+            chunk_size=args.chunk_size,
+            hasher=hasher,
+            max_errors=IMPORT_MAX_ERRORS,
+        )
+        report = await importer.run(read_lines(args.path), args.format, print_progress)
+        print()
+        result = report.to_dict()
+        for error in result["errors"]:
+            print(f"第 {error['line']} 行 ({error['username']}): {error['error']}")
+        if report.failed > len(report.errors):
+            print(f"... 另有 {report.failed - len(report.errors)} 行失败未列出")
+        if args.report:
+            with open(args.report, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"导入完成：创建 {report.created} 个用户，失败 {report.failed} 行，耗时 {report.elapsed:.1f}s")
+    finally:
+        # 关闭数据库连接
+        await Tortoise.close_connections()
+        hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="从 CSV/NDJSON 文件批量导入用户")
+    parser.add_argument("path", help="导入文件路径")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="文件格式，默认按扩展名判断")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="每批处理的行数")
+    parser.add_argument("--workers", type=int, default=IMPORT_HASH_WORKERS, help="密码哈希进程数，0 表示CPU核数")
+    parser.add_argument("--report", help="将导入结果（含失败行）写入指定 JSON 文件")
+    args = parser.parse_args()
+    if args.format is None:
+        args.format = "ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv"
+    asyncio.run(import_users(args))
@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from tortoise import Tortoise
+from app.core.events.database import TORTOISE_ORM
+from app.services.rbac import PermissionService
+from app.services.rbac_sync import MANIFEST_FORMATS, RbacSyncService, load_manifest
+
+
+def print_plan(plan) -> None:
+    """逐行打印同步计划：+ 新建/授予，~ 修改，- 删除/收回"""
+    for kind, creates, updates, restores, deletes in (
+        ("权限", plan.create_permissions, plan.update_permissions, plan.restore_permissions, plan.delete_permissions),
+        ("角色", plan.create_roles, plan.update_roles, plan.restore_roles, plan.delete_roles),
+    ):
+        for code in creates:
+            print(f"+ {kind} {code}")
+        for code in restores:
+            print(f"~ {kind} {code}: 恢复")
+        for code, changes in updates.items():
+            for name, (old, new) in changes.items():
+                print(f"~ {kind} {code}: {name} {old!r} -> {new!r}")
+        for code in deletes:
+            print(f"- {kind} {code}")
+    for role, codes in plan.grants.items():
+        for code in codes:
+            print(f"+ 授权 {role} -> {code}")
+    for role, codes in plan.revokes.items():
+        for code in codes:
+            print(f"- 授权 {role} -> {code}")
+
+
+async def sync_rbac(args) -> None:
+    with open(args.path, "rb") as f:
+        manifest = load_manifest(f.read(), args.format)
+
+    # 初始化数据库连接
+    await Tortoise.init(config=TORTOISE_ORM)
+    try:
+        await PermissionService.ensure_closure()
+        plan = await RbacSyncService.sync(manifest, dry_run=args.dry_run, prune=args.prune)
+        print_plan(plan)
+        if args.report:
+            with open(args.report, "w", encoding="utf-8") as f:
+                json.dump(plan.to_dict(), f, ensure_ascii=False, indent=2)
+        if plan.empty:
+            print("数据库已与清单一致，无需同步")
+        elif args.dry_run:
+            print("以上为同步计划（dry-run），未做任何修改")
+        else:
+            print(f"同步完成，耗时 {plan.elapsed:.2f}s")
+    finally:
+        # 关闭数据库连接
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="按 YAML/JSON 清单同步权限、角色和角色授权")
+    parser.add_argument("path", help="清单文件路径")
+    parser.add_argument("--format", choices=MANIFEST_FORMATS, help="清单格式，默认按扩展名判断")
+    parser.add_argument("--dry-run", action="store_true", help="只打印同步计划，不做修改")
+    parser.add_argument("--prune", action="store_true", help="删除清单中未出现的权限和角色")
+    parser.add_argument("--report", help="将同步计划写入指定 JSON 文件")
+    args = parser.parse_args()
+    if args.format is None:
+        args.format = "json" if args.path.endswith(".json") else "yaml"
+    try:
+        asyncio.run(sync_rbac(args))
+    except ValueError as e:
+        print(f"同步失败: {e}")
+        sys.exit(1)
@@ -0,0 +1,46 @@
+import asyncio
+import copy
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from tortoise import Tortoise
+from app.core.events.database import TORTOISE_ORM
+from app.core.security.rbac_cache import rbac_cache
+from app.services.permission_tree import permission_tree
+
+# 测试使用内存 SQLite 数据库，直接按模型建表
+TEST_ORM = copy.deepcopy(TORTOISE_ORM)
+TEST_ORM["connections"]["default"] = "sqlite://:memory:"
+TEST_ORM["apps"]["models"]["models"] = ["app.models"]
+
+
+def _reset_caches() -> None:
+    """清空进程级缓存，锁与事件循环绑定，每个测试重新创建"""
+    rbac_cache._snapshot = None
+    rbac_cache._checked_at = 0.0
+    rbac_cache._user_roles.clear()
+    rbac_cache._lock = asyncio.Lock()
+    permission_tree.clear()
+    permission_tree._lock = asyncio.Lock()
+
+
+@pytest.fixture
+def run_db():
+    """返回在全新内存数据库中运行协程函数的执行器"""
+    def run(test):
+        async def wrapper():
+            _reset_caches()
+            await Tortoise.init(config=TEST_ORM)
+            await Tortoise.generate_schemas()
+            try:
+                return await test()
+            finally:
+                await Tortoise.close_connections()
+        return asyncio.run(wrapper())
+    return run
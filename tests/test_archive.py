@@ -0,0 +1,55 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from tortoise.exceptions import IntegrityError
+
+from app.core.security.rbac_cache import rbac_cache
+from app.models.archive import ArchivedRecord
+from app.models.rbac import Permission, Role
+from app.schemas.rbac import RbacManifest
+from app.services.archive import ArchiveJob
+from app.services.rbac_sync import RbacSyncService
+
+
+def test_purging_permissions_bumps_rbac_version(run_db):
+    async def scenario():
+        await RbacSyncService.sync(RbacManifest.model_validate({
+            "permissions": [{"code": "parent", "name": "父", "type": "menu", "children": [
+                {"code": "child", "name": "子", "type": "api"},
+            ]}],
+        }))
+        # 逻辑删除父权限，删除时间早于保留期
+        await Permission.filter(code="parent").update(
+            is_deleted=True, deleted_at=datetime.now() - timedelta(days=30)
+        )
+        version = await rbac_cache.get_version()
+
+        report = await ArchiveJob(mode="purge", retention_days=7).run_once()
+        assert report.moved[Permission._meta.db_table] == 1
+        assert await Permission.get(code="child").values_list("parent_id", flat=True) is None
+        assert await rbac_cache.get_version() == version + 1
+
+    run_db(scenario)
+
+
+def test_concurrent_runs_archive_each_record_once(run_db):
+    async def scenario():
+        await Role.bulk_create([
+            Role(code=f"r{i}", name=f"角色{i}", is_deleted=True, deleted_at=datetime.now() - timedelta(days=30))
+            for i in range(5)
+        ])
+        jobs = [ArchiveJob(mode="archive", retention_days=7, batch_size=2, batch_sleep=0) for _ in range(2)]
+        reports = await asyncio.gather(*(job.run_once() for job in jobs))
+
+        table = Role._meta.db_table
+        assert sum(report.moved[table] for report in reports) == 5
+        assert await ArchivedRecord.filter(table_name=table).count() == 5
+        assert not await Role.with_deleted().exists()
+
+        # 同一记录不能重复归档
+        record = await ArchivedRecord.filter(table_name=table).first()
+        with pytest.raises(IntegrityError):
+            await ArchivedRecord.create(table_name=table, record_id=record.record_id, data={})
+
+    run_db(scenario)
@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+from tortoise.exceptions import IntegrityError
+
+from app.utils.integrity import unique_violation_message
+
+MESSAGES = {"username": "用户名已存在", "email": "邮箱已存在"}
+
+
+def test_sqlite_column():
+    error = IntegrityError("UNIQUE constraint failed: users.email")
+    assert unique_violation_message(error, MESSAGES) == "邮箱已存在"
+
+
+def test_postgres_ignores_conflicting_value():
+    origin = SimpleNamespace(
+        constraint_name="users_email_key",
+        detail="Key (email)=(bob.username@x.com) already exists.",
+    )
+    error = IntegrityError(origin)
+    assert unique_violation_message(error, MESSAGES) == "邮箱已存在"
+
+    # 只有详情时按 Key (列名) 判断
+    origin = SimpleNamespace(detail="Key (email)=(bob.username@x.com) already exists.")
+    assert unique_violation_message(IntegrityError(origin), MESSAGES) == "邮箱已存在"
+
+
+def test_postgres_unique_together_constraint():
+    error = IntegrityError('duplicate key value violates unique constraint "uid_users_username_3f2a1c"')
+    assert unique_violation_message(error, MESSAGES) == "用户名已存在"
+
+
+def test_mysql_ignores_conflicting_value():
+    error = IntegrityError("(1062, \"Duplicate entry 'bob.username@x.com' for key 'users.email'\")")
+    assert unique_violation_message(error, MESSAGES) == "邮箱已存在"
+
+
+def test_unknown_constraint():
+    error = IntegrityError("NOT NULL constraint failed: users.username")
+    assert unique_violation_message(error, MESSAGES, default="数据已存在") == "数据已存在"
@@ -0,0 +1,38 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from tortoise import connections
+
+from app.models.user import User
+from app.services.last_login import LastLoginRecorder
+
+
+def test_failed_flush_does_not_spin(run_db, monkeypatch):
+    async def test():
+        recorder = LastLoginRecorder(flush_interval=0.05, max_pending=2)
+        connection = connections.get(User._meta.default_connection)
+        calls = 0
+
+        async def fail(query, values):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0)
+            raise ConnectionError("database unavailable")
+
+        monkeypatch.setattr(connection, "execute_many", fail)
+        now = datetime.now()
+        recorder.start()
+        try:
+            recorder.record(1, now)
+            recorder.record(2, now)
+            await asyncio.sleep(0.3)
+        finally:
+            recorder._task.cancel()
+        # 失败后按间隔重试，而不是在缓冲达到上限时连续重试
+        assert 1 <= calls <= 4
+        # 失败的数据保留在缓冲中，较新的时间不被覆盖
+        recorder.record(1, now + timedelta(seconds=1))
+        assert recorder._pending == {1: now + timedelta(seconds=1), 2: now}
+        assert recorder.stats()["failures"] == calls
+
+    run_db(test)
@@ -0,0 +1,26 @@
+import asyncio
+
+from app.core.security import hashing
+from app.core.security.hashing import PasswordHasher
+
+
+def test_hash_many_shares_concurrency_limit(monkeypatch):
+    # 只验证分批与并发控制，不做真实的 bcrypt 运算
+    monkeypatch.setattr(hashing, "get_password_hash", lambda password: f"hashed:{password}")
+
+    async def scenario():
+        hasher = PasswordHasher(executor_type="thread", workers=4, max_concurrency=2)
+        passwords = [f"secret{i}" for i in range(10)]
+        try:
+            # 两个并发批量任务共用同一执行器和并发上限
+            results = await asyncio.gather(hasher.hash_many(passwords), hasher.hash_many(passwords[:3]))
+            assert await hasher.hash_many([]) == []
+        finally:
+            hasher.shutdown()
+        assert results == [[f"hashed:{p}" for p in passwords], [f"hashed:{p}" for p in passwords[:3]]]
+        stats = hasher.stats()
+        # 每个批量任务按工作线程数分为最多 4 份，每份占用一个并发名额
+        assert stats["completed"] == 4 + 3
+        assert stats["max_queue_depth"] > 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,52 @@
+import asyncio
+
+from app.models.rbac import Permission, Role
+from app.models.user import User
+from app.schemas.rbac import PermissionCreate
+from app.services.rbac import PermissionService, RoleService
+from app.services.user import UserService
+
+
+def test_concurrent_assign_permissions(run_db):
+    async def scenario():
+        role = await Role.create(name="编辑", code="editor")
+        permission = await Permission.create(name="权限", code="p", type="api")
+
+        results = await asyncio.gather(*(
+            RoleService.assign_permissions(role.id, add=[permission.id]) for _ in range(3)
+        ))
+        # 只有一次真正插入，其余调用看到的是已提交的集合
+        assert sorted(results) == [(0, 0, 1), (0, 0, 1), (1, 0, 1)]
+        assert await RoleService.get_role_permission_ids(role.id) == [permission.id]
+
+    run_db(scenario)
+
+
+def test_concurrent_assign_roles(run_db):
+    async def scenario():
+        user = await User.create(username="u", email="u@example.org", password_hash="")
+        role = await Role.create(name="编辑", code="editor")
+
+        results = await asyncio.gather(*(
+            UserService.assign_roles(user.id, replace=[role.id]) for _ in range(3)
+        ))
+        assert sorted(results) == [(0, 0, 1), (0, 0, 1), (1, 0, 1)]
+        assert await UserService.get_user_role_ids(user.id) == [role.id]
+
+    run_db(scenario)
+
+
+def test_cascade_delete_returns_permission_count(run_db):
+    async def scenario():
+        root = await PermissionService.create_permission(PermissionCreate(name="根", code="root", type="menu"))
+        child = await PermissionService.create_permission(
+            PermissionCreate(name="子", code="child", type="menu", parent_id=root.id)
+        )
+        await PermissionService.create_permission(
+            PermissionCreate(name="孙", code="leaf", type="api", parent_id=child.id)
+        )
+
+        assert await PermissionService.delete_permission(root.id, cascade=True) == 3
+        assert not await Permission.with_deleted().exists()
+
+    run_db(scenario)
@@ -0,0 +1,27 @@
+from app.core.security.claims import build_rbac_claims, principal_from_claims
+from app.core.security.rbac_cache import rbac_cache
+from app.models.rbac import Permission, Role, UserRole
+from app.models.user import User
+
+
+def test_permission_bitmap_does_not_grow_with_permission_ids(run_db):
+    async def scenario():
+        user = await User.create(username="u", email="u@example.org", password_hash="")
+        role = await Role.create(name="编辑", code="editor")
+        low = await Permission.create(name="低", code="low", type="api")
+        high = await Permission.create(id=60000, name="高", code="high", type="api")
+        await Permission.create(name="未授予", code="other", type="api")
+        await role.permissions.add(low, high)
+        await UserRole.create(user=user, role=role)
+        await rbac_cache.bump_version()
+
+        claims = await build_rbac_claims(user)
+        # 两个被授予的权限占用位序号 0 和 1
+        assert claims["perms"] == "Aw"
+
+        principal = principal_from_claims(user, claims, await rbac_cache.get_snapshot())
+        assert principal.permissions == {"low", "high"}
+        assert principal.has_permissions(["high"])
+        assert not principal.has_permissions(["other"])
+
+    run_db(scenario)
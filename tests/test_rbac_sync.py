@@ -0,0 +1,87 @@
+from app.models.rbac import Permission, PermissionClosure, Role
+from app.schemas.rbac import RbacManifest
+from app.services.rbac import PermissionService
+from app.services.rbac_sync import RbacSyncService
+
+
+async def _closure():
+    return sorted(await PermissionClosure.all().values_list("ancestor_id", "descendant_id", "depth"))
+
+
+def test_sync_reuses_name_released_by_rename(run_db):
+    async def scenario():
+        await RbacSyncService.sync(RbacManifest.model_validate({
+            "permissions": [{"code": "a", "name": "X", "type": "api"}],
+            "roles": [{"code": "r1", "name": "R"}],
+        }))
+
+        # a 改名为 Z，新建的 b 使用 a 原来的名称 X；角色同理
+        manifest = RbacManifest.model_validate({
+            "permissions": [
+                {"code": "a", "name": "Z", "type": "api"},
+                {"code": "b", "name": "X", "type": "api"},
+            ],
+            "roles": [{"code": "r1", "name": "S"}, {"code": "r2", "name": "R"}],
+        })
+        plan = await RbacSyncService.sync(manifest, dry_run=True)
+        assert plan.create_permissions == ["b"]
+        assert plan.update_permissions == {"a": {"name": ["X", "Z"]}}
+
+        await RbacSyncService.sync(manifest)
+        assert dict(await Permission.all().values_list("code", "name")) == {"a": "Z", "b": "X"}
+        assert dict(await Role.all().values_list("code", "name")) == {"r1": "S", "r2": "R"}
+
+    run_db(scenario)
+
+
+def test_sync_moves_existing_permission_under_new_parent(run_db):
+    async def scenario():
+        await RbacSyncService.sync(RbacManifest.model_validate({
+            "permissions": [{"code": "old", "name": "旧", "type": "menu", "children": [
+                {"code": "leaf", "name": "叶子", "type": "api"},
+            ]}],
+        }))
+
+        # 已有的 leaf 移到新建的 new 下，同时删除原父权限
+        await RbacSyncService.sync(RbacManifest.model_validate({
+            "permissions": [{"code": "new", "name": "新", "type": "menu", "children": [
+                {"code": "leaf", "name": "叶子", "type": "api"},
+            ]}],
+        }), prune=True)
+
+        assert dict(await Permission.all().values_list("code", "parent__code")) == {"new": None, "leaf": "new"}
+        closure = await _closure()
+        await PermissionService.rebuild_closure()
+        assert closure == await _closure()
+
+    run_db(scenario)
+
+
+def _manifest(permission_names, role_names):
+    return RbacManifest.model_validate({
+        "permissions": [{"code": code, "name": name, "type": "api"} for code, name in permission_names.items()],
+        "roles": [{"code": code, "name": name} for code, name in role_names.items()],
+    })
+
+
+def test_sync_swaps_names(run_db):
+    async def scenario():
+        await RbacSyncService.sync(_manifest({"a": "X", "b": "Y"}, {"r1": "R", "r2": "S"}))
+
+        await RbacSyncService.sync(_manifest({"a": "Y", "b": "X"}, {"r1": "S", "r2": "R"}))
+        assert dict(await Permission.all().values_list("code", "name")) == {"a": "Y", "b": "X"}
+        assert dict(await Role.all().values_list("code", "name")) == {"r1": "S", "r2": "R"}
+
+    run_db(scenario)
+
+
+def test_sync_chains_renames(run_db):
+    async def scenario():
+        await RbacSyncService.sync(_manifest({"a": "X", "b": "Y"}, {"r1": "R", "r2": "S"}))
+
+        # a 使用 b 原来的名称，b 改为新名称
+        await RbacSyncService.sync(_manifest({"a": "Y", "b": "Z"}, {"r1": "S", "r2": "T"}))
+        assert dict(await Permission.all().values_list("code", "name")) == {"a": "Y", "b": "Z"}
+        assert dict(await Role.all().values_list("code", "name")) == {"r1": "S", "r2": "T"}
+
+    run_db(scenario)
@@ -0,0 +1,91 @@
+import asyncio
+
+from app.core.security.rbac_cache import rbac_cache
+from app.models.rbac import Permission, Role
+from app.models.user import User
+from app.schemas.rbac import RbacManifest
+from app.services.rbac import RoleService
+from app.services.rbac_sync import RbacSyncService
+from app.services.user import UserService
+
+# 超过该时间仍未完成视为互相等待
+DEADLOCK_TIMEOUT = 5
+
+
+async def _refresh_snapshots(stop: asyncio.Event) -> None:
+    """不断强制刷新快照，模拟并发请求中的版本检查"""
+    while not stop.is_set():
+        rbac_cache._checked_at = float("-inf")
+        await rbac_cache.get_snapshot()
+        await asyncio.sleep(0)
+
+
+async def _with_concurrent_refresh(write):
+    """在并发刷新快照的同时执行写入，返回写入结果"""
+    stop = asyncio.Event()
+    refresher = asyncio.create_task(_refresh_snapshots(stop))
+    try:
+        return await asyncio.wait_for(write, timeout=DEADLOCK_TIMEOUT)
+    finally:
+        stop.set()
+        await asyncio.wait_for(refresher, timeout=DEADLOCK_TIMEOUT)
+
+
+def test_bulk_assign_and_revoke_roles_with_concurrent_snapshot_refresh(run_db):
+    async def scenario():
+        users = [await User.create(username=f"u{i}", email=f"u{i}@example.org", password_hash="") for i in range(3)]
+        role = await Role.create(name="编辑", code="editor")
+        user_ids = [user.id for user in users]
+        before = await rbac_cache.fetch_version()
+
+        assert await _with_concurrent_refresh(UserService.bulk_assign_roles(user_ids, [role.id])) == (3, 3)
+        assert await _with_concurrent_refresh(UserService.bulk_revoke_roles(user_ids, [role.id])) == (3, 3)
+
+        # 每次批量操作只递增一次版本号，且本地快照与提交后的版本一致
+        assert await rbac_cache.fetch_version() == before + 2
+        assert (await rbac_cache.get_snapshot()).version == before + 2
+
+    run_db(scenario)
+
+
+def test_assign_roles_and_permissions_with_concurrent_snapshot_refresh(run_db):
+    async def scenario():
+        user = await User.create(username="u", email="u@example.org", password_hash="")
+        role = await Role.create(name="编辑", code="editor")
+        permissions = [await Permission.create(name=f"权限{i}", code=f"p{i}", type="api") for i in range(3)]
+        before = await rbac_cache.fetch_version()
+
+        permission_ids = [permission.id for permission in permissions]
+        assert await _with_concurrent_refresh(
+            RoleService.assign_permissions(role.id, replace=permission_ids)
+        ) == (3, 0, 3)
+        assert await _with_concurrent_refresh(UserService.assign_roles(user.id, add=[role.id])) == (1, 0, 1)
+
+        assert await rbac_cache.fetch_version() == before + 2
+        snapshot = await rbac_cache.get_snapshot()
+        assert snapshot.version == before + 2
+        assert snapshot.permissions_of([role.id]) == {"p0", "p1", "p2"}
+
+    run_db(scenario)
+
+
+def test_rbac_sync_with_concurrent_snapshot_refresh(run_db):
+    async def scenario():
+        manifest = RbacManifest.model_validate({
+            "permissions": [{"code": "sys", "name": "系统", "type": "menu", "children": [
+                {"code": "sys.user", "name": "用户", "type": "api"},
+            ]}],
+            "roles": [{"code": "admin", "name": "管理员", "permissions": ["sys", "sys.user"]}],
+        })
+        before = await rbac_cache.fetch_version()
+
+        plan = await _with_concurrent_refresh(RbacSyncService.sync(manifest))
+        assert plan.create_permissions == ["sys", "sys.user"]
+
+        assert await rbac_cache.fetch_version() == before + 1
+        snapshot = await rbac_cache.get_snapshot()
+        role_id = await Role.get(code="admin").values_list("id", flat=True)
+        assert snapshot.version == before + 1
+        assert snapshot.permissions_of([role_id]) == {"sys", "sys.user"}
+
+    run_db(scenario)
@@ -0,0 +1,50 @@
+import asyncio
+from typing import AsyncIterator, List
+
+from app.schemas.user import UserCreate
+from app.services.user_import import iter_lines, parse_records
+
+
+async def _chunks(data: bytes, size: int) -> AsyncIterator[bytes]:
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def _parse(data: bytes, fmt: str = "csv", chunk_size: int = 4) -> List:
+    async def collect():
+        return [item async for item in parse_records(iter_lines(_chunks(data, chunk_size)), fmt)]
+    return asyncio.run(collect())
+
+
+def test_csv_with_utf8_bom():
+    data = "﻿username,email,password\r\nalice,alice@example.org,secret123\r\n".encode("utf-8")
+    # 按 1 字节切块，BOM 跨越多个块
+    records = _parse(data, chunk_size=1)
+    assert records == [(2, {"username": "alice", "email": "alice@example.org", "password": "secret123"})]
+    UserCreate.model_validate(records[0][1])
+
+
+def test_csv_quoted_field_with_newlines():
+    data = (
+        'username,email,password\n'
+        'bob,bob@example.org,"pa,ss\n\nword"\n'
+        '\n'
+        'carol,carol@example.org,"say ""hi""\nthere"\n'
+        'dave,dave@example.org\n'
+        'erin,erin@example.org,"never closed\n'
+    ).encode("utf-8")
+    assert _parse(data) == [
+        (2, {"username": "bob", "email": "bob@example.org", "password": "pa,ss\n\nword"}),
+        (6, {"username": "carol", "email": "carol@example.org", "password": 'say "hi"\nthere'}),
+        (8, "列数与表头不一致，应为 3 列"),
+        (9, "引号未闭合"),
+    ]
+
+
+def test_ndjson_lines():
+    data = b'\xef\xbb\xbf{"username": "a"}\n\n[1]\n{bad\n'
+    assert _parse(data, "ndjson") == [
+        (1, {"username": "a"}),
+        (3, "每行必须是一个 JSON 对象"),
+        (4, "JSON 格式错误"),
+    ]